@@ -0,0 +1,224 @@
+"""
+Сравнение ленты и страницы новости под WSGI и ASGI.
+
+WSGI обслуживает запросы синхронными представлениями в пуле потоков,
+ASGI — асинхронными представлениями (NEWS_ASYNC_VIEWS) в цикле событий.
+Приложения вызываются в процессе, без сети, чтобы замер показывал
+работу Django, а не HTTP-сервера. Каждый режим запускается в отдельном
+процессе над одной и той же временной базой.
+
+Запуск из корня репозитория:
+python benchmarks/asgi_vs_wsgi.py [--requests 2000] [--concurrency 100]
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from pathlib import Path
+
+from common import percentile, setup_django
+
+NEWS_COUNT = 200
+COMMENTS_ON_HOT_NEWS = 300
+HOST = b'localhost'
+
+
+def seed(database):
+    """Создаёт базу с новостями и комментариями к первым из них."""
+    setup_django('ya_news', database)
+    from django.contrib.auth import get_user_model
+    from django.core.management import call_command
+    from django.utils import timezone
+
+    from news.models import Comment, News
+
+    call_command('migrate', verbosity=0)
+    today = timezone.now().date()
+    News.objects.bulk_create(
+        News(
+            title=f'Новость {index}',
+            text='Текст новости. ' * 50,
+            date=today - timedelta(days=index),
+        )
+        for index in range(NEWS_COUNT)
+    )
+    author = get_user_model().objects.create(username='author')
+    hot = News.objects.order_by('-date')[:10]
+    Comment.objects.bulk_create(
+        Comment(news=news, author=author, text=f'Комментарий {index}')
+        for news in hot
+        for index in range(COMMENTS_ON_HOT_NEWS // (1 + news.pk % 3))
+    )
+    News.objects.update_comment_counts()
+    return list(News.objects.values_list('pk', flat=True))
+
+
+def make_paths(pks, count):
+    """Половина запросов — лента, половина — страницы новостей."""
+    rng = random.Random(0)
+    return [
+        '/' if rng.random() < 0.5 else f'/news/{rng.choice(pks[:20])}/'
+        for _ in range(count)
+    ]
+
+
+def run_wsgi(paths, concurrency):
+    from django.core.handlers.wsgi import WSGIHandler
+
+    application = WSGIHandler()
+
+    def call(path):
+        status = []
+        environ = {
+            'REQUEST_METHOD': 'GET',
+            'PATH_INFO': path,
+            'QUERY_STRING': '',
+            'SERVER_NAME': HOST.decode(),
+            'SERVER_PORT': '80',
+            'HTTP_HOST': HOST.decode(),
+            'wsgi.url_scheme': 'http',
+            'wsgi.input': sys.stdin.buffer,
+            'wsgi.errors': sys.stderr,
+        }
+        start = time.perf_counter()
+        response = application(
+            environ, lambda code, headers: status.append(code)
+        )
+        b''.join(response)
+        response.close()
+        return time.perf_counter() - start, int(status[0].split()[0])
+
+    with ThreadPoolExecutor(concurrency) as pool:
+        start = time.perf_counter()
+        results = list(pool.map(call, paths))
+    return time.perf_counter() - start, results
+
+
+def run_asgi(paths, concurrency):
+    from django.core.handlers.asgi import ASGIHandler
+
+    application = ASGIHandler()
+
+    async def call(path, semaphore):
+        status = []
+        body_sent = False
+        disconnected = asyncio.Event()
+
+        async def receive():
+            nonlocal body_sent
+            if not body_sent:
+                body_sent = True
+                return {'type': 'http.request', 'body': b''}
+            await disconnected.wait()
+            return {'type': 'http.disconnect'}
+
+        async def send(message):
+            if message['type'] == 'http.response.start':
+                status.append(message['status'])
+
+        scope = {
+            'type': 'http',
+            'asgi': {'version': '3.0'},
+            'http_version': '1.1',
+            'method': 'GET',
+            'scheme': 'http',
+            'path': path,
+            'raw_path': path.encode(),
+            'query_string': b'',
+            'root_path': '',
+            'headers': [(b'host', HOST)],
+            'client': ('127.0.0.1', 50000),
+            'server': (HOST.decode(), 80),
+        }
+        async with semaphore:
+            start = time.perf_counter()
+            await application(scope, receive, send)
+            elapsed = time.perf_counter() - start
+        disconnected.set()
+        return elapsed, status[0]
+
+    async def main():
+        semaphore = asyncio.Semaphore(concurrency)
+        start = time.perf_counter()
+        results = await asyncio.gather(
+            *(call(path, semaphore) for path in paths)
+        )
+        return time.perf_counter() - start, results
+
+    return asyncio.run(main())
+
+
+def child(mode, database, requests, concurrency):
+    """Замер одного режима; результат печатается в JSON."""
+    setup_django('ya_news', database)
+    from django.conf import settings
+
+    from news.models import News
+
+    settings.DEBUG = False
+    paths = make_paths(
+        list(News.objects.values_list('pk', flat=True)), requests
+    )
+    run = run_asgi if mode == 'asgi' else run_wsgi
+    # Прогрев: кэш шаблонов и веток комментариев.
+    run(paths[:concurrency], concurrency)
+    elapsed, results = run(paths, concurrency)
+    latencies = sorted(latency for latency, _ in results)
+    print(json.dumps({
+        'mode': mode,
+        'rps': len(results) / elapsed,
+        'p50_ms': percentile(latencies, 0.5) * 1000,
+        'p99_ms': percentile(latencies, 0.99) * 1000,
+        'errors': sum(status >= 400 for _, status in results),
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--concurrency', type=int, default=100)
+    parser.add_argument('--mode', choices=('wsgi', 'asgi'))
+    parser.add_argument('--database')
+    args = parser.parse_args()
+    if args.mode:
+        child(args.mode, args.database, args.requests, args.concurrency)
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        database = str(Path(tmp) / 'bench.sqlite3')
+        seed(database)
+        print(
+            f'Запросов: {args.requests}, '
+            f'одновременно: {args.concurrency}'
+        )
+        print(f'{"режим":>6} {"запр/с":>8} {"p50, мс":>9} '
+              f'{"p99, мс":>9} {"ошибок":>7}')
+        for mode in ('wsgi', 'asgi'):
+            env = dict(os.environ, NEWS_ASYNC_VIEWS=str(mode == 'asgi'))
+            output = subprocess.run(
+                [
+                    sys.executable, __file__,
+                    '--mode', mode,
+                    '--database', database,
+                    '--requests', str(args.requests),
+                    '--concurrency', str(args.concurrency),
+                ],
+                env=env, check=True, capture_output=True, text=True,
+            ).stdout
+            result = json.loads(output.splitlines()[-1])
+            print(
+                f'{mode:>6} {result["rps"]:>8.0f} '
+                f'{result["p50_ms"]:>9.1f} {result["p99_ms"]:>9.1f} '
+                f'{result["errors"]:>7}'
+            )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,62 @@
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import django
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+SETTINGS = {
+    'ya_news': 'yanews.settings',
+    'ya_note': 'yanote.settings',
+}
+
+# Каталог файлового кэша замера; удаляется при выходе из процесса.
+_cache_dir = None
+
+
+def setup_django(project, database=None, **overrides):
+    """
+    Подключает проект ya_news или ya_note и инициализирует Django.
+
+    database — путь к отдельному файлу SQLite, чтобы замеры
+    не трогали рабочую базу проекта; overrides заменяют
+    остальные настройки базы, например OPTIONS. Файловый кэш
+    каждый процесс замера держит в своём временном каталоге:
+    замер начинается с пустого кэша и не портит рабочий.
+    """
+    global _cache_dir
+    sys.path.insert(0, str(BASE_DIR / project))
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', SETTINGS[project])
+    from django.conf import settings
+    if database is not None or overrides:
+        if database is not None:
+            overrides['NAME'] = database
+        settings.DATABASES['default'].update(overrides)
+    _cache_dir = tempfile.TemporaryDirectory(prefix='bench-cache-')
+    cache = settings.CACHES['default']
+    cache['LOCATION'] = _cache_dir.name
+    cache['OPTIONS']['SHARED']['LOCATION'] = _cache_dir.name
+    django.setup()
+
+
+def percentile(values, fraction):
+    """Перцентиль по отсортированному списку значений."""
+    if not values:
+        return 0.0
+    index = min(len(values) - 1, int(len(values) * fraction))
+    return values[index]
+
+
+def measure(func, repeat=5, number=100):
+    """Возвращает медианное время одного вызова func в микросекундах."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        timings.append((time.perf_counter() - start) / number)
+    return statistics.median(timings) * 1_000_000
@@ -0,0 +1,168 @@
+"""
+Сжатие текста заметок: размер базы и время записи и чтения.
+
+Заметки двух видов: обычные короткие и вставленные логи большого
+размера. Конфигурация plain хранит весь текст как есть, compressed —
+как поле Note.text (zlib от CompressedTextField.threshold байт).
+Размер считается по dbstat отдельно для таблицы заметок и для копии
+текста в полнотекстовом индексе. Чтение «без текста» загружает
+заметку целиком, но не обращается к её тексту.
+Каждая конфигурация запускается в отдельном процессе над новой базой.
+
+Запуск из корня репозитория:
+python benchmarks/compressed_text.py [--notes 500] [--logs 20]
+    [--log-size 1000000]
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from common import setup_django
+
+CONFIGS = ('plain', 'compressed')
+LEVELS = ('INFO', 'INFO', 'INFO', 'DEBUG', 'WARNING', 'ERROR')
+WORDS = (
+    'запрос обработан пользователь вошёл заметка сохранена кэш промах '
+    'соединение открыто таймаут повтор задача выполнена ответ отправлен'
+).split()
+
+
+def make_log(rng, size):
+    lines, length = [], 0
+    while length < size:
+        line = (
+            f'2026-10-18 12:{rng.randint(0, 59):02}:{rng.randint(0, 59):02},'
+            f'{rng.randint(0, 999):03} {rng.choice(LEVELS)} '
+            f'[worker-{rng.randint(1, 8)}] req={rng.getrandbits(32):08x} '
+            + ' '.join(rng.choices(WORDS, k=rng.randint(3, 8)))
+            + f' за {rng.randint(1, 900)} мс'
+        )
+        lines.append(line)
+        length += len(line.encode()) + 1
+    return '\n'.join(lines)
+
+
+def make_text(rng):
+    return ' '.join(rng.choices(WORDS, k=rng.randint(20, 150)))
+
+
+def timed(func):
+    start = time.perf_counter()
+    func()
+    return (time.perf_counter() - start) * 1000
+
+
+def child(config, database, notes, logs, log_size):
+    setup_django('ya_note', database)
+    from django.contrib.auth import get_user_model
+    from django.core.management import call_command
+    from django.db import connection
+
+    from notes.models import Note
+
+    if config == 'plain':
+        Note._meta.get_field('text').threshold = float('inf')
+    call_command('migrate', verbosity=0)
+    author = get_user_model().objects.create(username='author')
+    rng = random.Random(0)
+    texts = [('short', make_text(rng)) for _ in range(notes)]
+    texts += [('log', make_log(rng, log_size)) for _ in range(logs)]
+    rng.shuffle(texts)
+
+    timings = {key: [] for key in (
+        'write_short', 'write_log', 'read_short', 'read_log',
+        'read_log_untouched',
+    )}
+    pks = {'short': [], 'log': []}
+    for index, (kind, text) in enumerate(texts):
+        timings[f'write_{kind}'].append(timed(lambda: pks[kind].append(
+            Note.objects.create(
+                title=f'Заметка {index}', text=text, author=author
+            ).pk
+        )))
+    for kind in ('short', 'log'):
+        for pk in pks[kind]:
+            timings[f'read_{kind}'].append(
+                timed(lambda: len(Note.objects.get(pk=pk).text))
+            )
+    for pk in pks['log']:
+        timings['read_log_untouched'].append(
+            timed(lambda: Note.objects.get(pk=pk).title)
+        )
+
+    with connection.cursor() as cursor:
+        cursor.execute('VACUUM')
+        cursor.execute(
+            "SELECT sum(pgsize) FROM dbstat WHERE name = 'notes_note'"
+        )
+        table = cursor.fetchone()[0]
+        cursor.execute(
+            "SELECT sum(pgsize) FROM dbstat "
+            "WHERE name LIKE 'notes_note_fts%'"
+        )
+        index = cursor.fetchone()[0]
+    report = {
+        'config': config,
+        'file_mb': os.path.getsize(database) / 2 ** 20,
+        'table_mb': table / 2 ** 20,
+        'fts_mb': index / 2 ** 20,
+    }
+    report.update({
+        key: statistics.median(values) for key, values in timings.items()
+    })
+    print(json.dumps(report))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--notes', type=int, default=500)
+    parser.add_argument('--logs', type=int, default=20)
+    parser.add_argument('--log-size', type=int, default=1_000_000)
+    parser.add_argument('--config', choices=CONFIGS)
+    parser.add_argument('--database')
+    args = parser.parse_args()
+    if args.config:
+        child(
+            args.config, args.database, args.notes, args.logs, args.log_size
+        )
+        return
+
+    print(f'Коротких заметок: {args.notes}, логов: {args.logs} '
+          f'по {args.log_size / 2 ** 20:.1f} МБ')
+    print(f'{"":>10} {"файл":>7} {"заметки":>8} {"FTS":>7}'
+          f' {"запись, мс":>20} {"чтение, мс":>20} {"без текста":>10}')
+    print(f'{"":>10} {"МБ":>7} {"МБ":>8} {"МБ":>7}'
+          f' {"короткая":>10}{"лог":>10} {"короткая":>10}{"лог":>10}'
+          f' {"лог, мс":>10}')
+    for config in CONFIGS:
+        with tempfile.TemporaryDirectory() as tmp:
+            output = subprocess.run(
+                [
+                    sys.executable, __file__,
+                    '--config', config,
+                    '--database', str(Path(tmp) / 'bench.sqlite3'),
+                    '--notes', str(args.notes),
+                    '--logs', str(args.logs),
+                    '--log-size', str(args.log_size),
+                ],
+                env=os.environ, check=True, capture_output=True, text=True,
+            ).stdout
+        result = json.loads(output.splitlines()[-1])
+        print(
+            f'{config:>10} {result["file_mb"]:>7.1f} '
+            f'{result["table_mb"]:>8.1f} {result["fts_mb"]:>7.1f} '
+            f'{result["write_short"]:>10.2f}{result["write_log"]:>10.2f} '
+            f'{result["read_short"]:>10.3f}{result["read_log"]:>10.3f} '
+            f'{result["read_log_untouched"]:>10.3f}'
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,442 @@
+"""
+Нагрузочный тест проектов ya_news и ya_note.
+
+WSGI-приложение проекта (yanews.wsgi или yanote.wsgi) вызывается
+в процессе из пула потоков, без сети. Виртуальные пользователи —
+анонимные и вошедшие в систему — обходят все маршруты news.urls
+или notes.urls с заданными весами. Результат печатается таблицей
+и сохраняется в JSON, чтобы сравнивать прогоны между коммитами.
+
+Запуск из корня репозитория:
+python benchmarks/loadtest.py ya_news --requests 5000 --logged-in 0.3
+    --concurrency 20 --output news.json [--compare old.json]
+
+По умолчанию база создаётся во временном каталоге и заполняется
+небольшим набором данных; --database подключает готовую базу.
+"""
+import argparse
+import io
+import json
+import random
+import re
+import secrets
+import subprocess
+import tempfile
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import timedelta
+from pathlib import Path
+from urllib.parse import urlencode
+
+from common import BASE_DIR, percentile, setup_django
+
+HOST = 'localhost'
+SERVER_TIMING_QUERIES = re.compile(r'desc="(\d+) queries"')
+
+
+@dataclass
+class Route:
+    """Маршрут нагрузки: вес, нужен ли вход и построитель запроса."""
+    weight: int
+    login: bool
+    build: object
+
+
+class NewsProject:
+    wsgi = 'yanews.wsgi'
+
+    def seed(self, users):
+        from django.utils import timezone
+
+        from news.models import Comment, News
+
+        today = timezone.now().date()
+        News.objects.bulk_create(
+            News(
+                title=f'Новость {index}',
+                text='Текст новости про погоду и спорт. ' * 20,
+                date=today - timedelta(days=index),
+            )
+            for index in range(200)
+        )
+        news_pks = list(News.objects.values_list('pk', flat=True)[:30])
+        Comment.objects.bulk_create(
+            Comment(
+                news_id=news_pks[index % len(news_pks)],
+                author=user,
+                text=f'Комментарий {index}',
+            )
+            for user in users
+            for index in range(10)
+        )
+        News.objects.update_comment_counts()
+
+    def load(self):
+        from news.models import Comment, News
+
+        self.news_pks = list(
+            News.objects.order_by('-date').values_list('pk', flat=True)[:50]
+        )
+        self.comments = defaultdict(list)
+        for pk, author_id in Comment.objects.values_list('pk', 'author_id'):
+            self.comments[author_id].append(pk)
+
+    def routes(self):
+        from django.urls import reverse
+
+        def news_pk(rng, user):
+            return rng.choice(self.news_pks)
+
+        def own_comment(rng, user):
+            return rng.choice(self.comments[user.pk])
+
+        return {
+            'home': Route(20, False, lambda rng, user: (
+                'GET', reverse('news:home'), None)),
+            'archive': Route(5, False, lambda rng, user: (
+                'GET', reverse('news:archive'), None)),
+            'search': Route(5, False, lambda rng, user: (
+                'GET',
+                reverse('news:search') + '?' + urlencode(
+                    {'q': rng.choice(('погода', 'спорт', 'новость'))}
+                ),
+                None)),
+            'detail': Route(40, False, lambda rng, user: (
+                'GET',
+                reverse('news:detail', args=(news_pk(rng, user),)),
+                None)),
+            'comments': Route(5, False, lambda rng, user: (
+                'GET',
+                reverse('news:comments', args=(news_pk(rng, user),)),
+                None)),
+            'comment': Route(5, True, lambda rng, user: (
+                'POST',
+                reverse('news:detail', args=(news_pk(rng, user),)),
+                {'text': 'Комментарий нагрузочного теста'})),
+            'edit': Route(3, True, lambda rng, user: (
+                'GET',
+                reverse('news:edit', args=(own_comment(rng, user),)),
+                None)),
+            'delete': Route(2, True, lambda rng, user: (
+                'GET',
+                reverse('news:delete', args=(own_comment(rng, user),)),
+                None)),
+        }
+
+
+class NotesProject:
+    wsgi = 'yanote.wsgi'
+
+    def seed(self, users):
+        from notes.models import Note
+
+        Note.objects.bulk_create(
+            Note(
+                title=f'Заметка {index}',
+                text='Текст заметки. ' * 20,
+                slug=f'note-{user.pk}-{index}',
+                author=user,
+            )
+            for user in users
+            for index in range(20)
+        )
+
+    def load(self):
+        from notes.models import Note
+
+        self.notes = defaultdict(list)
+        for slug, author_id in Note.objects.values_list('slug', 'author_id'):
+            self.notes[author_id].append(slug)
+
+    def routes(self):
+        from django.urls import reverse
+
+        def own_note(rng, user):
+            return rng.choice(self.notes[user.pk])
+
+        return {
+            'home': Route(20, False, lambda rng, user: (
+                'GET', reverse('notes:home'), None)),
+            'list': Route(30, True, lambda rng, user: (
+                'GET', reverse('notes:list'), None)),
+            'detail': Route(30, True, lambda rng, user: (
+                'GET', reverse('notes:detail', args=(own_note(rng, user),)),
+                None)),
+            'add': Route(5, True, lambda rng, user: (
+                'GET', reverse('notes:add'), None)),
+            'create': Route(3, True, lambda rng, user: (
+                'POST', reverse('notes:add'), {
+                    'title': 'Заметка нагрузочного теста',
+                    'text': 'Текст',
+                    'slug': f'load-{secrets.token_hex(8)}',
+                })),
+            'edit': Route(5, True, lambda rng, user: (
+                'GET', reverse('notes:edit', args=(own_note(rng, user),)),
+                None)),
+            'delete': Route(2, True, lambda rng, user: (
+                'GET', reverse('notes:delete', args=(own_note(rng, user),)),
+                None)),
+            'success': Route(5, True, lambda rng, user: (
+                'GET', reverse('notes:success'), None)),
+        }
+
+
+PROJECTS = {'ya_news': NewsProject, 'ya_note': NotesProject}
+
+
+class VirtualUser:
+    """Пользователь нагрузки: анонимный или с готовой сессией."""
+
+    def __init__(self, user=None):
+        from django.conf import settings
+        from django.contrib.auth import (
+            BACKEND_SESSION_KEY, HASH_SESSION_KEY, SESSION_KEY
+        )
+        from django.contrib.sessions.backends.db import SessionStore
+
+        self.user = user
+        self.csrf_token = secrets.token_hex(16)
+        cookies = {settings.CSRF_COOKIE_NAME: self.csrf_token}
+        if user is not None:
+            session = SessionStore()
+            session[SESSION_KEY] = str(user.pk)
+            session[BACKEND_SESSION_KEY] = (
+                'django.contrib.auth.backends.ModelBackend'
+            )
+            session[HASH_SESSION_KEY] = user.get_session_auth_hash()
+            session.create()
+            cookies[settings.SESSION_COOKIE_NAME] = session.session_key
+        self.cookie = '; '.join(f'{k}={v}' for k, v in cookies.items())
+
+    def environ(self, method, url, data):
+        path, _, query = url.partition('?')
+        body = urlencode(data or {}).encode()
+        return {
+            'REQUEST_METHOD': method,
+            'PATH_INFO': path,
+            'QUERY_STRING': query,
+            'SERVER_NAME': HOST,
+            'SERVER_PORT': '80',
+            'HTTP_HOST': HOST,
+            'HTTP_COOKIE': self.cookie,
+            'HTTP_X_CSRFTOKEN': self.csrf_token,
+            'CONTENT_TYPE': 'application/x-www-form-urlencoded',
+            'CONTENT_LENGTH': str(len(body)),
+            'wsgi.url_scheme': 'http',
+            'wsgi.input': io.BytesIO(body),
+            'wsgi.errors': io.StringIO(),
+        }
+
+
+def prepare(project, args):
+    """Подключает базу, при необходимости заполняет её и готовит сценарий."""
+    from django.conf import settings
+    from django.contrib.auth import get_user_model
+    from django.core.management import call_command
+
+    settings.DEBUG = False
+    User = get_user_model()
+    if args.seed:
+        call_command('migrate', verbosity=0)
+        project.seed([
+            User.objects.create(username=f'load-{index}')
+            for index in range(args.users)
+        ])
+    project.load()
+    users = list(User.objects.order_by('pk')[:args.users])
+    return users
+
+
+def pick_mix(routes, mix):
+    """Веса маршрутов по умолчанию, переопределённые через --mix."""
+    weights = {name: route.weight for name, route in routes.items()}
+    for item in filter(None, mix.split(',')):
+        name, _, weight = item.partition('=')
+        if name not in routes:
+            raise SystemExit(f'Неизвестный маршрут {name!r}.')
+        weights[name] = int(weight)
+    return weights
+
+
+def plan(routes, weights, users, args):
+    """Заранее строит детерминированный список запросов."""
+    rng = random.Random(args.seed_value)
+    sessions = [VirtualUser(user) for user in users]
+    anonymous = VirtualUser()
+    public = [name for name, route in routes.items() if not route.login]
+    names = list(routes)
+    requests = []
+    for _ in range(args.requests):
+        logged_in = sessions and rng.random() < args.logged_in
+        client = rng.choice(sessions) if logged_in else anonymous
+        choices = names if logged_in else public
+        name = rng.choices(
+            choices, weights=[weights[name] for name in choices]
+        )[0]
+        method, url, data = routes[name].build(rng, client.user)
+        requests.append((name, client, method, url, data))
+    return requests
+
+
+def run(application, requests, concurrency):
+    def call(item):
+        name, client, method, url, data = item
+        response_status, response_headers = [], []
+
+        def start_response(status, headers, exc_info=None):
+            response_status.append(status)
+            response_headers.extend(headers)
+
+        start = time.perf_counter()
+        try:
+            response = application(
+                client.environ(method, url, data), start_response
+            )
+            b''.join(response)
+            response.close()
+            status = int(response_status[0].split()[0])
+        except Exception:
+            status = None
+        elapsed = time.perf_counter() - start
+        queries = None
+        for header, value in response_headers:
+            if header == 'Server-Timing':
+                match = SERVER_TIMING_QUERIES.search(value)
+                queries = match and int(match.group(1))
+        return name, elapsed, status, queries
+
+    with ThreadPoolExecutor(concurrency) as pool:
+        start = time.perf_counter()
+        results = list(pool.map(call, requests))
+    return time.perf_counter() - start, results
+
+
+def summarize(results, elapsed):
+    def stats(items):
+        latencies = sorted(latency for _, latency, _, _ in items)
+        errors = sum(
+            status is None or status >= 400 for _, _, status, _ in items
+        )
+        queries = [q for _, _, _, q in items if q is not None]
+        return {
+            'requests': len(items),
+            'errors': errors,
+            'error_rate': errors / len(items),
+            'mean_ms': sum(latencies) / len(latencies) * 1000,
+            'p50_ms': percentile(latencies, 0.5) * 1000,
+            'p90_ms': percentile(latencies, 0.9) * 1000,
+            'p99_ms': percentile(latencies, 0.99) * 1000,
+            'queries': sum(queries) / len(queries) if queries else None,
+        }
+
+    by_route = defaultdict(list)
+    for item in results:
+        by_route[item[0]].append(item)
+    total = stats(results)
+    total['rps'] = len(results) / elapsed
+    return total, {
+        name: stats(items) for name, items in sorted(by_route.items())
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            cwd=BASE_DIR, capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_report(report, previous=None):
+    print(
+        f'{report["project"]} @ {report["commit"]}: '
+        f'{report["total"]["rps"]:.0f} запр/с, '
+        f'ошибок {report["total"]["error_rate"]:.1%}'
+    )
+    print(f'{"маршрут":>10} {"запросов":>9} {"p50, мс":>8} {"p90, мс":>8} '
+          f'{"p99, мс":>8} {"ошибок":>7} {"SQL":>5}')
+    rows = dict(report['routes'], всего=report['total'])
+    for name, row in rows.items():
+        line = (
+            f'{name:>10} {row["requests"]:>9} {row["p50_ms"]:>8.1f} '
+            f'{row["p90_ms"]:>8.1f} {row["p99_ms"]:>8.1f} '
+            f'{row["errors"]:>7} '
+            + (f'{row["queries"]:>5.1f}' if row['queries'] is not None
+               else f'{"—":>5}')
+        )
+        old = previous and dict(
+            previous['routes'], всего=previous['total']
+        ).get(name)
+        if old:
+            change = row['p99_ms'] / old['p99_ms'] - 1 if old['p99_ms'] else 0
+            line += f'   p99 {change:+.0%} к {previous["commit"]}'
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('project', choices=PROJECTS)
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--concurrency', type=int, default=20)
+    parser.add_argument(
+        '--logged-in', type=float, default=0.3,
+        help='Доля запросов от вошедших пользователей.',
+    )
+    parser.add_argument('--users', type=int, default=20)
+    parser.add_argument(
+        '--mix', default='',
+        help='Веса маршрутов, например: home=10,detail=50.',
+    )
+    parser.add_argument('--database', help='Готовая база SQLite.')
+    parser.add_argument('--seed', dest='seed_value', type=int, default=0)
+    parser.add_argument('--output', help='Файл для результатов в JSON.')
+    parser.add_argument('--compare', help='JSON предыдущего прогона.')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        args.seed = args.database is None
+        database = args.database or str(Path(tmp) / 'load.sqlite3')
+        setup_django(args.project, database)
+        from importlib import import_module
+
+        project = PROJECTS[args.project]()
+        users = prepare(project, args)
+        routes = project.routes()
+        weights = pick_mix(routes, args.mix)
+        requests = plan(routes, weights, users, args)
+        application = import_module(project.wsgi).application
+        # Прогрев: загрузка шаблонов и модулей представлений.
+        run(application, requests[:args.concurrency], args.concurrency)
+        elapsed, results = run(application, requests, args.concurrency)
+
+    total, by_route = summarize(results, elapsed)
+    report = {
+        'project': args.project,
+        'commit': git_commit(),
+        'options': {
+            'requests': args.requests,
+            'concurrency': args.concurrency,
+            'logged_in': args.logged_in,
+            'users': args.users,
+            'weights': weights,
+            'seed': args.seed_value,
+        },
+        'total': total,
+        'routes': by_route,
+    }
+    previous = None
+    if args.compare:
+        previous = json.loads(Path(args.compare).read_text())
+    print_report(report, previous)
+    if args.output:
+        Path(args.output).write_text(
+            json.dumps(report, ensure_ascii=False, indent=2)
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,48 @@
+"""
+Сравнение проверки комментария на запрещённые слова.
+
+Наивный перебор слов работает за O(слов × текст), автомат
+Ахо — Корасик — за O(текст) при любом размере словаря.
+
+Запуск из корня репозитория: python benchmarks/profanity.py
+"""
+import random
+
+from common import measure, setup_django
+
+setup_django('ya_news')
+
+from news.profanity import Automaton, normalize, stem  # noqa: E402
+
+ALPHABET = 'абвгдежзийклмнопрстуфхцчшщыэюя'
+SIZES = (10, 100, 1000, 10000)
+
+
+def random_word(rng):
+    return ''.join(rng.choices(ALPHABET, k=rng.randint(6, 10)))
+
+
+def main():
+    rng = random.Random(0)
+    text = ' '.join(random_word(rng) for _ in range(300))
+    print(f'Длина текста: {len(text)} символов')
+    print(f'{"слов":>8} {"перебор, мкс":>14} {"автомат, мкс":>14}')
+    for size in SIZES:
+        words = [random_word(rng) for _ in range(size)]
+        automaton = Automaton({stem(normalize(word)) for word in words})
+
+        def naive():
+            lowered = text.lower()
+            return any(word in lowered for word in words)
+
+        def compiled():
+            return automaton.search(normalize(text))
+
+        print(
+            f'{size:>8} {measure(naive, number=20):>14.1f} '
+            f'{measure(compiled, number=20):>14.1f}'
+        )
+
+
+if __name__ == '__main__':
+    main()
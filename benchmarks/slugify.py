@@ -0,0 +1,90 @@
+"""
+Транслитерация заголовков заметок: slugify() из pytils, его вариант
+с LRU-кэшем и пакетный вариант для импорта.
+
+Заголовки берутся из словаря с распределением Ципфа: как и в реальных
+заметках, немногие заголовки («Список покупок») встречаются часто.
+
+Запуск из корня репозитория:
+python benchmarks/slugify.py [--titles 20000] [--distinct 2000]
+"""
+import argparse
+import random
+import time
+
+from common import setup_django
+
+setup_django('ya_note')
+
+from pytils.translit import slugify  # noqa: E402
+
+from notes.slugs import cached_slugify, slugify_many  # noqa: E402
+
+WORDS = (
+    'список покупок идеи для отпуска план работы встреча с командой '
+    'рецепт пирога книги прочитать фильмы посмотреть заметки лекции '
+    'домашнее задание ремонт квартиры подарки близким расходы месяца '
+    'тренировки цели года черновик письма вопросы врачу пароли'
+).split()
+
+
+def make_corpus(titles, distinct, seed=0):
+    rng = random.Random(seed)
+    vocabulary = [
+        ' '.join(rng.choices(WORDS, k=rng.randint(2, 5))).capitalize()
+        for _ in range(distinct)
+    ]
+    weights = [1 / rank ** 1.1 for rank in range(1, distinct + 1)]
+    return rng.choices(vocabulary, weights, k=titles)
+
+
+def timed(func, corpus, repeat=5):
+    """Медианное время обработки всего корпуса в миллисекундах."""
+    timings = []
+    for _ in range(repeat):
+        cached_slugify.cache_clear()
+        start = time.perf_counter()
+        func(corpus)
+        timings.append(time.perf_counter() - start)
+    return sorted(timings)[len(timings) // 2] * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--titles', type=int, default=20000)
+    parser.add_argument('--distinct', type=int, default=2000)
+    options = parser.parse_args()
+    corpus = make_corpus(options.titles, options.distinct)
+    print(
+        f'Заголовков: {len(corpus)}, различных: {len(set(corpus))}'
+    )
+    variants = {
+        'slugify': lambda titles: [slugify(title) for title in titles],
+        # Форма и модель до переработки вызывали slugify дважды.
+        'slugify x2': lambda titles: [
+            (slugify(title), slugify(title)) for title in titles
+        ],
+        'cached_slugify': lambda titles: [
+            cached_slugify(title) for title in titles
+        ],
+        'slugify_many': slugify_many,
+    }
+    baseline = None
+    print(f'{"вариант":>16} {"всего, мс":>10} {"мкс/заголовок":>14} '
+          f'{"ускорение":>10}')
+    for name, func in variants.items():
+        total = timed(func, corpus)
+        baseline = baseline or total
+        print(
+            f'{name:>16} {total:>10.1f} '
+            f'{total * 1000 / len(corpus):>14.2f} {baseline / total:>9.1f}x'
+        )
+    cached_slugify.cache_clear()
+    for title in corpus:
+        cached_slugify(title)
+    info = cached_slugify.cache_info()
+    print(f'Попаданий в LRU: {info.hits / len(corpus):.0%}')
+
+
+if __name__ == '__main__':
+    main()
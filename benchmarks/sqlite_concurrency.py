@@ -0,0 +1,155 @@
+"""
+Параллельные запись и чтение в SQLite с настройками по умолчанию
+и с настройками проекта (WAL, прагмы, IMMEDIATE, постоянные соединения).
+
+Писатели добавляют комментарии так же, как представление: в транзакции,
+с сигналами, которые обновляют счётчик новости. Читатели запрашивают
+ленту и первую страницу комментариев. После каждой операции
+соединения закрываются так же, как в конце HTTP-запроса.
+Каждая конфигурация запускается в отдельном процессе над новой базой.
+
+Запуск из корня репозитория:
+python benchmarks/sqlite_concurrency.py [--writers 8] [--readers 8]
+    [--seconds 5]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from common import percentile, setup_django
+
+CONFIGS = ('default', 'tuned')
+# Настройки Django по умолчанию: журнал DELETE, отложенные транзакции,
+# новое соединение на каждый запрос.
+DEFAULT_DATABASE = {'OPTIONS': {}, 'CONN_MAX_AGE': 0}
+
+
+def child(config, database, writers, readers, seconds):
+    setup_django(
+        'ya_news', database,
+        **(DEFAULT_DATABASE if config == 'default' else {}),
+    )
+    from django.contrib.auth import get_user_model
+    from django.core.management import call_command
+    from django.db import OperationalError, close_old_connections
+    from django.db import transaction
+
+    from news.models import Comment, News
+
+    call_command('migrate', verbosity=0)
+    news_pks = [
+        News.objects.create(title=f'Новость {index}', text='Текст').pk
+        for index in range(20)
+    ]
+    author = get_user_model().objects.create(username='author')
+    close_old_connections()
+
+    def write(index):
+        with transaction.atomic():
+            Comment.objects.create(
+                news_id=news_pks[index % len(news_pks)],
+                author=author,
+                text=f'Комментарий {index}',
+            )
+
+    def read(index):
+        list(News.objects.order_by('-date', '-pk')[:10])
+        list(Comment.objects.filter(
+            news_id=news_pks[index % len(news_pks)]
+        ).select_related('author')[:50])
+
+    results = {'write': [], 'read': []}
+    errors = {'write': 0, 'read': 0}
+    deadline = time.perf_counter() + seconds
+    lock = threading.Lock()
+
+    def worker(kind, operation):
+        index = 0
+        latencies = []
+        failed = 0
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            try:
+                operation(index)
+                latencies.append(time.perf_counter() - start)
+            except OperationalError:
+                failed += 1
+            finally:
+                close_old_connections()
+            index += 1
+        with lock:
+            results[kind].extend(latencies)
+            errors[kind] += failed
+
+    threads = [
+        threading.Thread(target=worker, args=('write', write))
+        for _ in range(writers)
+    ] + [
+        threading.Thread(target=worker, args=('read', read))
+        for _ in range(readers)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    report = {'config': config}
+    for kind in ('write', 'read'):
+        latencies = sorted(results[kind])
+        report[kind] = {
+            'ops': len(latencies) / seconds,
+            'p99_ms': percentile(latencies, 0.99) * 1000,
+            'errors': errors[kind],
+        }
+    print(json.dumps(report))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--writers', type=int, default=8)
+    parser.add_argument('--readers', type=int, default=8)
+    parser.add_argument('--seconds', type=float, default=5)
+    parser.add_argument('--config', choices=CONFIGS)
+    parser.add_argument('--database')
+    args = parser.parse_args()
+    if args.config:
+        child(
+            args.config, args.database,
+            args.writers, args.readers, args.seconds,
+        )
+        return
+
+    print(f'Писателей: {args.writers}, читателей: {args.readers}, '
+          f'{args.seconds:g} с')
+    print(f'{"настройки":>10} {"запись/с":>9} {"p99, мс":>8} {"ошибок":>7}'
+          f' {"чтение/с":>9} {"p99, мс":>8} {"ошибок":>7}')
+    for config in CONFIGS:
+        with tempfile.TemporaryDirectory() as tmp:
+            output = subprocess.run(
+                [
+                    sys.executable, __file__,
+                    '--config', config,
+                    '--database', str(Path(tmp) / 'bench.sqlite3'),
+                    '--writers', str(args.writers),
+                    '--readers', str(args.readers),
+                    '--seconds', str(args.seconds),
+                ],
+                env=os.environ, check=True, capture_output=True, text=True,
+            ).stdout
+        result = json.loads(output.splitlines()[-1])
+        write, read = result['write'], result['read']
+        print(
+            f'{config:>10} {write["ops"]:>9.0f} {write["p99_ms"]:>8.1f} '
+            f'{write["errors"]:>7} {read["ops"]:>9.0f} '
+            f'{read["p99_ms"]:>8.1f} {read["errors"]:>7}'
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,111 @@
+import hashlib
+import re
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.template.loader import get_template
+from django.utils.safestring import mark_safe
+
+COMMENTS_VERSION_KEY = 'version:news:{pk}:comments'
+COMMENT_THREAD_KEY = 'news:{pk}:comments:{version}:{cursor}'
+# Комментарии выводятся через автоэкранирование, поэтому пользователь
+# не может вставить такой маркер в текст комментария.
+CONTROLS_MARKER = re.compile(r'<!--comment-controls:(\d+):(\d+)-->')
+
+
+def get_comments_version(news_pk):
+    """
+    Возвращает текущую версию ветки комментариев новости.
+
+    Начальное значение берётся из часов, а не с единицы: если ключ
+    версии вытеснен из кэша, новая версия не совпадёт со старой,
+    и ранее сохранённый HTML не будет выдан повторно.
+    """
+    key = COMMENTS_VERSION_KEY.format(pk=news_pk)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, time.time_ns(), None)
+        version = cache.get(key)
+    return version
+
+
+async def aget_comments_version(news_pk):
+    """Асинхронный вариант get_comments_version."""
+    key = COMMENTS_VERSION_KEY.format(pk=news_pk)
+    version = await cache.aget(key)
+    if version is None:
+        await cache.aadd(key, time.time_ns(), None)
+        version = await cache.aget(key)
+    return version
+
+
+def bump_comments_version(news_pk):
+    """
+    Делает устаревшими все закэшированные страницы ветки комментариев.
+
+    Версия меняется после фиксации транзакции, чтобы параллельный
+    читатель не сохранил под новой версией ещё не изменённые данные.
+    """
+    transaction.on_commit(lambda: _bump(news_pk))
+
+
+def _bump(news_pk):
+    key = COMMENTS_VERSION_KEY.format(pk=news_pk)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, time.time_ns(), None)
+
+
+def _thread_key(news_pk, version, cursor):
+    cursor_hash = hashlib.md5((cursor or '').encode()).hexdigest()
+    return COMMENT_THREAD_KEY.format(
+        pk=news_pk, version=version, cursor=cursor_hash
+    )
+
+
+def get_comment_thread(news_pk, cursor, render):
+    """
+    Возвращает HTML страницы комментариев из кэша.
+
+    При промахе HTML строится вызовом render() и сохраняется
+    под текущей версией ветки.
+    """
+    key = _thread_key(news_pk, get_comments_version(news_pk), cursor)
+    html = cache.get(key)
+    if html is None:
+        html = render()
+        cache.set(key, html, settings.COMMENT_THREAD_CACHE_TIMEOUT)
+    return html
+
+
+async def aget_comment_thread(news_pk, cursor, render):
+    """Асинхронный вариант get_comment_thread; render — корутина."""
+    key = _thread_key(news_pk, await aget_comments_version(news_pk), cursor)
+    html = await cache.aget(key)
+    if html is None:
+        html = await render()
+        await cache.aset(key, html, settings.COMMENT_THREAD_CACHE_TIMEOUT)
+    return html
+
+
+def apply_comment_controls(html, user):
+    """
+    Подставляет ссылки редактирования и удаления в общий HTML.
+
+    Кэшированный HTML одинаков для всех пользователей: вместо ссылок
+    в нём стоят маркеры, которые здесь заменяются ссылками для
+    комментариев текущего пользователя и удаляются для остальных.
+    """
+    user_pk = user.pk if user.is_authenticated else None
+    controls = get_template('news/includes/comment_controls.html')
+
+    def replace(match):
+        author_pk, comment_pk = map(int, match.groups())
+        if author_pk != user_pk:
+            return ''
+        return controls.render({'comment_pk': comment_pk})
+
+    return mark_safe(CONTROLS_MARKER.sub(replace, html))
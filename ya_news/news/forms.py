@@ -2,6 +2,7 @@ from django.forms import ModelForm
 from django.core.exceptions import ValidationError
 
 from .models import Comment
+from .profanity import WordListMatcher
 
 BAD_WORDS = (
     'редиска',
@@ -10,6 +11,9 @@ BAD_WORDS = (
 )
 WARNING = 'Не ругайтесь!'
 
+# Встроенные слова дополняются словарём из файла settings.BAD_WORDS_FILE.
+bad_words_matcher = WordListMatcher(BAD_WORDS)
+
 
 class CommentForm(ModelForm):
 
@@ -20,8 +24,6 @@ class CommentForm(ModelForm):
     def clean_text(self):
         """Не позволяем ругаться в комментариях."""
         text = self.cleaned_data['text']
-        lowered_text = text.lower()
-        for word in BAD_WORDS:
-            if word in lowered_text:
-                raise ValidationError(WARNING)
+        if bad_words_matcher.find(text):
+            raise ValidationError(WARNING)
         return text
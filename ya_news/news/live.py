@@ -0,0 +1,210 @@
+import asyncio
+import functools
+import json
+import threading
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F
+from django.utils.module_loading import import_string
+
+from .models import LiveChannel
+from .pagination import encode_cursor
+
+CHANNEL = 'news:{pk}:comments'
+EVENT_KEY = 'live:{channel}:{sequence}'
+
+
+def comment_data(pk, created, text, author):
+    """Комментарий в виде, который отдают JSON-лента и поток событий."""
+    return {
+        'id': pk,
+        'author': author,
+        'text': text,
+        'created': created.isoformat(),
+    }
+
+
+def comment_event(pk, created, text, author):
+    """
+    Событие Server-Sent Events о комментарии.
+
+    Возвращает пару (идентификатор, текст события). Идентификатор —
+    курсор комментария, текст сериализуется один раз и отправляется
+    всем подписчикам без изменений.
+    """
+    cursor = encode_cursor([created, pk])
+    data = json.dumps(
+        comment_data(pk, created, text, author), ensure_ascii=False
+    )
+    return cursor, f'id: {cursor}\nevent: comment\ndata: {data}\n\n'
+
+
+def publish_comment(comment):
+    """Рассылает новый комментарий после фиксации транзакции."""
+    event = comment_event(
+        comment.pk, comment.created, comment.text, comment.author.username
+    )
+    channel = CHANNEL.format(pk=comment.news_id)
+    transaction.on_commit(lambda: get_broker().publish(channel, event))
+
+
+@functools.cache
+def load_broker(path):
+    return import_string(path)()
+
+
+def get_broker():
+    """Брокер из настройки NEWS_LIVE_BROKER, один на процесс."""
+    return load_broker(settings.NEWS_LIVE_BROKER)
+
+
+class Subscription:
+    """
+    Очередь событий одного соединения.
+
+    Событие может прийти из любого потока: оно передаётся в цикл
+    событий подписчика через call_soon_threadsafe(). Если клиент
+    не успевает читать и очередь заполнена, она заменяется на None:
+    соединение закрывается, а пропущенное браузер получит
+    при переподключении по Last-Event-ID.
+    """
+
+    def __init__(self, broker, channel):
+        self.broker = broker
+        self.channel = channel
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(settings.NEWS_LIVE_QUEUE_SIZE)
+
+    def deliver(self, message):
+        try:
+            self.loop.call_soon_threadsafe(self._put, message)
+        except RuntimeError:
+            # Цикл событий уже закрыт.
+            self.close()
+
+    def _put(self, message):
+        try:
+            self.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(None)
+
+    async def get(self):
+        return await self.queue.get()
+
+    def close(self):
+        self.broker.unsubscribe(self)
+
+
+class LocalBroker:
+    """Рассылка событий внутри одного процесса."""
+
+    def __init__(self):
+        self.channels = defaultdict(set)
+        self.lock = threading.Lock()
+
+    def subscribe(self, channel):
+        subscription = Subscription(self, channel)
+        with self.lock:
+            self.channels[channel].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self.lock:
+            subscribers = self.channels.get(subscription.channel)
+            if subscribers is None:
+                return
+            subscribers.discard(subscription)
+            if not subscribers:
+                del self.channels[subscription.channel]
+
+    def publish(self, channel, message):
+        self.deliver(channel, message)
+
+    def deliver(self, channel, message, loop=None):
+        """Передаёт событие подписчикам канала в этом процессе."""
+        with self.lock:
+            subscribers = list(self.channels.get(channel, ()))
+        for subscription in subscribers:
+            if loop is None or subscription.loop is loop:
+                subscription.deliver(message)
+
+
+class CacheBroker(LocalBroker):
+    """
+    Рассылка событий между процессами через общий кэш.
+
+    publish() кладёт событие в кэш под очередным номером канала.
+    Номер выдаёт строка LiveChannel в базе: инкремент файлового кэша
+    не атомарен, и два процесса получили бы один номер. В каждом
+    процессе на канал с подписчиками работает одна задача: раз
+    в poll_interval секунд она сверяет номер и раздаёт новые события
+    своим подписчикам. Поэтому число обращений к базе и кэшу зависит
+    от числа каналов, а не соединений.
+    """
+    poll_interval = 0.5
+    event_timeout = 60
+
+    def __init__(self):
+        super().__init__()
+        self.listeners = {}
+
+    def publish(self, channel, message):
+        channels = LiveChannel.objects.filter(name=channel)
+        # Событие попадает в кэш до фиксации номера: слушатель,
+        # увидевший номер, найдёт и событие.
+        with transaction.atomic():
+            if not channels.update(sequence=F('sequence') + 1):
+                _, created = LiveChannel.objects.get_or_create(
+                    name=channel, defaults={'sequence': 1}
+                )
+                if not created:
+                    channels.update(sequence=F('sequence') + 1)
+            sequence = channels.values_list('sequence', flat=True).get()
+            cache.set(
+                EVENT_KEY.format(channel=channel, sequence=sequence),
+                message,
+                self.event_timeout,
+            )
+
+    def subscribe(self, channel):
+        subscription = super().subscribe(channel)
+        # Задача привязана к циклу событий, поэтому ключ включает цикл.
+        listener = (channel, subscription.loop)
+        with self.lock:
+            if listener not in self.listeners:
+                self.listeners[listener] = asyncio.create_task(
+                    self.listen(channel, subscription.loop)
+                )
+        return subscription
+
+    async def listen(self, channel, loop):
+        channels = LiveChannel.objects.filter(name=channel).values_list(
+            'sequence', flat=True
+        )
+        last = await channels.afirst() or 0
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            with self.lock:
+                if not any(
+                    subscription.loop is loop
+                    for subscription in self.channels.get(channel, ())
+                ):
+                    del self.listeners[channel, loop]
+                    return
+            sequence = await channels.afirst() or 0
+            if sequence == last:
+                continue
+            keys = [
+                EVENT_KEY.format(channel=channel, sequence=number)
+                for number in range(last + 1, sequence + 1)
+            ]
+            events = await cache.aget_many(keys)
+            for event_key in keys:
+                if event_key in events:
+                    self.deliver(channel, events[event_key], loop)
+            last = sequence
@@ -0,0 +1,136 @@
+import random
+from datetime import datetime, time, timedelta
+from itertools import accumulate
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from news.models import Comment, News
+
+User = get_user_model()
+
+WORDS = (
+    'новость город погода спорт выборы рынок курс рубль школа театр '
+    'концерт дорога ремонт мост лето зима праздник команда матч победа '
+    'проект закон суд врач больница наука открытие музей выставка фильм'
+).split()
+
+
+def zipf_weights(size, skew):
+    """Накопленные веса закона Ципфа: первый элемент самый частый."""
+    return list(accumulate(1 / rank ** skew for rank in range(1, size + 1)))
+
+
+def make_text(rng, min_words, max_words):
+    return ' '.join(rng.choices(WORDS, k=rng.randint(min_words, max_words)))
+
+
+class Command(BaseCommand):
+    help = (
+        'Заполняет базу синтетическими пользователями, новостями '
+        'и комментариями для нагрузочных проверок. Комментарии '
+        'распределены по закону Ципфа: у свежих новостей и активных '
+        'авторов их больше. Одинаковый --seed даёт одинаковые данные.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=10000)
+        parser.add_argument('--news', type=int, default=100000)
+        parser.add_argument('--comments', type=int, default=1000000)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument(
+            '--skew', type=float, default=1.1,
+            help='Показатель закона Ципфа для новостей и авторов.',
+        )
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        self.batch_size = options['batch_size']
+        author_ids = self.create_users(options['users'])
+        news_ids = self.create_news(rng, options['news'])
+        self.create_comments(
+            rng, options['comments'], news_ids, author_ids, options['skew']
+        )
+        call_command(
+            'backfill_comment_count',
+            batch_size=self.batch_size,
+            stdout=self.stdout,
+        )
+        self.stdout.write(self.style.SUCCESS('Данные созданы.'))
+
+    def create_users(self, count):
+        # Хэш одинаковый у всех: хэшировать миллион паролей слишком долго.
+        password = make_password(None)
+        usernames = [f'user{index}' for index in range(count)]
+        ids = {}
+        for start in range(0, count, self.batch_size):
+            batch = usernames[start:start + self.batch_size]
+            with transaction.atomic():
+                User.objects.bulk_create(
+                    (User(username=name, password=password) for name in batch),
+                    ignore_conflicts=True,
+                )
+            ids.update(User.objects.filter(
+                username__in=batch
+            ).values_list('username', 'id'))
+        self.stdout.write(f'Пользователей: {len(ids)}')
+        return [ids[username] for username in usernames]
+
+    def create_news(self, rng, count):
+        today = timezone.now().date()
+        first_pk = (News.objects.order_by('-pk').values_list(
+            'pk', flat=True
+        ).first() or 0) + 1
+        news = [
+            News(
+                pk=first_pk + index,
+                title=make_text(rng, 3, 8).capitalize(),
+                text=make_text(rng, 30, 200),
+                date=today - timedelta(days=index // 20),
+            )
+            for index in range(count)
+        ]
+        for start in range(0, count, self.batch_size):
+            with transaction.atomic():
+                News.objects.bulk_create(
+                    news[start:start + self.batch_size]
+                )
+        self.stdout.write(f'Новостей: {count}')
+        self.news_starts = {
+            item.pk: timezone.make_aware(datetime.combine(item.date, time()))
+            for item in news
+        }
+        # Первыми идут свежие новости: у них больше всего комментариев.
+        return [item.pk for item in news]
+
+    def create_comments(self, rng, count, news_ids, author_ids, skew):
+        if not news_ids or not author_ids:
+            return
+        news_weights = zipf_weights(len(news_ids), skew)
+        author_weights = zipf_weights(len(author_ids), skew)
+        created = 0
+        while created < count:
+            size = min(self.batch_size, count - created)
+            news = rng.choices(news_ids, cum_weights=news_weights, k=size)
+            authors = rng.choices(
+                author_ids, cum_weights=author_weights, k=size
+            )
+            comments = []
+            for news_id, author_id in zip(news, authors):
+                comments.append(Comment(
+                    news_id=news_id,
+                    author_id=author_id,
+                    text=make_text(rng, 3, 40),
+                    created=self.news_starts[news_id] + timedelta(
+                        seconds=rng.randint(0, 3 * 24 * 60 * 60)
+                    ),
+                ))
+            with transaction.atomic():
+                Comment.objects.bulk_create(comments)
+            created += size
+            self.stdout.write(f'Комментариев: {created}')
@@ -0,0 +1,177 @@
+import csv
+import json
+from collections import Counter, OrderedDict
+from itertools import islice
+from pathlib import Path
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from news.cache import bump_comments_version
+from news.models import Comment, ImportProgress, News
+from yanews.page_cache import bump_page_tags
+
+User = get_user_model()
+
+MODELS = ('news', 'comment')
+
+
+class AuthorCache:
+    """
+    Ограниченный LRU-кэш «имя пользователя → id».
+
+    Недостающие имена одной пачки запрашиваются одним запросом.
+    """
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self.ids = OrderedDict()
+
+    def resolve(self, usernames):
+        missing = {name for name in usernames if name not in self.ids}
+        if missing:
+            found = dict(User.objects.filter(
+                username__in=missing
+            ).values_list('username', 'id'))
+            for name in missing:
+                self.ids[name] = found.get(name)
+        result = {}
+        for name in usernames:
+            self.ids.move_to_end(name)
+            result[name] = self.ids[name]
+        while len(self.ids) > self.maxsize:
+            self.ids.popitem(last=False)
+        return result
+
+
+class Command(BaseCommand):
+    help = (
+        'Потоково загружает новости и комментарии из JSONL или CSV '
+        'пачками bulk_create. Прерванную загрузку можно продолжить: '
+        'число сохранённых записей пишется в базу вместе с пачкой.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Файл .jsonl или .csv.')
+        parser.add_argument(
+            '--format', choices=('jsonl', 'csv'),
+            help='Формат файла; по умолчанию определяется по расширению.',
+        )
+        parser.add_argument(
+            '--model', choices=MODELS,
+            help='Тип записей, если он не указан в самой записи.',
+        )
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument(
+            '--state',
+            help='Ключ состояния загрузки; по умолчанию полный путь файла.',
+        )
+        parser.add_argument(
+            '--author-cache-size', type=int, default=10000,
+        )
+
+    def handle(self, *args, **options):
+        path = Path(options['path'])
+        if not path.is_file():
+            raise CommandError(f'Файл {path} не найден.')
+        self.default_model = options['model']
+        self.progress, _ = ImportProgress.objects.get_or_create(
+            source=options['state'] or str(path.resolve())
+        )
+        self.authors = AuthorCache(options['author_cache_size'])
+        self.skipped = 0
+        done = self.progress.records
+        file_format = options['format'] or path.suffix.lstrip('.').lower()
+        if file_format not in ('jsonl', 'csv'):
+            raise CommandError('Укажите формат файла через --format.')
+        with open(path, encoding='utf-8', newline='') as file:
+            records = (
+                csv.DictReader(file) if file_format == 'csv'
+                else (json.loads(line) for line in file if line.strip())
+            )
+            records = islice(records, done, None)
+            batch_size = options['batch_size']
+            while batch := list(islice(records, batch_size)):
+                done += len(batch)
+                self.import_batch(batch, done)
+                self.stdout.write(f'Сохранено записей: {done}')
+        self.stdout.write(self.style.SUCCESS(
+            f'Загрузка завершена. Записей: {done}, пропущено: {self.skipped}'
+        ))
+
+    @transaction.atomic
+    def import_batch(self, records, done):
+        """
+        Сохраняет одну пачку записей в одной транзакции.
+
+        Число загруженных записей done фиксируется в той же транзакции,
+        поэтому после сбоя загрузка продолжается ровно с этой пачки.
+        """
+        news, comments = [], []
+        for record in records:
+            model = record.get('model') or self.default_model
+            if model == 'news':
+                news.append(record)
+            elif model == 'comment':
+                comments.append(record)
+            else:
+                raise CommandError(
+                    f'Неизвестный тип записи {model!r}; укажите --model.'
+                )
+        if news:
+            News.objects.bulk_create(
+                (self.build_news(record) for record in news),
+                ignore_conflicts=True,
+            )
+            bump_page_tags('news')
+        if comments:
+            self.import_comments(comments)
+        ImportProgress.objects.filter(pk=self.progress.pk).update(
+            records=done
+        )
+
+    def build_news(self, record):
+        news = News(title=record['title'], text=record['text'])
+        if record.get('id'):
+            news.pk = int(record['id'])
+        if record.get('date'):
+            news.date = parse_date(record['date'])
+        return news
+
+    def import_comments(self, records):
+        author_ids = self.authors.resolve({
+            record['author'] for record in records
+        })
+        now = timezone.now()
+        comments = []
+        for record in records:
+            author_id = author_ids[record['author']]
+            if author_id is None:
+                self.skipped += 1
+                continue
+            created = record.get('created')
+            comments.append(Comment(
+                news_id=int(record['news']),
+                author_id=author_id,
+                text=record['text'],
+                created=parse_datetime(created) if created else now,
+            ))
+        Comment.objects.bulk_create(comments)
+        # bulk_create не вызывает сигналы: счётчики и кэш обновляем сами.
+        # Новости с одинаковым приростом обновляются одним запросом.
+        counts = Counter(comment.news_id for comment in comments)
+        by_increment = {}
+        for news_id, count in counts.items():
+            by_increment.setdefault(count, []).append(news_id)
+        for count, news_ids in by_increment.items():
+            News.objects.filter(pk__in=news_ids).update(
+                comment_count=F('comment_count') + count, modified=now
+            )
+        news_ids = counts.keys()
+        for news_id in news_ids:
+            bump_comments_version(news_id)
+        bump_page_tags('news', *(f'news:{pk}' for pk in news_ids))
@@ -0,0 +1,75 @@
+import json
+import pstats
+from collections import defaultdict
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help = (
+        'Сводка профилей из PROFILE_DIR по представлениям: среднее '
+        'время запроса, базы и шаблонов, самые затратные функции '
+        'и SQL-запросы.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dir', help='Каталог профилей; по умолчанию PROFILE_DIR.',
+        )
+        parser.add_argument('--view', help='Только это представление.')
+        parser.add_argument('--limit', type=int, default=10)
+
+    def handle(self, *args, **options):
+        directory = Path(options['dir'] or settings.PROFILE_DIR)
+        if not directory.is_dir():
+            raise CommandError(f'Каталог {directory} не найден.')
+        dumps = defaultdict(list)
+        for path in sorted(directory.glob('*.json')):
+            meta = json.loads(path.read_text())
+            if options['view'] in (None, meta['view']):
+                dumps[meta['view']].append((meta, path.with_suffix('.prof')))
+        if not dumps:
+            self.stdout.write('Профилей нет.')
+        for view, items in sorted(dumps.items()):
+            self.report_view(view, items, options['limit'])
+
+    def report_view(self, view, items, limit):
+        count = len(items)
+
+        def mean(field):
+            return sum(meta[field] for meta, _ in items) / count * 1000
+
+        self.stdout.write(self.style.MIGRATE_HEADING(
+            f'{view}: запросов {count}, в среднем {mean("total"):.1f} мс, '
+            f'база {mean("db"):.1f} мс, шаблоны {mean("templates"):.1f} мс'
+        ))
+        profiles = [str(path) for _, path in items if path.is_file()]
+        if profiles:
+            stats = pstats.Stats(*profiles).stats
+            hot = sorted(stats.items(), key=lambda item: -item[1][2])
+            self.stdout.write('  Функции (собственное время, всего):')
+            for (file, line, function), (_, calls, own, total, _) in (
+                hot[:limit]
+            ):
+                own, total = own / count * 1000, total / count * 1000
+                self.stdout.write(
+                    f'  {own:8.2f} мс {total:8.2f} мс  '
+                    f'{calls / count:7.1f}×  {function} '
+                    f'({Path(file).name}:{line})'
+                )
+        queries = defaultdict(lambda: [0, 0.0])
+        for meta, _ in items:
+            for query in meta['queries']:
+                queries[query['sql']][0] += 1
+                queries[query['sql']][1] += query['duration']
+        if queries:
+            self.stdout.write('  SQL (время на запрос, выполнений):')
+            for sql, (calls, duration) in sorted(
+                queries.items(), key=lambda item: -item[1][1]
+            )[:limit]:
+                self.stdout.write(
+                    f'  {duration / count * 1000:8.2f} мс  '
+                    f'{calls / count:5.1f}×  {sql[:120]}'
+                )
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from yanews.profiling import make_token
+
+
+class Command(BaseCommand):
+    help = (
+        'Выводит подписанное значение заголовка X-Profile; '
+        'запрос с этим заголовком будет профилирован.'
+    )
+
+    def handle(self, *args, **options):
+        self.stdout.write(make_token())
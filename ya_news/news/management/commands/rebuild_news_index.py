@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+
+from news.search import rebuild_index
+
+
+class Command(BaseCommand):
+    help = 'Заново строит полнотекстовый индекс новостей пачками.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Количество новостей, индексируемых в одной транзакции.',
+        )
+
+    def handle(self, *args, **options):
+        indexed = rebuild_index(
+            options['batch_size'],
+            lambda count: self.stdout.write(
+                f'Проиндексировано новостей: {count}'
+            ),
+        )
+        self.stdout.write(
+            self.style.SUCCESS(f'Индекс перестроен, новостей: {indexed}')
+        )
@@ -0,0 +1,33 @@
+# Generated by Django 5.1.1 on 2026-10-18 19:28
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0006_news_fts'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImportProgress',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source', models.CharField(max_length=500, unique=True)),
+                ('records', models.PositiveBigIntegerField(default=0)),
+            ],
+        ),
+        # Значение по умолчанию задаёт Django, схема в базе не меняется:
+        # AlterField в SQLite пересоздал бы таблицу комментариев целиком.
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.AlterField(
+                    model_name='comment',
+                    name='created',
+                    field=models.DateTimeField(default=django.utils.timezone.now, editable=False),
+                ),
+            ],
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.1.1 on 2026-10-18 19:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0007_import_progress'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LiveChannel',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, unique=True)),
+                ('sequence', models.PositiveBigIntegerField(default=0)),
+            ],
+        ),
+    ]
@@ -2,15 +2,40 @@ from datetime import datetime
 
 from django.conf import settings
 from django.db import models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce, Now
+from django.utils import timezone
+
+
+class NewsQuerySet(models.QuerySet):
+
+    def update_comment_counts(self):
+        """Пересчитывает счётчик комментариев по таблице комментариев."""
+        counts = Comment.objects.filter(
+            news=OuterRef('pk')
+        ).order_by().values('news').annotate(
+            count=Count('pk')
+        ).values('count')
+        return self.update(
+            comment_count=Coalesce(Subquery(counts), 0),
+            modified=Now(),
+        )
 
 
 class News(models.Model):
     title = models.CharField(max_length=50)
     text = models.TextField()
     date = models.DateField(default=datetime.today)
+    comment_count = models.PositiveIntegerField(default=0, editable=False)
+    modified = models.DateTimeField(auto_now=True)
+
+    objects = NewsQuerySet.as_manager()
 
     class Meta:
         ordering = ('-date',)
+        indexes = (
+            models.Index(fields=('-date', '-id'), name='news_date_id_idx'),
+        )
         verbose_name_plural = 'Новости'
         verbose_name = 'Новость'
 
@@ -28,10 +53,35 @@ class Comment(models.Model):
         on_delete=models.CASCADE,
     )
     text = models.TextField()
-    created = models.DateTimeField(auto_now_add=True)
+    # Не auto_now_add: при загрузке архива дата задаётся явно.
+    created = models.DateTimeField(default=timezone.now, editable=False)
 
     class Meta:
         ordering = ('created',)
+        indexes = (
+            models.Index(
+                fields=('news', 'created', 'id'),
+                name='comment_news_created_idx',
+            ),
+        )
 
     def __str__(self):
         return self.text[:50]
+
+
+class ImportProgress(models.Model):
+    """Число записей файла, уже загруженных командой import_news."""
+    source = models.CharField(max_length=500, unique=True)
+    records = models.PositiveBigIntegerField(default=0)
+
+    def __str__(self):
+        return f'{self.source}: {self.records}'
+
+
+class LiveChannel(models.Model):
+    """Номер последнего события канала news.live.CacheBroker."""
+    name = models.CharField(max_length=100, unique=True)
+    sequence = models.PositiveBigIntegerField(default=0)
+
+    def __str__(self):
+        return f'{self.name}: {self.sequence}'
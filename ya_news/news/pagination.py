@@ -0,0 +1,132 @@
+import base64
+import json
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+
+
+class InvalidCursor(ValueError):
+    """Курсор повреждён или не соответствует сортировке."""
+
+
+def _serialize(value):
+    """Даты сохраняются без потери микросекунд."""
+    return value.isoformat()
+
+
+def encode_cursor(values):
+    """Кодирует список значений ключа в непрозрачную строку."""
+    data = json.dumps(values, default=_serialize).encode()
+    return base64.urlsafe_b64encode(data).decode().rstrip('=')
+
+
+def decode_cursor(cursor, length):
+    """Декодирует курсор в список из length значений."""
+    try:
+        data = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        values = json.loads(data)
+    except ValueError as error:
+        raise InvalidCursor(cursor) from error
+    if not isinstance(values, list) or len(values) != length:
+        raise InvalidCursor(cursor)
+    # Части курсора — только строки и числа: None и вложенные списки
+    # в поддельном курсоре иначе дошли бы до запроса.
+    if not all(
+        isinstance(value, (str, int, float)) and not isinstance(value, bool)
+        for value in values
+    ):
+        raise InvalidCursor(cursor)
+    return values
+
+
+class KeysetPage:
+    """Страница, полученная постраничной выборкой по ключу."""
+
+    def __init__(self, object_list, next_cursor):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+
+class KeysetPaginator:
+    """
+    Постраничная выборка по ключу сортировки (keyset pagination).
+
+    Вместо OFFSET следующая страница начинается строго после
+    последней записи предыдущей, поэтому стоимость запроса не зависит
+    от глубины страницы. Курсор — непрозрачная строка со значениями
+    полей сортировки последней записи. Все поля сортировки должны
+    идти в одном направлении, а последнее поле — быть уникальным.
+    """
+
+    def __init__(self, queryset, ordering, per_page):
+        descending = {field.startswith('-') for field in ordering}
+        if len(descending) != 1:
+            raise ValueError('Поля сортировки должны иметь одно направление.')
+        self.queryset = queryset.order_by(*ordering)
+        self.fields = [field.lstrip('-') for field in ordering]
+        self.descending = descending.pop()
+        self.per_page = per_page
+
+    def get_page(self, cursor=None):
+        """Возвращает страницу, следующую за курсором."""
+        return self._make_page(list(self._page_queryset(cursor)))
+
+    async def aget_page(self, cursor=None):
+        """Асинхронный вариант get_page для асинхронных представлений."""
+        return self._make_page([
+            obj async for obj in self._page_queryset(cursor).aiterator()
+        ])
+
+    def filter_after(self, cursor=None):
+        """Все записи после курсора, без ограничения размера страницы."""
+        if not cursor:
+            return self.queryset
+        return self.queryset.filter(self._after(self.decode(cursor)))
+
+    def _page_queryset(self, cursor):
+        """Запрос на одну запись больше страницы: по ней виден её конец."""
+        return self.filter_after(cursor)[:self.per_page + 1]
+
+    def _make_page(self, objects):
+        next_cursor = None
+        if len(objects) > self.per_page:
+            objects = objects[:self.per_page]
+            next_cursor = self.encode(objects[-1])
+        return KeysetPage(objects, next_cursor)
+
+    def encode(self, obj):
+        """Кодирует позицию записи в курсор."""
+        return encode_cursor([getattr(obj, field) for field in self.fields])
+
+    def decode(self, cursor):
+        """Восстанавливает значения полей сортировки из курсора."""
+        values = decode_cursor(cursor, len(self.fields))
+        opts = self.queryset.model._meta
+        try:
+            return [
+                opts.pk.to_python(value) if field == 'pk'
+                else opts.get_field(field).to_python(value)
+                for field, value in zip(self.fields, values)
+            ]
+        except (ValidationError, TypeError, ValueError) as error:
+            raise InvalidCursor(cursor) from error
+
+    def _after(self, values):
+        """Условие «строго после» для составного ключа."""
+        lookup = 'lt' if self.descending else 'gt'
+        condition = Q()
+        for index, field in enumerate(self.fields):
+            step = Q(**dict(zip(self.fields[:index], values[:index])))
+            step &= Q(**{f'{field}__{lookup}': values[index]})
+            condition |= step
+        return condition
@@ -0,0 +1,151 @@
+import os
+import re
+import threading
+from collections import deque
+
+from django.conf import settings
+
+# Латинские буквы и цифры, которыми подменяют похожие кириллические.
+HOMOGLYPHS = str.maketrans({
+    'a': 'а', 'b': 'в', 'c': 'с', 'e': 'е', 'h': 'н', 'k': 'к', 'm': 'м',
+    'o': 'о', 'p': 'р', 't': 'т', 'x': 'х', 'y': 'у', 'ё': 'е',
+    '0': 'о', '3': 'з', '4': 'ч', '6': 'б', '@': 'а', '$': 'с',
+})
+SEPARATORS = re.compile(r'[^\w\s]|_')
+SPACED_LETTERS = re.compile(r'(?<=\b\w)\s+(?=\w\b)')
+REPEATS = re.compile(r'(\w)\1+')
+# Окончания, которые отбрасываются, чтобы слово совпадало во всех формах.
+ENDINGS = sorted((
+    'ами', 'ями', 'ого', 'его', 'ому', 'ему', 'ой', 'ей', 'ом', 'ем',
+    'ам', 'ям', 'ах', 'ях', 'ов', 'ев', 'ую', 'юю', 'ая', 'яя', 'ое', 'ее',
+    'ый', 'ий', 'ые', 'ие', 'а', 'я', 'о', 'е', 'и', 'ы', 'у', 'ю', 'ь', 'й',
+), key=len, reverse=True)
+MIN_STEM_LENGTH = 4
+
+
+def normalize(text):
+    """
+    Приводит текст к виду, в котором сравниваются слова.
+
+    Снимает типичные маскировки: латиницу и цифры вместо кириллицы,
+    знаки внутри слова («р.е.д.и.с.к.а»), буквы через пробел
+    и повторы букв («редииииска»).
+    """
+    text = text.lower().translate(HOMOGLYPHS)
+    text = SEPARATORS.sub('', text)
+    text = SPACED_LETTERS.sub('', text)
+    return REPEATS.sub(r'\1', text)
+
+
+def stem(word):
+    """Отбрасывает окончание, оставляя основу не короче MIN_STEM_LENGTH."""
+    for ending in ENDINGS:
+        if (word.endswith(ending)
+                and len(word) - len(ending) >= MIN_STEM_LENGTH):
+            return word[:-len(ending)]
+    return word
+
+
+class Automaton:
+    """
+    Автомат Ахо — Корасик для поиска множества подстрок.
+
+    Время поиска пропорционально длине текста
+    и не зависит от количества образцов.
+    """
+
+    def __init__(self, patterns):
+        self.transitions = [{}]
+        self.fail = [0]
+        self.matches = [None]
+        for pattern in patterns:
+            self._add(pattern)
+        self._link()
+
+    def _add(self, pattern):
+        node = 0
+        for char in pattern:
+            next_node = self.transitions[node].get(char)
+            if next_node is None:
+                next_node = len(self.transitions)
+                self.transitions[node][char] = next_node
+                self.transitions.append({})
+                self.fail.append(0)
+                self.matches.append(None)
+            node = next_node
+        if pattern:
+            self.matches[node] = pattern
+
+    def _link(self):
+        queue = deque(self.transitions[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self.transitions[node].items():
+                queue.append(child)
+                fail = self.fail[node]
+                while fail and char not in self.transitions[fail]:
+                    fail = self.fail[fail]
+                link = self.transitions[fail].get(char, 0)
+                self.fail[child] = link if link != child else 0
+                if self.matches[child] is None:
+                    self.matches[child] = self.matches[self.fail[child]]
+
+    def search(self, text):
+        """Возвращает первый найденный образец или None."""
+        transitions, fail, matches = self.transitions, self.fail, self.matches
+        node = 0
+        for char in text:
+            while node and char not in transitions[node]:
+                node = fail[node]
+            node = transitions[node].get(char, 0)
+            if matches[node] is not None:
+                return matches[node]
+        return None
+
+
+def read_words(path):
+    """Читает словарь: одно слово в строке, # — комментарий."""
+    with open(path, encoding='utf-8') as file:
+        for line in file:
+            word = line.split('#', 1)[0].strip()
+            if word:
+                yield word
+
+
+class WordListMatcher:
+    """
+    Поиск запрещённых слов по встроенному списку и файлу словаря.
+
+    Путь к файлу берётся из настройки setting_name. Автомат строится
+    один раз и перестраивается, когда меняется путь или время
+    изменения файла.
+    """
+
+    def __init__(self, builtin_words=(), setting_name='BAD_WORDS_FILE'):
+        self.builtin_words = tuple(builtin_words)
+        self.setting_name = setting_name
+        self._state = None
+        self._automaton = None
+        self._lock = threading.Lock()
+
+    def find(self, text):
+        """Возвращает основу найденного слова или None."""
+        return self._get_automaton().search(normalize(text))
+
+    def _get_automaton(self):
+        path = getattr(settings, self.setting_name, None)
+        try:
+            state = (path, os.stat(path).st_mtime_ns) if path else None
+        except FileNotFoundError:
+            state = (path, None)
+        if self._automaton is None or state != self._state:
+            with self._lock:
+                if self._automaton is None or state != self._state:
+                    words = list(self.builtin_words)
+                    if state and state[1] is not None:
+                        words.extend(read_words(path))
+                    self._automaton = Automaton(
+                        {stem(normalize(word)) for word in words}
+                    )
+                    self._state = state
+        return self._automaton
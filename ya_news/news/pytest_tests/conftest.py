@@ -1,19 +1,113 @@
 import pytest
+from contextlib import contextmanager
+from copy import deepcopy
+from importlib import reload
 from datetime import timedelta
 
+from django.conf import settings as django_settings
 from django.contrib.auth import get_user_model
-from django.test import Client
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.test import Client, override_settings
+from django.urls import clear_url_caches
 from django.utils import timezone
 from django.urls import reverse
 
+from news import urls as news_urls
 from news.models import News, Comment
 from news.constants import NEWS_ON_HOME_PAGE
+from yanews import urls as project_urls
+from yanews.instrumentation import find_full_scans
 
 User = get_user_model()
 
 COMMENTS_COUNT = 5
 
 
+@pytest.fixture(scope='session', autouse=True)
+def isolated_cache(tmp_path_factory):
+    """
+    Фикстура переносит файловый кэш во временный каталог.
+
+    Иначе тесты читали бы и очищали рабочий кэш проекта.
+    """
+    location = str(tmp_path_factory.mktemp('cache'))
+    caches = deepcopy(django_settings.CACHES)
+    caches['default']['LOCATION'] = location
+    caches['default']['OPTIONS']['SHARED']['LOCATION'] = location
+    with override_settings(CACHES=caches):
+        yield
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    """Фикстура очищает кэш, чтобы тесты не видели данные друг друга."""
+    cache.clear()
+    yield
+    cache.clear()
+
+
+@pytest.fixture
+def no_page_cache(settings):
+    """Фикстура отключает кэш страниц, чтобы проверять сами представления."""
+    settings.PAGE_CACHE_VIEWS = {}
+
+
+@pytest.fixture
+def query_budget():
+    """
+    Фикстура возвращает проверку бюджета запросов к базе.
+
+    Число запросов берётся из response.query_stats,
+    которые сохраняет QueryStatsMiddleware.
+    """
+    def check(response, budget):
+        stats = response.query_stats
+        assert stats.count <= budget, (
+            f'Запросов: {stats.count}, бюджет: {budget}\n'
+            + '\n'.join(sql for sql, _ in stats.queries)
+        )
+    return check
+
+
+@pytest.fixture
+def no_full_scans():
+    """
+    Фикстура возвращает контекст, проверяющий планы запросов.
+
+    Все SELECT, выполненные внутри контекста, проверяются через
+    EXPLAIN QUERY PLAN: полный просмотр таблицы считается ошибкой.
+    """
+    @contextmanager
+    def check(allowed_tables=()):
+        with CaptureQueriesContext(connection) as context:
+            yield
+        scans = find_full_scans(
+            (query['sql'] for query in context.captured_queries),
+            allowed_tables,
+        )
+        assert not scans, '\n'.join(
+            f'{plan}: {sql}' for sql, plan in scans
+        )
+    return check
+
+
+@pytest.fixture
+def async_views(settings):
+    """Фикстура подключает асинхронные представления новостей."""
+    def load_urls():
+        reload(news_urls)
+        reload(project_urls)
+        clear_url_caches()
+
+    settings.NEWS_ASYNC_VIEWS = True
+    load_urls()
+    yield
+    settings.NEWS_ASYNC_VIEWS = False
+    load_urls()
+
+
 @pytest.fixture
 def author():
     """Фикстура создает и возвращает тестового пользователя с ролью автора."""
@@ -97,6 +191,12 @@ def detail_url(news):
     return reverse('news:detail', kwargs={'pk': news.pk})
 
 
+@pytest.fixture
+def feed_url(news):
+    """Фикстура возвращает URL ленты комментариев в JSON."""
+    return reverse('news:comments_feed', kwargs={'pk': news.pk})
+
+
 @pytest.fixture
 def edit_url(comment):
     """Фикстура возвращает URL редактирования комментария."""
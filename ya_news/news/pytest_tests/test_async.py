@@ -0,0 +1,73 @@
+import pytest
+from http import HTTPStatus
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import resolve
+
+from news.models import Comment
+from news.views import AsyncNewsDetailView, AsyncNewsList
+
+pytestmark = pytest.mark.usefixtures('async_views')
+
+
+@pytest.mark.django_db
+def test_async_views_are_routed(home_url, detail_url):
+    """Проверяет, что при NEWS_ASYNC_VIEWS маршруты ведут к async-вариантам."""
+    assert resolve(home_url).func.view_class is AsyncNewsList
+    assert resolve(detail_url).func.view_class is AsyncNewsDetailView
+
+
+@pytest.mark.django_db
+def test_async_home_page(client, news_list, home_url, settings):
+    """Проверяет количество и порядок новостей на главной."""
+    response = client.get(home_url)
+    dates = [news.date for news in response.context['object_list']]
+    assert len(dates) == settings.NEWS_COUNT_ON_HOME_PAGE
+    assert dates == sorted(dates, reverse=True)
+    assert response.context['page'].has_next
+
+
+@pytest.mark.django_db
+def test_async_archive_invalid_cursor(client, home_url):
+    response = client.get(home_url, {'cursor': 'плохой'})
+    assert response.status_code == HTTPStatus.NOT_FOUND
+
+
+@pytest.mark.django_db
+def test_async_detail_page(author_client, comment, detail_url, edit_url):
+    """Проверяет новость, комментарии, форму и ссылки автора."""
+    response = author_client.get(detail_url)
+    assert response.context['news'] == comment.news
+    assert 'form' in response.context
+    content = response.content.decode()
+    assert comment.text in content
+    assert edit_url in content
+
+
+@pytest.mark.django_db
+def test_async_detail_missing_news(client):
+    response = client.get('/news/0/')
+    assert response.status_code == HTTPStatus.NOT_FOUND
+
+
+@pytest.mark.usefixtures('no_page_cache')
+@pytest.mark.django_db
+@pytest.mark.parametrize('url_name', ('home_url', 'detail_url'))
+def test_async_conditional_get(request, client, news, url_name):
+    """Проверяет ответ 304 на запрос с актуальным ETag."""
+    url = request.getfixturevalue(url_name)
+    response = client.get(url)
+    assert response.has_header('ETag')
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+    assert response.status_code == HTTPStatus.NOT_MODIFIED
+    assert len(queries) == 1
+
+
+@pytest.mark.django_db
+def test_async_detail_post_comment(author_client, news, detail_url):
+    """Проверяет, что отправка комментария работает через async-диспетчер."""
+    response = author_client.post(detail_url, data={'text': 'Комментарий'})
+    assert response.status_code == HTTPStatus.FOUND
+    assert Comment.objects.filter(news=news).count() == 1
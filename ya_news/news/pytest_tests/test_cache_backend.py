@@ -0,0 +1,63 @@
+import pytest
+
+from yanews.cache_backends import MISSING, LocalLRU, TwoTierCache
+
+
+@pytest.fixture
+def make_cache(tmp_path):
+    """
+    Фикстура создаёт кэши над одним общим каталогом.
+
+    Каждый кэш получает свой локальный уровень,
+    как если бы он работал в отдельном процессе.
+    """
+    def make(**options):
+        options.setdefault('BYPASS_PREFIXES', ('version:',))
+        options.setdefault('GENERATION_CHECK_INTERVAL', 0)
+        cache = TwoTierCache(str(tmp_path), {'OPTIONS': options})
+        cache.local = LocalLRU(
+            options.get('LOCAL_MAX_BYTES', 1024 * 1024), 1000
+        )
+        return cache
+    return make
+
+
+def test_local_tier_serves_repeated_reads(make_cache):
+    cache = make_cache()
+    cache.shared.set('key', 'значение')
+    assert cache.get('key') == 'значение'
+    assert cache.get('key') == 'значение'
+    stats = cache.stats()
+    assert (stats['shared_hits'], stats['hits']) == (1, 1)
+    assert cache.get('missing') is None
+    assert cache.stats()['misses'] == 1
+
+
+def test_bypass_prefix_is_always_shared(make_cache):
+    first, second = make_cache(), make_cache()
+    first.set('version:news', 1)
+    assert second.get('version:news') == 1
+    first.incr('version:news')
+    assert second.get('version:news') == 2
+    assert second.stats()['entries'] == 0
+
+
+def test_delete_invalidates_other_processes(make_cache):
+    first, second = make_cache(), make_cache()
+    first.set('key', 'старое')
+    assert second.get('key') == 'старое'
+    first.delete('key')
+    assert second.get('key') is None
+    assert second.stats()['invalidations'] == 1
+
+
+def test_local_tier_is_bounded_by_size(make_cache):
+    cache = make_cache(LOCAL_MAX_BYTES=8 * 1024)
+    for index in range(20):
+        cache.set(f'key{index}', 'x' * 500)
+    stats = cache.stats()
+    assert stats['bytes'] <= 8 * 1024
+    assert stats['evictions'] > 0
+    # Вытесненная запись снова читается из общего уровня.
+    assert cache.local.get(cache.local_key('key0', None)) is MISSING
+    assert cache.get('key0') == 'x' * 500
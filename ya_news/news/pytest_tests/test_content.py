@@ -1,7 +1,17 @@
+import json
+from datetime import date
+from http import HTTPStatus
+
 import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
 
 from news.constants import NEWS_ON_HOME_PAGE
-from news.forms import CommentForm
+from news.forms import BAD_WORDS, CommentForm
+from news.models import Comment, News
+from news.pagination import encode_cursor
+from news.pytest_tests.conftest import COMMENTS_COUNT
 
 
 @pytest.mark.django_db
@@ -25,9 +35,9 @@ def test_news_order(client, news_list, home_url):
 def test_comments_order(client, news, comments, detail_url):
     """Проверяет правильность сортировки комментариев на странице новости."""
     response = client.get(detail_url)
-    assert 'news' in response.context
-    news = response.context['news']
-    all_comments = news.comment_set.all()
+    assert 'comments' in response.context
+    all_comments = list(response.context['comments'])
+    assert len(all_comments) == COMMENTS_COUNT
     for i in range(len(all_comments) - 1):
         assert all_comments[i].created <= all_comments[i + 1].created
 
@@ -45,3 +55,186 @@ def test_authorized_user_has_form(author_client, news, detail_url):
     response = author_client.get(detail_url)
     assert 'form' in response.context
     assert isinstance(response.context['form'], CommentForm)
+
+
+@pytest.mark.django_db
+def test_archive_pages_cover_all_news(client, home_url):
+    """Проверяет, что страницы архива выдают все новости без повторов."""
+    News.objects.bulk_create(
+        News(title=f'Новость {index}', text='Текст', date=date(2024, 1, 1))
+        for index in range(NEWS_ON_HOME_PAGE * 2 + 1)
+    )
+    response = client.get(home_url)
+    seen = [news.pk for news in response.context['object_list']]
+    while response.context['page'].has_next:
+        response = client.get(
+            reverse('news:archive'),
+            {'cursor': response.context['page'].next_cursor}
+        )
+        seen += [news.pk for news in response.context['object_list']]
+    expected = list(
+        News.objects.order_by('-date', '-pk').values_list('pk', flat=True)
+    )
+    assert seen == expected
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    'cursor',
+    ('мусор', encode_cursor([5, 3]), encode_cursor([None, 3]),
+     encode_cursor([[1], 2])),
+)
+def test_archive_invalid_cursor(client, cursor):
+    """Проверяет ответ архива на повреждённый или поддельный курсор."""
+    response = client.get(reverse('news:archive'), {'cursor': cursor})
+    assert response.status_code == HTTPStatus.NOT_FOUND
+
+
+@pytest.mark.django_db
+def test_comments_are_paginated(client, news, author, detail_url, settings):
+    """Проверяет постраничную выдачу комментариев на странице новости."""
+    settings.COMMENTS_COUNT_ON_PAGE = 2
+    Comment.objects.bulk_create(
+        Comment(news=news, author=author, text=f'Комментарий {index}')
+        for index in range(COMMENTS_COUNT)
+    )
+    page = client.get(detail_url).context['comments']
+    seen = [comment.pk for comment in page]
+    assert len(seen) == settings.COMMENTS_COUNT_ON_PAGE
+    comments_url = reverse('news:comments', kwargs={'pk': news.pk})
+    while page.has_next:
+        response = client.get(comments_url, {'cursor': page.next_cursor})
+        page = response.context['comments']
+        seen += [comment.pk for comment in page]
+    expected = list(
+        news.comment_set.order_by('created', 'pk').values_list('pk', flat=True)
+    )
+    assert seen == expected
+
+
+@pytest.mark.django_db
+def test_invalid_comment_form_keeps_comments(
+    author_client, news, comments, detail_url
+):
+    """Проверяет, что при ошибке в форме комментарии остаются на странице."""
+    response = author_client.post(
+        detail_url, data={'text': f'Текст с {BAD_WORDS[0]}'}
+    )
+    assert response.status_code == HTTPStatus.OK
+    assert len(response.context['comments']) == COMMENTS_COUNT
+    assert 'Здесь никто ничего не написал' not in response.content.decode()
+
+
+@pytest.mark.django_db
+def test_comments_fragment_for_missing_news(client):
+    """Проверяет ответ фрагмента комментариев для несуществующей новости."""
+    response = client.get(reverse('news:comments', kwargs={'pk': 999999}))
+    assert response.status_code == HTTPStatus.NOT_FOUND
+
+
+@pytest.mark.django_db
+def test_comment_thread_served_from_cache(client, comments, detail_url):
+    """Проверяет, что повторный показ ветки не обращается к комментариям."""
+    client.get(detail_url)
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get(detail_url)
+    assert 'Комментарий 0' in response.content.decode()
+    assert not any('news_comment' in query['sql'] for query in queries)
+
+
+@pytest.mark.django_db
+def test_comment_thread_not_stale_after_write(
+    author_client, comment, detail_url, edit_url,
+    django_capture_on_commit_callbacks
+):
+    """Проверяет, что после записи не выдаётся устаревшая ветка."""
+    author_client.get(detail_url)
+    with django_capture_on_commit_callbacks(execute=True):
+        author_client.post(detail_url, data={'text': 'Новый комментарий'})
+        author_client.post(
+            edit_url, data={'text': 'Исправленный комментарий'}
+        )
+    content = author_client.get(detail_url).content.decode()
+    assert 'Новый комментарий' in content
+    assert 'Исправленный комментарий' in content
+
+
+@pytest.mark.django_db
+def test_comment_controls_are_per_user(
+    author_client, user_client, comment, detail_url, edit_url
+):
+    """Проверяет, что общий кэш не раскрывает чужие ссылки управления."""
+    assert edit_url in author_client.get(detail_url).content.decode()
+    assert edit_url not in user_client.get(detail_url).content.decode()
+
+
+@pytest.mark.usefixtures('no_page_cache')
+@pytest.mark.django_db
+@pytest.mark.parametrize('url_name', ('home_url', 'detail_url'))
+def test_conditional_get(request, client, news, url_name):
+    """Проверяет ответ 304 на запрос с актуальным ETag."""
+    url = request.getfixturevalue(url_name)
+    etag = client.get(url)['ETag']
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == HTTPStatus.NOT_MODIFIED
+    assert len(queries) == 1
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('url_name', ('home_url', 'detail_url'))
+def test_etag_changes_after_comment(
+    request, author_client, news, detail_url, url_name
+):
+    """Проверяет, что новый комментарий меняет ETag страницы."""
+    url = request.getfixturevalue(url_name)
+    etag = author_client.get(url)['ETag']
+    author_client.post(detail_url, data={'text': 'Комментарий'})
+    response = author_client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == HTTPStatus.OK
+
+
+def read_feed(client, url, **params):
+    response = client.get(url, params)
+    assert response.streaming
+    return json.loads(b''.join(response.streaming_content))
+
+
+@pytest.mark.django_db
+def test_comments_feed(client, comments, feed_url):
+    """Проверяет, что лента отдаёт все комментарии от старых к новым."""
+    feed = read_feed(client, feed_url)
+    created = [comment['created'] for comment in feed['comments']]
+    assert len(created) == COMMENTS_COUNT
+    assert created == sorted(created)
+    assert feed['comments'][0]['author'] == 'Автор'
+
+
+@pytest.mark.django_db
+def test_comments_feed_cursor(client, author, news, comments, feed_url):
+    """Проверяет, что по курсору приходят только новые комментарии."""
+    cursor = read_feed(client, feed_url)['next_cursor']
+    assert read_feed(client, feed_url, cursor=cursor)['comments'] == []
+    Comment.objects.create(news=news, author=author, text='Новый')
+    feed = read_feed(client, feed_url, cursor=cursor)
+    assert [comment['text'] for comment in feed['comments']] == ['Новый']
+    assert feed['next_cursor'] != cursor
+
+
+@pytest.mark.django_db
+def test_comments_feed_since(client, comments, feed_url):
+    created = [
+        comment['created'] for comment in read_feed(client, feed_url)[
+            'comments'
+        ]
+    ]
+    feed = read_feed(client, feed_url, since=created[1])
+    assert [comment['created'] for comment in feed['comments']] == (
+        created[2:]
+    )
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('params', ({'cursor': 'мусор'}, {'since': 'вчера'}))
+def test_comments_feed_invalid_params(client, news, feed_url, params):
+    assert client.get(feed_url, params).status_code == HTTPStatus.NOT_FOUND
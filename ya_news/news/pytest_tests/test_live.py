@@ -0,0 +1,171 @@
+import asyncio
+from http import HTTPStatus
+
+import pytest
+from asgiref.sync import async_to_sync, sync_to_async
+from django.core.cache import cache
+from django.test import AsyncClient
+from django.urls import reverse
+
+from news import live
+from news.models import Comment, LiveChannel
+from news.views import NewsCommentsStream
+
+pytestmark = [pytest.mark.django_db, pytest.mark.usefixtures('async_views')]
+
+
+@pytest.fixture
+def stream_url(news):
+    """Фикстура возвращает URL потока новых комментариев."""
+    return reverse('news:comments_stream', kwargs={'pk': news.pk})
+
+
+@pytest.fixture(autouse=True)
+def broker(settings):
+    """Фикстура даёт каждому тесту свой брокер событий."""
+    live.load_broker.cache_clear()
+    yield live.get_broker()
+    live.load_broker.cache_clear()
+
+
+async def next_event(events):
+    return await asyncio.wait_for(anext(events), 1)
+
+
+def test_stream_pushes_new_comment(
+    author_client, detail_url, stream_url,
+    django_capture_on_commit_callbacks,
+):
+    """Проверяет, что комментарий из формы приходит в открытый поток."""
+    def post_comment():
+        with django_capture_on_commit_callbacks(execute=True):
+            author_client.post(detail_url, data={'text': 'Живой комментарий'})
+
+    @async_to_sync
+    async def read():
+        response = await AsyncClient().get(stream_url)
+        assert response['Content-Type'] == 'text/event-stream'
+        events = aiter(response.streaming_content)
+        assert await next_event(events) == b'retry: 3000\n\n'
+        await sync_to_async(post_comment)()
+        event = await next_event(events)
+        await events.aclose()
+        return event.decode()
+
+    event = read()
+    assert event.startswith('id: ')
+    assert 'event: comment' in event
+    assert 'Живой комментарий' in event
+
+
+def test_stream_replays_missed_comments(author, news, comment, stream_url):
+    """Проверяет досылку пропущенного по заголовку Last-Event-ID."""
+    event_id, _ = live.comment_event(
+        comment.pk, comment.created, comment.text, author.username
+    )
+    Comment.objects.create(news=news, author=author, text='Пропущенный')
+
+    @async_to_sync
+    async def read():
+        response = await AsyncClient().get(
+            stream_url, headers={'Last-Event-ID': event_id}
+        )
+        events = aiter(response.streaming_content)
+        await next_event(events)
+        event = await next_event(events)
+        await events.aclose()
+        return event.decode()
+
+    assert 'Пропущенный' in read()
+
+
+def test_stream_replay_is_limited(
+    monkeypatch, author, news, comment, stream_url
+):
+    """Проверяет, что длинная досылка закрывает поток после части."""
+    monkeypatch.setattr(NewsCommentsStream, 'replay_limit', 1)
+    event_id, _ = live.comment_event(
+        comment.pk, comment.created, comment.text, author.username
+    )
+    for text in ('Первый', 'Второй'):
+        Comment.objects.create(news=news, author=author, text=text)
+
+    @async_to_sync
+    async def read():
+        response = await AsyncClient().get(
+            stream_url, headers={'Last-Event-ID': event_id}
+        )
+        return [event.decode() async for event in response.streaming_content]
+
+    retry, event = read()
+    assert retry.startswith('retry: ')
+    assert 'Первый' in event
+
+
+def test_stream_keepalive(settings, stream_url):
+    settings.NEWS_LIVE_KEEPALIVE = 0.01
+
+    @async_to_sync
+    async def read():
+        response = await AsyncClient().get(stream_url)
+        events = aiter(response.streaming_content)
+        await next_event(events)
+        event = await next_event(events)
+        await events.aclose()
+        return event
+
+    assert read() == b': keepalive\n\n'
+
+
+def test_stream_for_missing_news(client):
+    url = reverse('news:comments_stream', kwargs={'pk': 0})
+    assert client.get(url).status_code == HTTPStatus.NOT_FOUND
+
+
+def test_slow_subscriber_is_disconnected(settings, broker):
+    """Проверяет, что переполненная очередь закрывает соединение."""
+    settings.NEWS_LIVE_QUEUE_SIZE = 2
+
+    @async_to_sync
+    async def read():
+        subscription = broker.subscribe('channel')
+        for index in range(3):
+            broker.publish('channel', index)
+        await asyncio.sleep(0)
+        return await subscription.get()
+
+    assert read() is None
+
+
+def test_cache_broker_fans_out_between_processes():
+    """Проверяет, что событие доходит до подписчика другого процесса."""
+    publisher, listener = live.CacheBroker(), live.CacheBroker()
+    listener.poll_interval = 0.01
+
+    @async_to_sync
+    async def read():
+        subscription = listener.subscribe('channel')
+        await asyncio.sleep(0.02)
+        await sync_to_async(publisher.publish)('channel', 'событие')
+        message = await asyncio.wait_for(subscription.get(), 1)
+        subscription.close()
+        await asyncio.sleep(0.02)
+        return message
+
+    assert read() == 'событие'
+    assert not listener.listeners
+
+
+def test_cache_broker_numbers_events_in_database():
+    """Проверяет, что номера событий выдаются счётчиком в базе."""
+    first, second = live.CacheBroker(), live.CacheBroker()
+    first.publish('channel', 'первое')
+    second.publish('channel', 'второе')
+    assert LiveChannel.objects.get(name='channel').sequence == 2
+    assert cache.get_many([
+        live.EVENT_KEY.format(channel='channel', sequence=number)
+        for number in (1, 2)
+    ]) == {
+        'live:channel:1': 'первое',
+        'live:channel:2': 'второе',
+    }
@@ -1,7 +1,15 @@
+import json
+import os
+from io import StringIO
+from unittest import mock
+
 import pytest
+from django.core.management import call_command
+from django.db import DatabaseError
 
-from news.forms import BAD_WORDS
-from news.models import Comment
+from news.forms import BAD_WORDS, WARNING, CommentForm, bad_words_matcher
+from news.models import Comment, ImportProgress, News
+from news.pytest_tests.conftest import COMMENTS_COUNT
 
 
 @pytest.mark.django_db
@@ -102,3 +110,162 @@ def test_user_cant_delete_others_comments(user_client, comment, delete_url):
     assert Comment.objects.filter(id=comment.id)
     assert comment_after.text == comment_before.text
     assert comment_after.author == comment_before.author
+
+
+@pytest.mark.django_db
+def test_comment_count_follows_comments(author_client, news, detail_url):
+    """Проверяет, что счётчик комментариев новости следует за записями."""
+    author_client.post(detail_url, data={'text': 'Комментарий'})
+    news.refresh_from_db()
+    assert news.comment_count == 1
+    Comment.objects.get().delete()
+    news.refresh_from_db()
+    assert news.comment_count == 0
+
+
+@pytest.mark.django_db
+def test_comment_count_ignores_stale_instances(author, news):
+    """Проверяет, что счётчик не зависит от состояния объектов в памяти."""
+    first = News.objects.get(pk=news.pk)
+    second = News.objects.get(pk=news.pk)
+    Comment.objects.create(news=first, author=author, text='Первый')
+    Comment.objects.create(news=second, author=author, text='Второй')
+    news.refresh_from_db()
+    assert news.comment_count == 2
+
+
+@pytest.mark.django_db
+def test_comment_count_never_negative(author, news):
+    """Проверяет удаление комментариев, не учтённых в счётчике."""
+    Comment.objects.bulk_create(
+        [Comment(news=news, author=author, text='Без сигнала')]
+    )
+    Comment.objects.all().delete()
+    news.refresh_from_db()
+    assert news.comment_count == 0
+
+
+@pytest.mark.django_db
+def test_backfill_comment_count(news, comments):
+    """Проверяет пересчёт счётчика комментариев командой."""
+    News.objects.update(comment_count=0)
+    call_command('backfill_comment_count', stdout=StringIO())
+    news.refresh_from_db()
+    assert news.comment_count == COMMENTS_COUNT
+
+
+@pytest.mark.parametrize(
+    'text',
+    (
+        'Ты редиской оказался',
+        'Какой НЕГОДЯЙ',
+        'р.е.д.и.с.к.а',
+        'р е д и с к а',
+        'редииииска',
+        'pедиcка',
+        'Подлецы!',
+    )
+)
+def test_bad_words_forms_and_obfuscations(text):
+    """Проверяет поиск запрещённых слов в разных формах и написаниях."""
+    form = CommentForm(data={'text': text})
+    assert not form.is_valid()
+    assert WARNING in form.errors['text']
+
+
+def test_clean_text_is_valid():
+    """Проверяет, что обычный текст проходит проверку."""
+    form = CommentForm(data={'text': 'Отличная новость, спасибо!'})
+    assert form.is_valid()
+
+
+def test_bad_words_file_is_reloaded(tmp_path, settings):
+    """Проверяет перечитывание словаря после изменения файла."""
+    words_file = tmp_path / 'words.txt'
+    words_file.write_text('бяка\n', encoding='utf-8')
+    settings.BAD_WORDS_FILE = words_file
+    assert bad_words_matcher.find('ну и бяка')
+    words_file.write_text('кака\n', encoding='utf-8')
+    os.utime(words_file, ns=(0, 0))
+    assert not bad_words_matcher.find('ну и бяка')
+    assert bad_words_matcher.find('ну и кака')
+
+
+@pytest.mark.django_db
+def test_import_news_jsonl(tmp_path, author):
+    """Проверяет загрузку новостей и комментариев из JSONL."""
+    records = [
+        {'model': 'news', 'id': 100, 'title': 'Архив', 'text': 'Текст',
+         'date': '2020-01-01'},
+        {'model': 'comment', 'news': 100, 'author': author.username,
+         'text': 'Старый комментарий', 'created': '2020-01-02T10:00:00Z'},
+        {'model': 'comment', 'news': 100, 'author': 'Неизвестный',
+         'text': 'Пропускается'},
+    ]
+    path = tmp_path / 'archive.jsonl'
+    path.write_text(
+        '\n'.join(json.dumps(record) for record in records), encoding='utf-8'
+    )
+    call_command('import_news', path, batch_size=2, stdout=StringIO())
+    news = News.objects.get(pk=100)
+    assert news.comment_count == 1
+    comment = Comment.objects.get()
+    assert comment.created.year == 2020
+    progress = ImportProgress.objects.get()
+    assert progress.source == str(path.resolve())
+    assert progress.records == len(records)
+
+
+@pytest.mark.django_db
+def test_import_news_progress_is_saved_with_batch(tmp_path, author, news):
+    """Проверяет, что сбой при записи состояния откатывает пачку."""
+    path = tmp_path / 'comments.jsonl'
+    path.write_text(json.dumps({
+        'model': 'comment', 'news': news.pk, 'author': author.username,
+        'text': 'Комментарий',
+    }), encoding='utf-8')
+    with mock.patch.object(
+        ImportProgress.objects, 'filter', side_effect=DatabaseError
+    ), pytest.raises(DatabaseError):
+        call_command('import_news', path, stdout=StringIO())
+    assert not Comment.objects.exists()
+    call_command('import_news', path, stdout=StringIO())
+    call_command('import_news', path, stdout=StringIO())
+    assert Comment.objects.count() == 1
+    news.refresh_from_db()
+    assert news.comment_count == 1
+
+
+@pytest.mark.django_db
+def test_import_news_resumes(tmp_path):
+    """Проверяет продолжение загрузки с последней сохранённой пачки."""
+    path = tmp_path / 'news.csv'
+    path.write_text(
+        'title,text\nПервая,Текст\nВторая,Текст\nТретья,Текст\n',
+        encoding='utf-8',
+    )
+    ImportProgress.objects.create(source='news', records=2)
+    call_command(
+        'import_news', path, model='news', state='news', stdout=StringIO()
+    )
+    assert list(News.objects.values_list('title', flat=True)) == ['Третья']
+
+
+@pytest.mark.django_db
+def test_generate_data():
+    """Проверяет объёмы, счётчики и повторяемость синтетических данных."""
+    def generate():
+        call_command(
+            'generate_data', users=5, news=20, comments=200, batch_size=30,
+            stdout=StringIO(),
+        )
+        return list(Comment.objects.order_by('pk').values_list(
+            'news__title', 'author__username', 'text', 'created'
+        ))
+
+    first = generate()
+    assert len(first) == 200
+    assert News.objects.count() == 20
+    assert sum(News.objects.values_list('comment_count', flat=True)) == 200
+    News.objects.all().delete()
+    assert generate() == first
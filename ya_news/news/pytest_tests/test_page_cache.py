@@ -0,0 +1,103 @@
+import pytest
+from http import HTTPStatus
+
+from django.http import HttpResponse
+
+from yanews import page_cache
+
+pytestmark = pytest.mark.django_db
+
+
+class BusyCache:
+    """Кэш, в котором страницу уже строит другой запрос."""
+
+    def __init__(self, cache, ready=False):
+        self.cache = cache
+        self.ready = ready
+
+    def add(self, key, *args, **kwargs):
+        if not key.startswith(page_cache.LOCK_PREFIX):
+            return self.cache.add(key, *args, **kwargs)
+        if self.ready:
+            self.cache.set(
+                key[len(page_cache.LOCK_PREFIX):],
+                page_cache.serialize(HttpResponse('Готовая страница')),
+            )
+        return False
+
+    def __getattr__(self, name):
+        return getattr(self.cache, name)
+
+
+@pytest.mark.parametrize('url_name', ('home_url', 'detail_url'))
+def test_anonymous_page_is_cached(request, client, news, url_name):
+    """Проверяет, что повторный анонимный запрос не обращается к базе."""
+    url = request.getfixturevalue(url_name)
+    first = client.get(url)
+    second = client.get(url)
+    assert second.query_stats.count == 0
+    assert second.content == first.content
+
+
+def test_cached_page_conditional_get(client, news, detail_url):
+    """Проверяет ответ 304 из кэша страниц."""
+    etag = client.get(detail_url)['ETag']
+    response = client.get(detail_url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == HTTPStatus.NOT_MODIFIED
+    assert response.query_stats.count == 0
+
+
+def test_authorized_page_is_not_cached(author_client, news, detail_url):
+    """Проверяет, что страницы с формой и сессией не кэшируются."""
+    author_client.get(detail_url)
+    assert author_client.get(detail_url).query_stats.count > 0
+
+
+def test_page_cache_varies_by_host(client, news, home_url):
+    client.get(home_url)
+    response = client.get(home_url, HTTP_HOST='127.0.0.1')
+    assert response.query_stats.count > 0
+
+
+def test_page_invalidated_on_comment(
+    client, author_client, news, detail_url, home_url,
+    django_capture_on_commit_callbacks,
+):
+    """Проверяет, что комментарий сбрасывает страницу новости и ленту."""
+    client.get(detail_url)
+    client.get(home_url)
+    with django_capture_on_commit_callbacks(execute=True):
+        author_client.post(detail_url, data={'text': 'Новый комментарий'})
+    assert 'Новый комментарий' in client.get(detail_url).content.decode()
+    assert 'Комментариев: 1' in client.get(home_url).content.decode()
+
+
+def test_page_invalidated_on_news_change(
+    client, news, home_url, django_capture_on_commit_callbacks
+):
+    client.get(home_url)
+    news.title = 'Исправленный заголовок'
+    with django_capture_on_commit_callbacks(execute=True):
+        news.save()
+    assert news.title in client.get(home_url).content.decode()
+
+
+def test_miss_waits_for_other_render(monkeypatch, client, news, detail_url):
+    """Проверяет, что при занятой блокировке страница берётся из кэша."""
+    monkeypatch.setattr(
+        page_cache, 'cache', BusyCache(page_cache.cache, ready=True)
+    )
+    response = client.get(detail_url)
+    assert response.content.decode() == 'Готовая страница'
+    assert response.query_stats.count == 0
+
+
+def test_miss_renders_after_lock_timeout(
+    monkeypatch, settings, client, news, detail_url
+):
+    """Проверяет, что без готовой страницы запрос строит её сам."""
+    settings.PAGE_CACHE_LOCK_TIMEOUT = 0.05
+    monkeypatch.setattr(page_cache, 'cache', BusyCache(page_cache.cache))
+    response = client.get(detail_url)
+    assert response.status_code == HTTPStatus.OK
+    assert news.title in response.content.decode()
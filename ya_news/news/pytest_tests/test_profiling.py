@@ -0,0 +1,62 @@
+import json
+import re
+import pytest
+from io import StringIO
+
+from django.core.management import call_command
+
+from yanews.profiling import make_token
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def profile_dir(settings, tmp_path):
+    settings.PROFILE_DIR = tmp_path
+    return tmp_path
+
+
+def test_signed_header_writes_profile(client, news, detail_url, profile_dir):
+    """Проверяет профиль, SQL и время шаблонов в дампе запроса."""
+    client.get(detail_url, HTTP_X_PROFILE=make_token())
+    [dump] = profile_dir.glob('*.json')
+    meta = json.loads(dump.read_text())
+    assert meta['view'] == 'news:detail'
+    assert meta['queries']
+    assert 0 < meta['templates'] < meta['total']
+    assert dump.with_suffix('.prof').is_file()
+
+
+def test_profiled_request_keeps_server_timing(
+    client, news, detail_url, profile_dir
+):
+    """Проверяет время шаблонов в Server-Timing профилируемого запроса."""
+    response = client.get(detail_url, HTTP_X_PROFILE=make_token())
+    templates = re.search(r'tpl;dur=([\d.]+)', response['Server-Timing'])
+    assert float(templates.group(1)) > 0
+
+
+@pytest.mark.parametrize('header', (None, 'profile:подделка'))
+def test_request_is_not_profiled(
+    client, news, detail_url, profile_dir, header
+):
+    headers = {'HTTP_X_PROFILE': header} if header else {}
+    client.get(detail_url, **headers)
+    assert not list(profile_dir.iterdir())
+
+
+def test_sampled_request_is_profiled(client, home_url, profile_dir, settings):
+    settings.PROFILE_SAMPLE_RATE = 1
+    client.get(home_url)
+    assert len(list(profile_dir.glob('*.json'))) == 1
+
+
+def test_profile_report(client, news, detail_url, profile_dir):
+    """Проверяет, что отчёт группирует дампы по представлениям."""
+    for _ in range(2):
+        client.get(detail_url, HTTP_X_PROFILE=make_token())
+    out = StringIO()
+    call_command('profile_report', stdout=out)
+    report = out.getvalue()
+    assert 'news:detail: запросов 2' in report
+    assert 'SELECT' in report
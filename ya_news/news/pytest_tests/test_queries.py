@@ -0,0 +1,152 @@
+import json
+
+import pytest
+from asgiref.sync import async_to_sync, sync_to_async
+from django.db import connection, connections
+from django.test import Client
+from django.urls import reverse
+
+from yanews import instrumentation
+from yanews.instrumentation import FULL_SCAN, QueryStats, find_full_scans
+
+# Бюджет запросов к базе для каждого URL, клиента и метода.
+# Сессия и пользователь авторизованного клиента — два запроса.
+QUERY_BUDGETS = (
+    ('home_url', 'client', 'get', 2),
+    ('home_url', 'author_client', 'get', 4),
+    ('detail_url', 'client', 'get', 3),
+    ('detail_url', 'author_client', 'get', 5),
+    ('detail_url', 'author_client', 'post', 5),
+    ('edit_url', 'author_client', 'get', 3),
+    ('edit_url', 'author_client', 'post', 5),
+    ('delete_url', 'author_client', 'get', 3),
+    ('delete_url', 'author_client', 'post', 5),
+)
+
+
+@pytest.fixture
+def archive_url(news_list):
+    """Фикстура возвращает URL второй страницы архива."""
+    client = Client()
+    cursor = client.get(reverse('news:home')).context['page'].next_cursor
+    return f"{reverse('news:archive')}?cursor={cursor}"
+
+
+@pytest.fixture
+def comments_url(news):
+    """Фикстура возвращает URL фрагмента комментариев."""
+    return reverse('news:comments', kwargs={'pk': news.pk})
+
+
+@pytest.fixture
+def search_url():
+    """Фикстура возвращает URL поиска с запросом."""
+    return f"{reverse('news:search')}?q=новость"
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    'url_name, client_fixture, method, budget', QUERY_BUDGETS
+)
+def test_query_budget(
+    request, comments, query_budget, url_name, client_fixture, method, budget
+):
+    """Проверяет, что страницы не превышают бюджет запросов к базе."""
+    client = request.getfixturevalue(client_fixture)
+    url = request.getfixturevalue(url_name)
+    response = getattr(client, method)(url, data={'text': 'Комментарий'})
+    query_budget(response, budget)
+
+
+@pytest.mark.django_db
+def test_server_timing_header(client, home_url):
+    """Проверяет заголовок Server-Timing с данными о запросах к базе."""
+    response = client.get(home_url)
+    assert response['Server-Timing'].startswith('db;dur=')
+
+
+@pytest.mark.django_db(transaction=True)
+def test_queries_from_worker_threads_are_counted():
+    """Проверяет подсчёт запросов из потоков sync_to_async."""
+    def query():
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT 1')
+        finally:
+            connections.close_all()
+
+    with QueryStats().capture() as outer, QueryStats().capture() as inner:
+        async_to_sync(sync_to_async(query, thread_sensitive=False))()
+    assert outer.count == inner.count == 1
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    'url_name, client_fixture, method',
+    [budget[:3] for budget in QUERY_BUDGETS] + [
+        ('archive_url', 'client', 'get'),
+        ('comments_url', 'client', 'get'),
+        ('search_url', 'client', 'get'),
+    ]
+)
+def test_queries_use_indexes(
+    request, comments, no_full_scans, url_name, client_fixture, method
+):
+    """Проверяет, что запросы страниц не просматривают таблицы целиком."""
+    client = request.getfixturevalue(client_fixture)
+    url = request.getfixturevalue(url_name)
+    with no_full_scans():
+        getattr(client, method)(url, data={'text': 'Комментарий'})
+
+
+@pytest.mark.django_db
+def test_full_scan_is_detected():
+    """Проверяет, что утилита находит полный просмотр таблицы."""
+    scans = find_full_scans(["SELECT id FROM news_news WHERE text = 'x'"])
+    assert scans == [
+        ("SELECT id FROM news_news WHERE text = 'x'", 'SCAN news_news')
+    ]
+
+
+@pytest.mark.parametrize('plan, table', (
+    ('SCAN news_news', 'news_news'),
+    ('SCAN TABLE news_news', 'news_news'),
+    ('SCAN news_news USING INDEX news_date_id_idx', None),
+    ('SCAN TABLE news_news USING INDEX news_date_id_idx', None),
+    ('SEARCH news_news USING INTEGER PRIMARY KEY (rowid=?)', None),
+))
+def test_full_scan_plan_formats(plan, table):
+    """Проверяет форматы плана SQLite 3.36+ и более старых версий."""
+    match = FULL_SCAN.match(plan)
+    assert (match and match.group(1)) == table
+
+
+@pytest.mark.django_db
+def test_sqlite_pragmas(settings):
+    """Проверяет, что соединение настроено при подключении."""
+    with connection.cursor() as cursor:
+        for name in ('busy_timeout', 'cache_size', 'synchronous'):
+            cursor.execute(f'PRAGMA {name}')
+            value = cursor.fetchone()[0]
+            expected = settings.SQLITE_PRAGMAS[name]
+            assert value == (1 if expected == 'NORMAL' else expected), name
+    assert connection.transaction_mode == 'IMMEDIATE'
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('threshold, logged', ((0, True), (60, False)))
+def test_slow_request_log(
+    monkeypatch, caplog, settings, client, news, detail_url, threshold, logged
+):
+    """Проверяет строку JSON о медленном запросе и порог журнала."""
+    settings.SLOW_REQUEST_THRESHOLD = threshold
+    monkeypatch.setattr(instrumentation.slow_request_logger, 'propagate', True)
+    client.get(detail_url)
+    records = [r for r in caplog.records if r.name == 'slow_requests']
+    assert len(records) == int(logged)
+    if logged:
+        entry = json.loads(records[0].getMessage())
+        assert entry['url_name'] == 'news:detail'
+        assert entry['view'] == 'news.views.NewsDetailView'
+        assert entry['queries'] == len(entry['slowest_queries'])
+        assert entry['templates_ms'] > 0
@@ -9,6 +9,7 @@ from http import HTTPStatus
     [
         ('home_url', 'client', HTTPStatus.OK),
         ('detail_url', 'client', HTTPStatus.OK),
+        ('feed_url', 'client', HTTPStatus.OK),
         ('edit_url', 'author_client', HTTPStatus.OK),
         ('delete_url', 'author_client', HTTPStatus.OK),
         ('login_url', 'client', HTTPStatus.OK),
@@ -41,3 +42,10 @@ def test_redirects(client, url_name, login_url, request):
     response = client.get(url)
     assert response.status_code == HTTPStatus.FOUND
     assert login_url in response.url
+
+
+@pytest.mark.django_db
+def test_stream_requires_async_views(client, news):
+    """Проверяет, что без NEWS_ASYNC_VIEWS маршрута потока событий нет."""
+    response = client.get(f'/news/{news.pk}/comments/stream/')
+    assert response.status_code == HTTPStatus.NOT_FOUND
@@ -0,0 +1,76 @@
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.urls import reverse
+
+from news.models import News
+
+
+@pytest.fixture
+def search_url():
+    """Фикстура возвращает URL страницы поиска."""
+    return reverse('news:search')
+
+
+@pytest.mark.django_db
+def test_search_ranks_title_higher(client, search_url):
+    """Проверяет, что совпадение в заголовке выше совпадения в тексте."""
+    in_text = News.objects.create(title='Погода', text='Ожидаются роботы')
+    in_title = News.objects.create(title='Роботы', text='Текст новости')
+    response = client.get(search_url, {'q': 'робот'})
+    found = [result.pk for result in response.context['page']]
+    assert found == [in_title.pk, in_text.pk]
+    content = response.content.decode()
+    assert '<mark>Роботы</mark>' in content
+    assert 'Ожидаются <mark>роботы</mark>' in content
+
+
+@pytest.mark.django_db
+def test_search_index_follows_changes(client, search_url, news):
+    """Проверяет, что индекс обновляется при изменении новостей."""
+    news.title = 'Космос'
+    news.save()
+    response = client.get(search_url, {'q': 'космос'})
+    assert [result.pk for result in response.context['page']] == [news.pk]
+    news.delete()
+    response = client.get(search_url, {'q': 'космос'})
+    assert not response.context['page']
+
+
+@pytest.mark.django_db
+def test_search_pagination(client, search_url, settings):
+    """Проверяет постраничную выдачу результатов поиска."""
+    settings.SEARCH_RESULTS_ON_PAGE = 2
+    News.objects.bulk_create(
+        News(title=f'Новость {index}', text='Общий текст')
+        for index in range(5)
+    )
+    page = client.get(search_url, {'q': 'общий'}).context['page']
+    seen = [result.pk for result in page]
+    while page.has_next:
+        page = client.get(
+            search_url, {'q': 'общий', 'cursor': page.next_cursor}
+        ).context['page']
+        seen += [result.pk for result in page]
+    assert sorted(seen) == sorted(News.objects.values_list('pk', flat=True))
+
+
+@pytest.mark.django_db
+def test_search_query_is_escaped(client, search_url, news):
+    """Проверяет, что операторы FTS5 в запросе не ломают поиск."""
+    response = client.get(search_url, {'q': 'новость" OR NEAR('})
+    assert response.status_code == 200
+
+
+@pytest.mark.django_db
+def test_rebuild_news_index(client, search_url, news):
+    """Проверяет перестроение индекса командой."""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "INSERT INTO news_news_fts(news_news_fts) VALUES ('delete-all')"
+        )
+    call_command('rebuild_news_index', batch_size=1, stdout=StringIO())
+    response = client.get(search_url, {'q': 'тестовая'})
+    assert [result.pk for result in response.context['page']] == [news.pk]
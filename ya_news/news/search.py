@@ -0,0 +1,131 @@
+import re
+from collections import namedtuple
+
+from django.db import connection, transaction
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+
+from .pagination import InvalidCursor, KeysetPage, decode_cursor, encode_cursor
+
+# Вес совпадений в заголовке и в тексте для bm25.
+TITLE_WEIGHT = 10.0
+TEXT_WEIGHT = 1.0
+SNIPPET_TOKENS = 16
+# Служебные символы, которыми FTS5 отмечает совпадения во фрагменте;
+# после экранирования HTML они заменяются тегами <mark>.
+MARK_START = '\x02'
+MARK_END = '\x03'
+TOKEN = re.compile(r'\w+')
+
+SearchResult = namedtuple(
+    'SearchResult', ('pk', 'title', 'date', 'snippet', 'score')
+)
+
+SEARCH_SQL = f"""
+    SELECT id, title, date, snippet, score FROM (
+        SELECT news_news.id, news_news.date,
+               highlight(news_news_fts, 0, %s, %s) AS title,
+               snippet(news_news_fts, 1, %s, %s, '…', {SNIPPET_TOKENS})
+                   AS snippet,
+               bm25(news_news_fts, {TITLE_WEIGHT}, {TEXT_WEIGHT}) AS score
+        FROM news_news_fts
+        JOIN news_news ON news_news.id = news_news_fts.rowid
+        WHERE news_news_fts MATCH %s
+    )
+    WHERE score > %s OR (score = %s AND id > %s)
+    ORDER BY score, id
+    LIMIT %s
+"""
+
+
+def build_match_query(query):
+    """
+    Превращает пользовательский ввод в безопасный запрос FTS5.
+
+    Каждое слово берётся в кавычки, чтобы операторы FTS5 в вводе
+    не ломали запрос, и ищется как префикс — так находятся
+    разные формы слова.
+    """
+    return ' '.join(f'"{token}"*' for token in TOKEN.findall(query.lower()))
+
+
+def highlight(snippet):
+    return mark_safe(
+        escape(snippet)
+        .replace(MARK_START, '<mark>')
+        .replace(MARK_END, '</mark>')
+    )
+
+
+def search_news(query, per_page, cursor=None):
+    """
+    Ищет новости, упорядочивая их по релевантности bm25.
+
+    Страницы выдаются по курсору из пары (оценка, id).
+    """
+    match = build_match_query(query)
+    if not match:
+        return KeysetPage([], None)
+    score, last_pk = float('-inf'), 0
+    if cursor:
+        score, last_pk = decode_cursor(cursor, 2)
+        if not isinstance(score, float) or not isinstance(last_pk, int):
+            raise InvalidCursor(cursor)
+    with connection.cursor() as db_cursor:
+        db_cursor.execute(SEARCH_SQL, (
+            MARK_START, MARK_END, MARK_START, MARK_END, match,
+            score, score, last_pk, per_page + 1,
+        ))
+        rows = db_cursor.fetchall()
+    results = [
+        SearchResult(pk, highlight(title), date, highlight(snippet), score)
+        for pk, title, date, snippet, score in rows
+    ]
+    next_cursor = None
+    if len(results) > per_page:
+        results = results[:per_page]
+        next_cursor = encode_cursor([results[-1].score, results[-1].pk])
+    return KeysetPage(results, next_cursor)
+
+
+def rebuild_index(batch_size, progress=None):
+    """
+    Заполняет индекс заново пачками по batch_size новостей.
+
+    Каждая пачка сохраняется в своей транзакции, поэтому запись
+    в news_news не блокируется на всё время перестроения; пока оно
+    идёт, поиск находит только уже проиндексированные новости.
+    После каждой пачки вызывается progress(число новостей).
+    """
+    with connection.cursor() as db_cursor:
+        db_cursor.execute(
+            "INSERT INTO news_news_fts(news_news_fts) VALUES ('delete-all')"
+        )
+    last_pk, indexed = 0, 0
+    while True:
+        with transaction.atomic(), connection.cursor() as db_cursor:
+            db_cursor.execute(
+                'SELECT max(id), count(*) FROM ('
+                '  SELECT id FROM news_news WHERE id > %s'
+                '  ORDER BY id LIMIT %s'
+                ')',
+                (last_pk, batch_size),
+            )
+            batch_max, count = db_cursor.fetchone()
+            if not count:
+                break
+            db_cursor.execute(
+                'INSERT INTO news_news_fts(rowid, title, text) '
+                'SELECT id, title, text FROM news_news '
+                'WHERE id > %s AND id <= %s',
+                (last_pk, batch_max),
+            )
+        last_pk = batch_max
+        indexed += count
+        if progress:
+            progress(indexed)
+    with connection.cursor() as db_cursor:
+        db_cursor.execute(
+            "INSERT INTO news_news_fts(news_news_fts) VALUES ('optimize')"
+        )
+    return indexed
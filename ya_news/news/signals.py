@@ -0,0 +1,61 @@
+from django.db.models import F
+from django.db.models.functions import Greatest
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from yanews.page_cache import bump_page_tags
+from .cache import bump_comments_version
+from .models import Comment, News
+
+
+@receiver(post_save, sender=Comment)
+def increment_comment_count(sender, instance, created, **kwargs):
+    """
+    Увеличивает счётчик комментариев новости.
+
+    Инкремент выполняется на стороне базы данных,
+    поэтому параллельные записи не теряют обновления.
+    Время изменения новости обновляется и при правке комментария.
+    """
+    changes = {'modified': timezone.now()}
+    if created:
+        changes['comment_count'] = F('comment_count') + 1
+    News.objects.filter(pk=instance.news_id).update(**changes)
+
+
+@receiver(post_delete, sender=Comment)
+def decrement_comment_count(sender, instance, **kwargs):
+    """
+    Уменьшает счётчик комментариев новости.
+
+    Комментарии, созданные в обход post_save (bulk_create, сырой SQL),
+    не учтены в счётчике, поэтому он не опускается ниже нуля;
+    после массовой загрузки нужно запустить backfill_comment_count.
+    """
+    News.objects.filter(pk=instance.news_id).update(
+        comment_count=Greatest(F('comment_count') - 1, 0),
+        modified=timezone.now(),
+    )
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def invalidate_comment_thread(sender, instance, **kwargs):
+    """Сбрасывает кэш ветки комментариев при любой записи комментария."""
+    bump_comments_version(instance.news_id)
+
+
+@receiver(post_save, sender=News)
+@receiver(post_delete, sender=News)
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def invalidate_pages(sender, instance, **kwargs):
+    """
+    Сбрасывает кэш страниц новости и ленты.
+
+    В ленте выводится число комментариев,
+    поэтому комментарий меняет и её.
+    """
+    news_pk = instance.pk if sender is News else instance.news_id
+    bump_page_tags('news', f'news:{news_pk}')
@@ -1,12 +1,32 @@
+from django.conf import settings
 from django.urls import path
 
 from news import views
 
 app_name = 'news'
 
+if settings.NEWS_ASYNC_VIEWS:
+    news_list = views.AsyncNewsList.as_view()
+    news_detail = views.AsyncNewsDetailView.as_view()
+else:
+    news_list = views.NewsList.as_view()
+    news_detail = views.NewsDetailView.as_view()
+
 urlpatterns = [
-    path('', views.NewsList.as_view(), name='home'),
-    path('news/<int:pk>/', views.NewsDetailView.as_view(), name='detail'),
+    path('', news_list, name='home'),
+    path('archive/', news_list, name='archive'),
+    path('search/', views.NewsSearch.as_view(), name='search'),
+    path('news/<int:pk>/', news_detail, name='detail'),
+    path(
+        'news/<int:pk>/comments/',
+        views.NewsComments.as_view(),
+        name='comments'
+    ),
+    path(
+        'news/<int:pk>/comments.json',
+        views.NewsCommentsFeed.as_view(),
+        name='comments_feed'
+    ),
     path(
         'delete_comment/<int:pk>/',
         views.CommentDelete.as_view(),
@@ -14,3 +34,11 @@ urlpatterns = [
     ),
     path('edit_comment/<int:pk>/', views.CommentUpdate.as_view(), name='edit'),
 ]
+
+# Поток событий бесконечен, поэтому нужен ASGI.
+if settings.NEWS_ASYNC_VIEWS:
+    urlpatterns.append(path(
+        'news/<int:pk>/comments/stream/',
+        views.NewsCommentsStream.as_view(),
+        name='comments_stream'
+    ))
@@ -1,49 +1,468 @@
+import asyncio
+import hashlib
+import json
+
+from asgiref.sync import sync_to_async
 from django.conf import settings
 from django.contrib.auth.mixins import LoginRequiredMixin
-from django.shortcuts import get_object_or_404
+from django.http import Http404, StreamingHttpResponse
+from django.shortcuts import get_object_or_404, render
+from django.template.loader import render_to_string
 from django.urls import reverse
+from django.utils import timezone
+from django.utils.decorators import method_decorator
+from django.utils.cache import get_conditional_response
+from django.utils.dateparse import parse_datetime
+from django.utils.functional import SimpleLazyObject
+from django.utils.http import http_date, quote_etag
 from django.views import generic
+from django.views.decorators.http import condition
 
+from .cache import (
+    aget_comment_thread, apply_comment_controls, get_comment_thread
+)
 from .forms import CommentForm
+from .live import (
+    CHANNEL, comment_data, comment_event, get_broker, publish_comment
+)
 from .models import Comment, News
+from .pagination import InvalidCursor, KeysetPaginator, encode_cursor
+from .search import search_news
+
+NEWS_ORDERING = ('-date', '-pk')
+
+
+def make_etag(*parts):
+    return hashlib.md5(':'.join(map(str, parts)).encode()).hexdigest()
+
+
+def news_list_etag(request, *args, **kwargs):
+    """
+    Значение ETag для страницы архива.
+
+    Строится по ключам и времени изменения новостей страницы,
+    поэтому меняется и при правке новости, и при сдвиге страницы.
+    Страница зависит от пользователя (шапка сайта), он тоже входит в ETag.
+    """
+    paginator = KeysetPaginator(
+        News.objects.only('pk', 'date', 'modified'),
+        NEWS_ORDERING,
+        settings.NEWS_COUNT_ON_HOME_PAGE,
+    )
+    try:
+        page = paginator.get_page(request.GET.get('cursor'))
+    except InvalidCursor:
+        return None
+    return news_page_etag(request.user, page)
+
+
+def news_page_etag(user, page):
+    return make_etag(user.pk, *(
+        f'{news.pk}-{news.modified.isoformat()}' for news in page
+    ))
+
+
+def news_detail_modified(request, pk):
+    """
+    Время изменения новости, включая изменения её комментариев.
+
+    Значение запоминается в запросе: по нему строятся
+    и Last-Modified, и ETag, а запрос к базе нужен один.
+    """
+    if not hasattr(request, 'news_modified'):
+        request.news_modified = News.objects.filter(pk=pk).values_list(
+            'modified', flat=True
+        ).first()
+    return request.news_modified
+
 
+def news_detail_etag(request, pk):
+    modified = news_detail_modified(request, pk)
+    if modified is None:
+        return None
+    return make_etag(pk, modified.isoformat(), request.user.pk)
 
+
+def check_conditions(request, etag, last_modified=None):
+    """
+    Проверяет условные заголовки для асинхронных представлений.
+
+    Декоратор condition вызывает функции ETag синхронно, поэтому
+    асинхронные представления вычисляют валидаторы сами. Возвращает
+    ответ 304 или 412 либо None, если нужен полный ответ.
+    """
+    return get_conditional_response(
+        request,
+        etag=quote_etag(etag),
+        last_modified=last_modified and int(last_modified.timestamp()),
+    )
+
+
+def set_validators(request, response, etag, last_modified=None):
+    """Добавляет ETag и Last-Modified к ответу, как декоратор condition."""
+    if request.method in ('GET', 'HEAD'):
+        if last_modified and not response.has_header('Last-Modified'):
+            response.headers['Last-Modified'] = http_date(
+                last_modified.timestamp()
+            )
+        response.headers.setdefault('ETag', quote_etag(etag))
+    return response
+
+
+@method_decorator(condition(etag_func=news_list_etag), name='get')
 class NewsList(generic.ListView):
-    """Список новостей."""
+    """
+    Архив новостей.
+
+    Главная страница — первая страница архива,
+    следующие страницы открываются по курсору.
+    """
     model = News
     template_name = 'news/home.html'
+    keyset_ordering = NEWS_ORDERING
 
     def get_queryset(self):
         """
-        Выводим только несколько последних новостей.
+        Выводим страницу новостей, следующую за курсором.
 
-        Их количество определяется в настройках проекта.
+        Размер страницы определяется в настройках проекта.
         """
-        return self.model.objects.prefetch_related(
-            'comment_set'
-        )[:settings.NEWS_COUNT_ON_HOME_PAGE]
+        paginator = KeysetPaginator(
+            self.model.objects.all(),
+            self.keyset_ordering,
+            settings.NEWS_COUNT_ON_HOME_PAGE,
+        )
+        try:
+            self.page = paginator.get_page(self.request.GET.get('cursor'))
+        except InvalidCursor:
+            raise Http404('Некорректный курсор страницы.')
+        return self.page.object_list
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['page'] = self.page
+        return context
+
+
+class AsyncNewsList(generic.View):
+    """
+    Асинхронный вариант NewsList для работы под ASGI.
+
+    Страница выбирается через асинхронный ORM одним запросом,
+    по нему же строится ETag. Шаблоны Django синхронные,
+    но к базе при отрисовке уже не обращаются.
+    """
+    template_name = 'news/home.html'
+
+    async def get(self, request, *args, **kwargs):
+        paginator = KeysetPaginator(
+            News.objects.all(),
+            NEWS_ORDERING,
+            settings.NEWS_COUNT_ON_HOME_PAGE,
+        )
+        try:
+            page = await paginator.aget_page(request.GET.get('cursor'))
+        except InvalidCursor:
+            raise Http404('Некорректный курсор страницы.')
+        request.user = await request.auser()
+        etag = news_page_etag(request.user, page)
+        response = check_conditions(request, etag)
+        if response is None:
+            response = render(request, self.template_name, {
+                'object_list': page.object_list,
+                'page': page,
+            })
+        return set_validators(request, response, etag)
+
+
+class NewsSearch(generic.TemplateView):
+    """Полнотекстовый поиск по новостям."""
+    template_name = 'news/search.html'
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        query = self.request.GET.get('q', '').strip()
+        try:
+            page = search_news(
+                query,
+                settings.SEARCH_RESULTS_ON_PAGE,
+                self.request.GET.get('cursor'),
+            )
+        except InvalidCursor:
+            raise Http404('Некорректный курсор поиска.')
+        context['query'] = query
+        context['page'] = page
+        return context
+
+
+class CommentPageMixin:
+    """Постраничная выдача комментариев новости по курсору."""
+    comments_ordering = ('created', 'pk')
+
+    def get_comments_page(self, news_pk, cursor=None):
+        paginator = KeysetPaginator(
+            Comment.objects.filter(news_id=news_pk).select_related('author'),
+            self.comments_ordering,
+            settings.COMMENTS_COUNT_ON_PAGE,
+        )
+        try:
+            return paginator.get_page(cursor)
+        except InvalidCursor:
+            raise Http404('Некорректный курсор комментариев.')
+
+    async def aget_comments_page(self, news_pk, cursor=None):
+        paginator = KeysetPaginator(
+            Comment.objects.filter(news_id=news_pk).select_related('author'),
+            self.comments_ordering,
+            settings.COMMENTS_COUNT_ON_PAGE,
+        )
+        try:
+            return await paginator.aget_page(cursor)
+        except InvalidCursor:
+            raise Http404('Некорректный курсор комментариев.')
+
+    def get_comments_context(self, news_pk, cursor=None):
+        """
+        Контекст с HTML страницы комментариев.
+
+        HTML берётся из кэша; сама страница комментариев
+        запрашивается из базы только при промахе.
+        """
+        comments = SimpleLazyObject(
+            lambda: self.get_comments_page(news_pk, cursor)
+        )
+
+        def render():
+            return render_to_string('news/includes/comments.html', {
+                'news_pk': news_pk,
+                'cursor': cursor,
+                'comments': comments,
+            })
 
+        html = get_comment_thread(news_pk, cursor, render)
+        return {
+            'news_pk': news_pk,
+            'comments': comments,
+            'comments_html': apply_comment_controls(html, self.request.user),
+        }
 
-class NewsDetail(generic.DetailView):
+
+class NewsDetail(CommentPageMixin, generic.DetailView):
     model = News
     template_name = 'news/detail.html'
 
     def get_object(self, queryset=None):
-        obj = get_object_or_404(
-            self.model.objects.prefetch_related('comment_set__author'),
-            pk=self.kwargs['pk']
-        )
-        return obj
+        return get_object_or_404(self.model, pk=self.kwargs['pk'])
 
     def get_context_data(self, **kwargs):
+        """На странице новости выводим первую страницу комментариев."""
         context = super().get_context_data(**kwargs)
+        context.update(self.get_comments_context(self.object.pk))
+        if self.request.user.is_authenticated:
+            context['form'] = CommentForm()
+        return context
+
+
+class AsyncNewsDetail(CommentPageMixin, generic.View):
+    """
+    Асинхронный вариант NewsDetail вместе с условным GET.
+
+    Страница комментариев запрашивается только при промахе кэша.
+    """
+    template_name = 'news/detail.html'
+
+    async def get(self, request, pk):
+        modified = await News.objects.filter(pk=pk).values_list(
+            'modified', flat=True
+        ).afirst()
+        if modified is None:
+            raise Http404('Новость не найдена.')
+        request.user = await request.auser()
+        etag = make_etag(pk, modified.isoformat(), request.user.pk)
+        response = check_conditions(request, etag, modified)
+        if response is None:
+            response = render(
+                request, self.template_name, await self.get_context_data(pk)
+            )
+        return set_validators(request, response, etag, modified)
+
+    async def get_context_data(self, pk):
+        news = await News.objects.aget(pk=pk)
+
+        async def render_thread():
+            return render_to_string('news/includes/comments.html', {
+                'news_pk': pk,
+                'cursor': None,
+                'comments': await self.aget_comments_page(pk),
+            })
+
+        html = await aget_comment_thread(pk, None, render_thread)
+        context = {
+            'object': news,
+            'news': news,
+            'news_pk': pk,
+            'comments_html': apply_comment_controls(html, self.request.user),
+        }
         if self.request.user.is_authenticated:
             context['form'] = CommentForm()
         return context
 
 
+class NewsComments(CommentPageMixin, generic.TemplateView):
+    """Фрагмент со следующей страницей комментариев новости."""
+    template_name = 'news/comments_fragment.html'
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        news = get_object_or_404(News.objects.only('pk'), pk=self.kwargs['pk'])
+        context.update(self.get_comments_context(
+            news.pk, self.request.GET.get('cursor')
+        ))
+        return context
+
+
+class NewsCommentsFeed(generic.View):
+    """
+    Комментарии новости в JSON для мобильного клиента.
+
+    Ответ передаётся потоком: комментарии читаются из базы пачками
+    через iterator(), поэтому память не зависит от размера ветки.
+    Параметр since оставляет комментарии новее указанного времени,
+    cursor — следующие за последним полученным; next_cursor ответа
+    передаётся в cursor следующего запроса.
+    """
+    ordering = ('created', 'pk')
+    chunk_size = 500
+
+    def get(self, request, pk):
+        news = get_object_or_404(News.objects.only('pk'), pk=pk)
+        paginator = KeysetPaginator(
+            Comment.objects.filter(news=news), self.ordering, None
+        )
+        cursor = request.GET.get('cursor')
+        try:
+            queryset = paginator.filter_after(cursor)
+        except InvalidCursor:
+            raise Http404('Некорректный курсор комментариев.')
+        since = request.GET.get('since')
+        if since:
+            queryset = queryset.filter(created__gt=self.parse_since(since))
+        rows = queryset.values_list(
+            'pk', 'created', 'text', 'author__username'
+        ).iterator(chunk_size=self.chunk_size)
+        return StreamingHttpResponse(
+            self.stream(news.pk, rows, cursor),
+            content_type='application/json',
+        )
+
+    def parse_since(self, value):
+        try:
+            since = parse_datetime(value)
+        except ValueError:
+            since = None
+        if since is None:
+            raise Http404('Некорректное время since.')
+        if timezone.is_naive(since):
+            since = timezone.make_aware(since)
+        return since
+
+    def stream(self, news_pk, rows, cursor):
+        yield f'{{"news": {news_pk}, "comments": ['
+        last = None
+        for pk, created, text, author in rows:
+            yield (',' if last else '') + json.dumps(
+                comment_data(pk, created, text, author), ensure_ascii=False
+            )
+            last = (created, pk)
+        next_cursor = encode_cursor(list(last)) if last else cursor
+        yield f'], "next_cursor": {json.dumps(next_cursor)}}}'
+
+
+class NewsCommentsStream(generic.View):
+    """
+    Новые комментарии новости в виде Server-Sent Events.
+
+    Представление асинхронное: ожидающее соединение — это корутина
+    с очередью в брокере (news.live), без потока и соединения с базой,
+    поэтому процесс ASGI держит тысячи таких клиентов. Идентификатор
+    события — курсор комментария: при переподключении браузер
+    присылает его в Last-Event-ID и получает пропущенное из базы.
+    Маршрут подключается только при NEWS_ASYNC_VIEWS: под WSGI
+    бесконечный поток занял бы поток сервера целиком.
+    """
+    ordering = ('created', 'pk')
+    retry = 3000
+    # Пропущенное досылается частями: после неполной досылки поток
+    # закрывается, и браузер запрашивает следующую часть,
+    # переподключившись с Last-Event-ID последнего события.
+    replay_limit = 500
+
+    async def get(self, request, pk):
+        if not await News.objects.filter(pk=pk).aexists():
+            raise Http404('Новость не найдена.')
+        response = StreamingHttpResponse(
+            self.stream(pk, request.headers.get('Last-Event-ID')),
+            content_type='text/event-stream',
+        )
+        response['Cache-Control'] = 'no-cache'
+        # Запрет буферизации ответа в nginx.
+        response['X-Accel-Buffering'] = 'no'
+        return response
+
+    async def stream(self, news_pk, last_event_id):
+        subscription = get_broker().subscribe(CHANNEL.format(pk=news_pk))
+        try:
+            yield f'retry: {self.retry}\n\n'
+            sent = set()
+            if last_event_id:
+                missed = await sync_to_async(self.missed)(
+                    news_pk, last_event_id
+                )
+                for event_id, event in missed[:self.replay_limit]:
+                    sent.add(event_id)
+                    yield event
+                if len(missed) > self.replay_limit:
+                    return
+            while True:
+                try:
+                    message = await asyncio.wait_for(
+                        subscription.get(), settings.NEWS_LIVE_KEEPALIVE
+                    )
+                except TimeoutError:
+                    yield ': keepalive\n\n'
+                    continue
+                if message is None:
+                    return
+                event_id, event = message
+                if event_id not in sent:
+                    yield event
+        finally:
+            subscription.close()
+
+    def missed(self, news_pk, cursor):
+        """
+        События о комментариях, созданных после события cursor.
+
+        Возвращает не больше replay_limit + 1 событий: по лишнему
+        видно, что досылка не закончена.
+        """
+        paginator = KeysetPaginator(
+            Comment.objects.filter(news_id=news_pk), self.ordering, None
+        )
+        try:
+            queryset = paginator.filter_after(cursor)
+        except InvalidCursor:
+            return []
+        return [
+            comment_event(*row) for row in queryset.values_list(
+                'pk', 'created', 'text', 'author__username'
+            )[:self.replay_limit + 1]
+        ]
+
+
 class NewsComment(
         LoginRequiredMixin,
+        CommentPageMixin,
         generic.detail.SingleObjectMixin,
         generic.FormView
 ):
@@ -60,15 +479,27 @@ class NewsComment(
         comment.news = self.object
         comment.author = self.request.user
         comment.save()
+        publish_comment(comment)
         return super().form_valid(form)
 
+    def get_context_data(self, **kwargs):
+        """При ошибке в форме страница новости выводится с комментариями."""
+        context = super().get_context_data(**kwargs)
+        context.update(self.get_comments_context(self.object.pk))
+        return context
+
     def get_success_url(self):
-        post = self.get_object()
-        return reverse('news:detail', kwargs={'pk': post.pk}) + '#comments'
+        return reverse(
+            'news:detail', kwargs={'pk': self.object.pk}
+        ) + '#comments'
 
 
 class NewsDetailView(generic.View):
 
+    @method_decorator(condition(
+        etag_func=news_detail_etag,
+        last_modified_func=news_detail_modified,
+    ))
     def get(self, request, *args, **kwargs):
         view = NewsDetail.as_view()
         return view(request, *args, **kwargs)
@@ -78,19 +509,37 @@ class NewsDetailView(generic.View):
         return view(request, *args, **kwargs)
 
 
+class AsyncNewsDetailView(generic.View):
+    """
+    Асинхронный вариант NewsDetailView.
+
+    Отправка комментария остаётся синхронной: она редкая,
+    а форма и проверка входа в систему работают с синхронным ORM.
+    """
+
+    async def get(self, request, *args, **kwargs):
+        view = AsyncNewsDetail.as_view()
+        return await view(request, *args, **kwargs)
+
+    async def post(self, request, *args, **kwargs):
+        view = sync_to_async(NewsComment.as_view())
+        return await view(request, *args, **kwargs)
+
+
 class CommentBase(LoginRequiredMixin):
     """Базовый класс для работы с комментариями."""
     model = Comment
 
     def get_success_url(self):
-        comment = self.get_object()
         return reverse(
-            'news:detail', kwargs={'pk': comment.news.pk}
+            'news:detail', kwargs={'pk': self.object.news_id}
         ) + '#comments'
 
     def get_queryset(self):
         """Пользователь может работать только со своими комментариями."""
-        return self.model.objects.filter(author=self.request.user)
+        return self.model.objects.filter(
+            author=self.request.user
+        ).select_related('news')
 
 
 class CommentUpdate(CommentBase, generic.UpdateView):
@@ -0,0 +1,232 @@
+import pickle
+import threading
+import time
+from collections import OrderedDict
+
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+from django.utils.module_loading import import_string
+
+GENERATION_KEY = 'twotier:generation'
+MISSING = object()
+
+# Локальные кэши процесса: экземпляры бэкенда создаются на каждый
+# поток, а данные у них общие, как у LocMemCache.
+_local_caches = {}
+_local_caches_lock = threading.Lock()
+
+
+class LocalLRU:
+    """
+    Ограниченный LRU-кэш процесса.
+
+    Значения хранятся сериализованными, размер записи — длина
+    её pickle; при превышении max_bytes или max_entries вытесняются
+    давно не читанные записи.
+    """
+
+    def __init__(self, max_bytes, max_entries):
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.max_item_bytes = max_bytes // 8
+        self.entries = OrderedDict()
+        self.size = 0
+        self.generation = None
+        self.checked_at = 0.0
+        self.lock = threading.Lock()
+        self.stats = dict.fromkeys(
+            ('hits', 'shared_hits', 'misses', 'evictions', 'invalidations'),
+            0,
+        )
+
+    def count(self, name):
+        with self.lock:
+            self.stats[name] += 1
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return MISSING
+            expires_at, data = entry
+            if expires_at < time.monotonic():
+                self._pop(key)
+                return MISSING
+            self.entries.move_to_end(key)
+        return pickle.loads(data)
+
+    def set(self, key, value, timeout):
+        data = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        with self.lock:
+            self._pop(key)
+            if len(data) > self.max_item_bytes or timeout <= 0:
+                return
+            self.entries[key] = (time.monotonic() + timeout, data)
+            self.size += len(data)
+            while (self.size > self.max_bytes
+                   or len(self.entries) > self.max_entries):
+                self._pop(next(iter(self.entries)))
+                self.stats['evictions'] += 1
+
+    def delete(self, key):
+        with self.lock:
+            self._pop(key)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.size = 0
+
+    def _pop(self, key):
+        entry = self.entries.pop(key, None)
+        if entry is not None:
+            self.size -= len(entry[1])
+
+
+class TwoTierCache(BaseCache):
+    """
+    Кэш из двух уровней: LRU в памяти процесса перед общим кэшем.
+
+    Общий уровень задаётся в OPTIONS['SHARED'] (по умолчанию файловый
+    кэш в LOCATION) и виден всем процессам. Локальный уровень хранит
+    прочитанные значения не дольше LOCAL_TIMEOUT секунд.
+
+    Значение, изменённое через set() в другом процессе, локальный
+    уровень не увидит до истечения LOCAL_TIMEOUT, поэтому изменяемые
+    ключи (версии, блокировки) должны начинаться с одного из
+    BYPASS_PREFIXES: такие ключи читаются только из общего уровня.
+    Остальные ключи должны быть неизменяемыми, например содержать
+    версию. delete(), incr() и clear() увеличивают общее поколение;
+    процесс сверяет его не чаще раза в GENERATION_CHECK_INTERVAL
+    секунд и при расхождении очищает свой локальный уровень.
+    """
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        options = params.get('OPTIONS', {})
+        shared = options.get('SHARED', {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': location,
+        })
+        self.shared = import_string(shared['BACKEND'])(
+            shared.get('LOCATION', location),
+            {key: value for key, value in shared.items()
+             if key not in ('BACKEND', 'LOCATION')},
+        )
+        self.bypass_prefixes = tuple(options.get('BYPASS_PREFIXES', ()))
+        self.local_timeout = options.get('LOCAL_TIMEOUT', 60)
+        self.check_interval = options.get('GENERATION_CHECK_INTERVAL', 1.0)
+        with _local_caches_lock:
+            self.local = _local_caches.setdefault(str(location), LocalLRU(
+                options.get('LOCAL_MAX_BYTES', 16 * 1024 * 1024),
+                options.get('LOCAL_MAX_ENTRIES', 10000),
+            ))
+
+    def stats(self):
+        """Счётчики локального уровня этого процесса."""
+        with self.local.lock:
+            return dict(
+                self.local.stats,
+                entries=len(self.local.entries),
+                bytes=self.local.size,
+            )
+
+    def is_bypassed(self, key):
+        return key.startswith(self.bypass_prefixes)
+
+    def local_key(self, key, version):
+        return self.make_and_validate_key(key, version=version)
+
+    def local_timeout_for(self, timeout):
+        timeout = self.get_backend_timeout(timeout)
+        if timeout is None:
+            return self.local_timeout
+        return min(timeout - time.time(), self.local_timeout)
+
+    def check_generation(self):
+        """Очищает локальный уровень, если поколение сменилось."""
+        local = self.local
+        now = time.monotonic()
+        if now - local.checked_at < self.check_interval:
+            return
+        generation = self.shared.get(GENERATION_KEY)
+        if generation is None:
+            self.shared.add(GENERATION_KEY, time.time_ns(), None)
+            generation = self.shared.get(GENERATION_KEY)
+        local.checked_at = now
+        if generation != local.generation:
+            if local.generation is not None:
+                local.count('invalidations')
+            local.clear()
+            local.generation = generation
+
+    def bump_generation(self):
+        try:
+            self.shared.incr(GENERATION_KEY)
+        except ValueError:
+            self.shared.set(GENERATION_KEY, time.time_ns(), None)
+
+    def get(self, key, default=None, version=None):
+        if self.is_bypassed(key):
+            return self.shared.get(key, default, version=version)
+        self.check_generation()
+        local_key = self.local_key(key, version)
+        value = self.local.get(local_key)
+        if value is not MISSING:
+            self.local.count('hits')
+            return value
+        value = self.shared.get(key, MISSING, version=version)
+        if value is MISSING:
+            self.local.count('misses')
+            return default
+        self.local.count('shared_hits')
+        self.local.set(local_key, value, self.local_timeout)
+        return value
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self.shared.set(key, value, timeout, version=version)
+        if not self.is_bypassed(key):
+            self.local.set(
+                self.local_key(key, version),
+                value,
+                self.local_timeout_for(timeout),
+            )
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        return self.shared.add(key, value, timeout, version=version)
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        return self.shared.touch(key, timeout, version=version)
+
+    def has_key(self, key, version=None):
+        return self.get(key, MISSING, version=version) is not MISSING
+
+    def delete(self, key, version=None):
+        deleted = self.shared.delete(key, version=version)
+        if not self.is_bypassed(key):
+            self.local.delete(self.local_key(key, version))
+            self.bump_generation()
+        return deleted
+
+    def delete_many(self, keys, version=None):
+        keys = list(keys)
+        self.shared.delete_many(keys, version=version)
+        local_keys = [key for key in keys if not self.is_bypassed(key)]
+        for key in local_keys:
+            self.local.delete(self.local_key(key, version))
+        if local_keys:
+            self.bump_generation()
+
+    def incr(self, key, delta=1, version=None):
+        value = self.shared.incr(key, delta, version=version)
+        if not self.is_bypassed(key):
+            self.local.delete(self.local_key(key, version))
+            self.bump_generation()
+        return value
+
+    def clear(self):
+        self.shared.clear()
+        self.local.clear()
+        self.bump_generation()
+
+    def close(self, **kwargs):
+        self.shared.close(**kwargs)
@@ -0,0 +1,231 @@
+import json
+import logging
+import re
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.template.base import Template
+
+# Строка EXPLAIN QUERY PLAN SQLite для полного просмотра таблицы:
+# «SCAN table», до SQLite 3.36 — «SCAN TABLE table». Просмотр
+# по индексу выглядит как «SCAN table USING INDEX ...».
+FULL_SCAN = re.compile(r'^SCAN (?:TABLE )?(\w+)$')
+
+slow_request_logger = logging.getLogger('slow_requests')
+
+
+_active_stats = ContextVar('query_stats', default=())
+
+
+def _record_query(execute, sql, params, many, context):
+    active = _active_stats.get()
+    if not active:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        duration = time.perf_counter() - start
+        for stats in active:
+            stats.queries.append((sql, duration))
+
+
+def install_query_wrapper(connection, **kwargs):
+    """
+    Подключает сбор запросов к соединению с базой.
+
+    Соединения у каждого потока свои: асинхронные запросы к ORM
+    выполняются в потоках sync_to_async. Поэтому обёртка ставится
+    на каждое новое соединение, а запросы, к которым она относится,
+    определяются по ContextVar, который asgiref передаёт в эти потоки.
+    """
+    if _record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_record_query)
+
+
+connection_created.connect(install_query_wrapper)
+
+
+class QueryStats:
+    """Запросы к базе данных, выполненные за время обработки запроса."""
+
+    def __init__(self):
+        self.queries = []
+
+    @property
+    def count(self):
+        return len(self.queries)
+
+    @property
+    def duration(self):
+        """Суммарное время запросов в секундах."""
+        return sum(duration for _, duration in self.queries)
+
+    @contextmanager
+    def capture(self):
+        """
+        Собирает запросы текущего контекста.
+
+        Сюда входят и запросы из потоков sync_to_async; вложенные
+        capture() получают одни и те же запросы.
+        """
+        for connection in connections.all(initialized_only=True):
+            install_query_wrapper(connection)
+        token = _active_stats.set((*_active_stats.get(), self))
+        try:
+            yield self
+        finally:
+            _active_stats.reset(token)
+
+
+_active_timers = ContextVar('render_timers', default=())
+_original_render = Template.render
+
+
+def _timed_render(self, context):
+    timers = _active_timers.get()
+    if not timers:
+        return _original_render(self, context)
+    for timer in timers:
+        timer.depth += 1
+    start = time.perf_counter()
+    try:
+        return _original_render(self, context)
+    finally:
+        duration = time.perf_counter() - start
+        for timer in timers:
+            timer.depth -= 1
+            if not timer.depth:
+                timer.duration += duration
+
+
+class RenderTimer:
+    """
+    Время отрисовки шаблонов за время обработки запроса.
+
+    Template.render подменяется один раз при первом использовании;
+    вне capture() подмена только читает ContextVar. Вложенные шаблоны
+    (extends, include) входят во время внешнего. Вложенные capture(),
+    например профилировщика внутри QueryStatsMiddleware, учитывают
+    одни и те же шаблоны.
+    """
+
+    def __init__(self):
+        self.duration = 0.0
+        self.depth = 0
+
+    @contextmanager
+    def capture(self):
+        Template.render = _timed_render
+        token = _active_timers.set((*_active_timers.get(), self))
+        try:
+            yield self
+        finally:
+            _active_timers.reset(token)
+
+
+class QueryStatsMiddleware:
+    """
+    Считает запросы к базе и время обработки каждого запроса.
+
+    Результат выводится в заголовке Server-Timing и сохраняется
+    в request.query_stats и response.query_stats: по нему тесты
+    проверяют бюджет запросов для каждого URL. Время отрисовки
+    шаблонов сохраняется в request.render_timer.
+
+    Запросы дольше SLOW_REQUEST_THRESHOLD секунд записываются
+    в журнал slow_requests одной строкой JSON; для быстрых запросов
+    всё сводится к одному сравнению.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        start = time.perf_counter()
+        request.query_stats = QueryStats()
+        request.render_timer = RenderTimer()
+        with request.query_stats.capture(), request.render_timer.capture():
+            response = self.get_response(request)
+        return self.process_response(request, response, start)
+
+    async def __acall__(self, request):
+        start = time.perf_counter()
+        request.query_stats = QueryStats()
+        request.render_timer = RenderTimer()
+        with request.query_stats.capture(), request.render_timer.capture():
+            response = await self.get_response(request)
+        return self.process_response(request, response, start)
+
+    def process_response(self, request, response, start):
+        stats = request.query_stats
+        total = time.perf_counter() - start
+        response.query_stats = stats
+        templates = request.render_timer.duration
+        response['Server-Timing'] = (
+            f'db;dur={stats.duration * 1000:.2f};'
+            f'desc="{stats.count} queries", '
+            f'tpl;dur={templates * 1000:.2f}, '
+            f'total;dur={total * 1000:.2f}'
+        )
+        if total >= settings.SLOW_REQUEST_THRESHOLD:
+            log_slow_request(request, response, total)
+        return response
+
+
+def log_slow_request(request, response, total):
+    """Пишет медленный запрос в журнал одной строкой JSON."""
+    stats = request.query_stats
+    match = request.resolver_match
+    slowest = sorted(
+        stats.queries, key=lambda query: query[1], reverse=True
+    )[:settings.SLOW_REQUEST_QUERIES]
+    slow_request_logger.warning(json.dumps({
+        'view': match._func_path if match else None,
+        'url_name': match.view_name if match else None,
+        'method': request.method,
+        'path': request.path,
+        'status': response.status_code,
+        'total_ms': round(total * 1000, 2),
+        'db_ms': round(stats.duration * 1000, 2),
+        'queries': stats.count,
+        'slowest_queries': [
+            {'sql': sql, 'ms': round(duration * 1000, 2)}
+            for sql, duration in slowest
+        ],
+        'templates_ms': round(request.render_timer.duration * 1000, 2),
+    }, ensure_ascii=False))
+
+
+def find_full_scans(queries, allowed_tables=(), using='default'):
+    """
+    Возвращает запросы, которые SQLite выполняет полным просмотром таблицы.
+
+    queries — SQL с подставленными параметрами, как в
+    CaptureQueriesContext.captured_queries. Результат — список пар
+    (SQL, строка плана); таблицы из allowed_tables пропускаются.
+    """
+    connection = connections[using]
+    scans = []
+    for sql in queries:
+        if not sql.lstrip().upper().startswith('SELECT'):
+            continue
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+            plan = cursor.fetchall()
+        for row in plan:
+            match = FULL_SCAN.match(row[-1])
+            if match and match.group(1) not in allowed_tables:
+                scans.append((sql, row[-1]))
+    return scans
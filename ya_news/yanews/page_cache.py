@@ -0,0 +1,208 @@
+import asyncio
+import hashlib
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import DisallowedHost
+from django.db import transaction
+from django.http import HttpResponse
+from django.urls import Resolver404, resolve
+from django.utils.cache import get_conditional_response
+from django.utils.http import parse_http_date_safe
+from django.utils.translation import get_language_from_request
+
+# Версии и блокировки читаются мимо локального кэша процесса
+# (см. cache_backends.TwoTierCache), поэтому у них свои префиксы.
+TAG_VERSION_KEY = 'version:page:{tag}'
+PAGE_KEY = 'page:{view}:{host}:{language}:{path}:{versions}'
+LOCK_PREFIX = 'lock:'
+# Шаг ожидания страницы, которую строит другой запрос.
+WAIT_INTERVAL = 0.02
+
+
+def get_tag_versions(tags):
+    """
+    Возвращает текущие версии тегов страниц.
+
+    Как и у ветки комментариев, начальная версия берётся из часов,
+    чтобы после вытеснения ключа старые страницы не ожили.
+    """
+    keys = [TAG_VERSION_KEY.format(tag=tag) for tag in tags]
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            cache.add(key, time.time_ns(), None)
+            versions[key] = cache.get(key)
+    return [versions[key] for key in keys]
+
+
+async def aget_tag_versions(tags):
+    """Асинхронный вариант get_tag_versions."""
+    keys = [TAG_VERSION_KEY.format(tag=tag) for tag in tags]
+    versions = await cache.aget_many(keys)
+    for key in keys:
+        if key not in versions:
+            await cache.aadd(key, time.time_ns(), None)
+            versions[key] = await cache.aget(key)
+    return [versions[key] for key in keys]
+
+
+def bump_page_tags(*tags):
+    """Делает устаревшими страницы с этими тегами после фиксации транзакции."""
+    transaction.on_commit(lambda: _bump(tags))
+
+
+def _bump(tags):
+    for tag in tags:
+        key = TAG_VERSION_KEY.format(tag=tag)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, time.time_ns(), None)
+
+
+def serialize(response):
+    return (response.status_code, list(response.items()), response.content)
+
+
+def deserialize(data):
+    status, headers, content = data
+    response = HttpResponse(content, status=status)
+    for header, value in headers:
+        response.headers[header] = value
+    return response
+
+
+class AnonymousPageCacheMiddleware:
+    """
+    Кэш целых страниц для анонимных посетителей.
+
+    Кэшируются GET-запросы без сессии к представлениям из настройки
+    PAGE_CACHE_VIEWS: имя URL → теги, например 'news:{pk}', где
+    {pk} берётся из аргументов URL. Ключ страницы включает хост, язык,
+    путь с параметрами и версии тегов; bump_page_tags() сбрасывает
+    страницы с тегом. Ответы, которые ставят cookie (в том числе
+    токен CSRF для формы), не кэшируются.
+
+    При промахе страницу строит только запрос, взявший блокировку;
+    остальные ждут её появления в кэше до PAGE_CACHE_LOCK_TIMEOUT
+    секунд и только потом строят страницу сами.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        page = self.get_page(request)
+        if page is None:
+            return self.get_response(request)
+        view, tags = page
+        key = self.make_key(request, view, get_tag_versions(tags))
+        data = cache.get(key)
+        if data is None and not cache.add(
+            LOCK_PREFIX + key, 1, settings.PAGE_CACHE_LOCK_TIMEOUT
+        ):
+            deadline = time.monotonic() + settings.PAGE_CACHE_LOCK_TIMEOUT
+            while data is None and time.monotonic() < deadline:
+                time.sleep(WAIT_INTERVAL)
+                data = cache.get(key)
+            if data is None:
+                return self.get_response(request)
+        if data is not None:
+            return self.cached_response(request, data)
+        try:
+            response = self.get_response(request)
+            if self.is_cacheable(response):
+                cache.set(
+                    key, serialize(response), settings.PAGE_CACHE_TIMEOUT
+                )
+        finally:
+            cache.delete(LOCK_PREFIX + key)
+        return response
+
+    async def __acall__(self, request):
+        page = self.get_page(request)
+        if page is None:
+            return await self.get_response(request)
+        view, tags = page
+        key = self.make_key(request, view, await aget_tag_versions(tags))
+        data = await cache.aget(key)
+        if data is None and not await cache.aadd(
+            LOCK_PREFIX + key, 1, settings.PAGE_CACHE_LOCK_TIMEOUT
+        ):
+            deadline = time.monotonic() + settings.PAGE_CACHE_LOCK_TIMEOUT
+            while data is None and time.monotonic() < deadline:
+                await asyncio.sleep(WAIT_INTERVAL)
+                data = await cache.aget(key)
+            if data is None:
+                return await self.get_response(request)
+        if data is not None:
+            return self.cached_response(request, data)
+        try:
+            response = await self.get_response(request)
+            if self.is_cacheable(response):
+                await cache.aset(
+                    key, serialize(response), settings.PAGE_CACHE_TIMEOUT
+                )
+        finally:
+            await cache.adelete(LOCK_PREFIX + key)
+        return response
+
+    def get_page(self, request):
+        """Имя представления и теги страницы либо None, если кэш не нужен."""
+        if request.method not in ('GET', 'HEAD'):
+            return None
+        if settings.SESSION_COOKIE_NAME in request.COOKIES:
+            return None
+        if 'messages' in request.COOKIES:
+            return None
+        try:
+            request.get_host()
+        except DisallowedHost:
+            return None
+        try:
+            match = resolve(request.path_info)
+        except Resolver404:
+            return None
+        tags = settings.PAGE_CACHE_VIEWS.get(match.view_name)
+        if tags is None:
+            return None
+        return match.view_name, [tag.format(**match.kwargs) for tag in tags]
+
+    def make_key(self, request, view, versions):
+        path = hashlib.md5(request.get_full_path().encode()).hexdigest()
+        return PAGE_KEY.format(
+            view=view,
+            host=request.get_host(),
+            language=get_language_from_request(request),
+            path=path,
+            versions='.'.join(map(str, versions)),
+        )
+
+    def is_cacheable(self, response):
+        return (
+            response.status_code == 200
+            and not response.streaming
+            and not response.cookies
+            and 'private' not in response.get('Cache-Control', '')
+        )
+
+    def cached_response(self, request, data):
+        """Ответ из кэша с учётом If-None-Match и If-Modified-Since."""
+        response = deserialize(data)
+        return get_conditional_response(
+            request,
+            etag=response.get('ETag'),
+            last_modified=parse_http_date_safe(
+                response.get('Last-Modified')
+            ),
+            response=response,
+        ) or response
@@ -0,0 +1,128 @@
+import cProfile
+import json
+import random
+import time
+import uuid
+from contextlib import ExitStack, contextmanager
+from pathlib import Path
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core import signing
+from django.urls import Resolver404, resolve
+
+from .instrumentation import QueryStats, RenderTimer
+
+HEADER = 'HTTP_X_PROFILE'
+SALT = 'profiling'
+
+
+def make_token():
+    """Подписанное значение заголовка X-Profile."""
+    return signing.TimestampSigner(salt=SALT).sign('profile')
+
+
+def is_valid_token(token):
+    try:
+        signing.TimestampSigner(salt=SALT).unsign(
+            token, max_age=settings.PROFILE_TOKEN_MAX_AGE
+        )
+    except signing.BadSignature:
+        return False
+    return True
+
+
+class ProfilingMiddleware:
+    """
+    Профилирование запроса по требованию.
+
+    Запрос профилируется, если в нём есть заголовок X-Profile
+    с подписью из make_token() (команда profile_token) или если он
+    попал в долю PROFILE_SAMPLE_RATE. В каталог PROFILE_DIR пишутся
+    профиль cProfile (.prof) и описание запроса (.json): представление,
+    время, SQL-запросы с длительностью и время отрисовки шаблонов.
+    Сводку строит команда profile_report.
+
+    Под ASGI профилировщик видит и чужие задачи, выполнявшиеся
+    в том же потоке, поэтому профиль там приблизительный.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not self.should_profile(request):
+            return self.get_response(request)
+        with self.profile(request) as state:
+            state['response'] = self.get_response(request)
+        return state['response']
+
+    async def __acall__(self, request):
+        if not self.should_profile(request):
+            return await self.get_response(request)
+        with self.profile(request) as state:
+            state['response'] = await self.get_response(request)
+        return state['response']
+
+    def should_profile(self, request):
+        token = request.META.get(HEADER)
+        if token is not None:
+            return is_valid_token(token)
+        rate = settings.PROFILE_SAMPLE_RATE
+        return rate > 0 and random.random() < rate
+
+    @contextmanager
+    def profile(self, request):
+        profiler = cProfile.Profile()
+        queries = QueryStats()
+        timer = RenderTimer()
+        state = {}
+        start = time.perf_counter()
+        with ExitStack() as stack:
+            stack.enter_context(queries.capture())
+            stack.enter_context(timer.capture())
+            profiler.enable()
+            try:
+                yield state
+            finally:
+                profiler.disable()
+        total = time.perf_counter() - start
+        self.dump(request, state['response'], profiler, {
+            'total': total,
+            'db': queries.duration,
+            'templates': timer.duration,
+            'queries': queries.queries,
+        })
+
+    def dump(self, request, response, profiler, timings):
+        # Ответ из кэша страниц отдаётся до разбора URL обработчиком.
+        match = request.resolver_match
+        if match is None:
+            try:
+                match = resolve(request.path_info)
+            except Resolver404:
+                pass
+        view = match.view_name if match else None
+        directory = Path(settings.PROFILE_DIR)
+        directory.mkdir(parents=True, exist_ok=True)
+        name = f'{time.strftime("%Y%m%d-%H%M%S")}-{uuid.uuid4().hex[:8]}'
+        profiler.dump_stats(directory / f'{name}.prof')
+        (directory / f'{name}.json').write_text(json.dumps({
+            'view': view or request.path_info,
+            'path': request.get_full_path(),
+            'method': request.method,
+            'status': response.status_code,
+            'total': timings['total'],
+            'db': timings['db'],
+            'templates': timings['templates'],
+            'queries': [
+                {'sql': sql, 'duration': duration}
+                for sql, duration in timings['queries']
+            ],
+        }, ensure_ascii=False, indent=2))
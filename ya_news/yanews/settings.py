@@ -1,3 +1,4 @@
+import os
 from pathlib import Path
 
 from django.urls import reverse_lazy
@@ -21,7 +22,10 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'yanews.instrumentation.QueryStatsMiddleware',
+    'yanews.profiling.ProfilingMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'yanews.page_cache.AnonymousPageCacheMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -51,10 +55,53 @@ TEMPLATES = [
 WSGI_APPLICATION = 'yanews.wsgi.application'
 
 
+# WAL позволяет читать во время записи, busy_timeout заставляет ждать
+# блокировку вместо ошибки «database is locked». Транзакции IMMEDIATE
+# берут блокировку записи сразу: иначе две транзакции, начавшие
+# с чтения, не могут повысить блокировку и ожидание не помогает.
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': 5000,
+    'mmap_size': 128 * 1024 * 1024,
+    'cache_size': -32 * 1024,
+}
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        'CONN_MAX_AGE': None,
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {
+            'init_command': ';'.join(
+                f'PRAGMA {name}={value}'
+                for name, value in SQLITE_PRAGMAS.items()
+            ),
+            'transaction_mode': 'IMMEDIATE',
+        },
+    }
+}
+
+# Локальный LRU процесса перед общим файловым кэшем. Ключи версий
+# и блокировок меняются на месте и читаются только из общего кэша.
+CACHES = {
+    'default': {
+        'BACKEND': 'yanews.cache_backends.TwoTierCache',
+        'LOCATION': BASE_DIR / '.cache',
+        'OPTIONS': {
+            'BYPASS_PREFIXES': ('version:', 'lock:'),
+            'LOCAL_MAX_BYTES': 32 * 1024 * 1024,
+            'LOCAL_MAX_ENTRIES': 10000,
+            'LOCAL_TIMEOUT': 60,
+            'GENERATION_CHECK_INTERVAL': 1.0,
+            'SHARED': {
+                'BACKEND':
+                    'django.core.cache.backends.filebased.FileBasedCache',
+                'LOCATION': BASE_DIR / '.cache',
+                'OPTIONS': {'MAX_ENTRIES': 100000},
+            },
+        },
     }
 }
 
@@ -80,3 +127,58 @@ LOGIN_URL = reverse_lazy('users:login')
 LOGIN_REDIRECT_URL = reverse_lazy('news:home')
 
 NEWS_COUNT_ON_HOME_PAGE = 10
+COMMENTS_COUNT_ON_PAGE = 50
+SEARCH_RESULTS_ON_PAGE = 20
+COMMENT_THREAD_CACHE_TIMEOUT = 60 * 60
+# Страницы для анонимных посетителей: имя URL → теги для сброса кэша.
+PAGE_CACHE_VIEWS = {
+    'news:home': ('news',),
+    'news:detail': ('news:{pk}',),
+}
+PAGE_CACHE_TIMEOUT = 60 * 5
+PAGE_CACHE_LOCK_TIMEOUT = 5
+# Асинхронные представления ленты и новости и поток новых
+# комментариев; включаются в asgi.py.
+NEWS_ASYNC_VIEWS = os.getenv('NEWS_ASYNC_VIEWS', 'False') == 'True'
+# Брокер событий о новых комментариях: LocalBroker рассылает их
+# внутри процесса, CacheBroker — всем процессам через общий кэш
+# с нумерацией событий в базе.
+NEWS_LIVE_BROKER = 'news.live.LocalBroker'
+# Комментарий в потоке событий раз в столько секунд не даёт прокси
+# закрыть тихое соединение.
+NEWS_LIVE_KEEPALIVE = 15
+NEWS_LIVE_QUEUE_SIZE = 100
+
+BAD_WORDS_FILE = BASE_DIR / 'news' / 'bad_words.txt'
+
+# Профилирование по требованию: заголовок X-Profile (команда
+# profile_token) или доля случайных запросов.
+PROFILE_DIR = BASE_DIR / 'profiles'
+PROFILE_SAMPLE_RATE = 0
+PROFILE_TOKEN_MAX_AGE = 60 * 60
+
+# Запросы дольше порога (в секундах) пишутся в журнал slow_requests
+# одной строкой JSON вместе с самыми медленными SQL-запросами.
+SLOW_REQUEST_THRESHOLD = 0.5
+SLOW_REQUEST_QUERIES = 5
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'json_line': {'format': '%(message)s'},
+    },
+    'handlers': {
+        'slow_requests': {
+            'class': 'logging.StreamHandler',
+            'formatter': 'json_line',
+        },
+    },
+    'loggers': {
+        'slow_requests': {
+            'handlers': ['slow_requests'],
+            'level': 'WARNING',
+            'propagate': False,
+        },
+    },
+}
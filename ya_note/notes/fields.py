@@ -0,0 +1,104 @@
+import zlib
+
+from django.db import models
+from django.db.models.query_utils import DeferredAttribute
+
+DEFAULT_THRESHOLD = 4096
+DEFAULT_LEVEL = 6
+
+
+class Compressed(bytes):
+    """Сжатый текст, прочитанный из базы и ещё не распакованный."""
+
+
+def compress_text(value, threshold=DEFAULT_THRESHOLD, level=DEFAULT_LEVEL):
+    """
+    Сжимает текст не короче threshold байт.
+
+    Возвращает bytes, если сжатие уменьшило размер, иначе сам текст.
+    """
+    data = value.encode()
+    if len(data) < threshold:
+        return value
+    compressed = zlib.compress(data, level)
+    return compressed if len(compressed) < len(data) else value
+
+
+def decompress_text(value):
+    if isinstance(value, bytes):
+        return zlib.decompress(value).decode()
+    return value
+
+
+class CompressedTextDescriptor(DeferredAttribute):
+    """
+    Распаковывает текст при первом обращении и запоминает результат.
+
+    Дескриптор определяет __set__, чтобы чтение атрибута проходило
+    через __get__, даже когда значение уже лежит в __dict__ модели.
+    """
+
+    def __get__(self, instance, cls=None):
+        value = super().__get__(instance, cls)
+        if isinstance(value, Compressed):
+            value = decompress_text(value)
+            instance.__dict__[self.field.attname] = value
+        return value
+
+    def __set__(self, instance, value):
+        instance.__dict__[self.field.attname] = value
+
+
+class CompressedTextField(models.TextField):
+    """
+    Текстовое поле, которое хранит длинные значения сжатыми zlib.
+
+    Текст от threshold байт в UTF-8 записывается в ту же колонку
+    как BLOB: SQLite хранит значение с типом, который ему передали.
+    Короткий и плохо сжимаемый текст хранится как есть, поэтому
+    поле читает старые строки без преобразования. Из базы значение
+    приходит сжатым и распаковывается при первом обращении
+    к атрибуту модели, а если к нему не обращались, при сохранении
+    записывается обратно без пересжатия.
+
+    values() и values_list() возвращают такие значения как bytes,
+    а поиск по содержимому (filter(text=...), icontains) работает
+    только для несжатых строк.
+    """
+    descriptor_class = CompressedTextDescriptor
+
+    def __init__(self, *args, threshold=DEFAULT_THRESHOLD,
+                 level=DEFAULT_LEVEL, **kwargs):
+        self.threshold = threshold
+        self.level = level
+        super().__init__(*args, **kwargs)
+
+    def deconstruct(self):
+        name, path, args, kwargs = super().deconstruct()
+        if self.threshold != DEFAULT_THRESHOLD:
+            kwargs['threshold'] = self.threshold
+        if self.level != DEFAULT_LEVEL:
+            kwargs['level'] = self.level
+        return name, path, args, kwargs
+
+    def from_db_value(self, value, expression, connection):
+        if isinstance(value, bytes):
+            return Compressed(value)
+        return value
+
+    def to_python(self, value):
+        return super().to_python(decompress_text(value))
+
+    def pre_save(self, model_instance, add):
+        value = model_instance.__dict__.get(self.attname)
+        if isinstance(value, Compressed):
+            return value
+        return super().pre_save(model_instance, add)
+
+    def get_prep_value(self, value):
+        if isinstance(value, Compressed):
+            return bytes(value)
+        value = super().get_prep_value(value)
+        if value is None:
+            return value
+        return compress_text(value, self.threshold, self.level)
@@ -0,0 +1,101 @@
+import random
+from itertools import accumulate
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from notes.models import Note
+
+User = get_user_model()
+
+WORDS = (
+    'купить молоко хлеб позвонить маме встреча работа отчёт план идея '
+    'книга фильм список дела проект задача код отпуск билеты врач '
+    'спорт бег зал рецепт ужин подарок день рождения письмо счёт'
+).split()
+
+
+def zipf_weights(size, skew):
+    """Накопленные веса закона Ципфа: первый элемент самый частый."""
+    return list(accumulate(1 / rank ** skew for rank in range(1, size + 1)))
+
+
+def make_text(rng, min_words, max_words):
+    return ' '.join(rng.choices(WORDS, k=rng.randint(min_words, max_words)))
+
+
+class Command(BaseCommand):
+    help = (
+        'Заполняет базу синтетическими пользователями и заметками '
+        'для нагрузочных проверок. Заметки распределены по авторам '
+        'по закону Ципфа: у немногих активных авторов их тысячи. '
+        'Одинаковый --seed даёт одинаковые данные.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=10000)
+        parser.add_argument('--notes', type=int, default=1000000)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument(
+            '--skew', type=float, default=1.1,
+            help='Показатель закона Ципфа для авторов.',
+        )
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        self.batch_size = options['batch_size']
+        author_ids = self.create_users(options['users'])
+        self.create_notes(rng, options['notes'], author_ids, options['skew'])
+        # bulk_create не вызывает сигналы, поэтому индекс строится заново.
+        call_command(
+            'rebuild_notes_index',
+            batch_size=self.batch_size,
+            stdout=self.stdout,
+        )
+        self.stdout.write(self.style.SUCCESS('Данные созданы.'))
+
+    def create_users(self, count):
+        # Хэш одинаковый у всех: хэшировать миллион паролей слишком долго.
+        password = make_password(None)
+        usernames = [f'user{index}' for index in range(count)]
+        ids = {}
+        for start in range(0, count, self.batch_size):
+            batch = usernames[start:start + self.batch_size]
+            with transaction.atomic():
+                User.objects.bulk_create(
+                    (User(username=name, password=password) for name in batch),
+                    ignore_conflicts=True,
+                )
+            ids.update(User.objects.filter(
+                username__in=batch
+            ).values_list('username', 'id'))
+        self.stdout.write(f'Пользователей: {len(ids)}')
+        return [ids[username] for username in usernames]
+
+    def create_notes(self, rng, count, author_ids, skew):
+        if not author_ids:
+            return
+        weights = zipf_weights(len(author_ids), skew)
+        # Slug строится из номера, поэтому повторный запуск не конфликтует.
+        offset = Note.objects.count()
+        created = 0
+        while created < count:
+            size = min(self.batch_size, count - created)
+            authors = rng.choices(author_ids, cum_weights=weights, k=size)
+            notes = [
+                Note(
+                    title=make_text(rng, 2, 6).capitalize(),
+                    text=make_text(rng, 5, 150),
+                    slug=f'note-{offset + created + index}',
+                    author_id=author_id,
+                )
+                for index, author_id in enumerate(authors)
+            ]
+            with transaction.atomic():
+                Note.objects.bulk_create(notes)
+            created += size
+            self.stdout.write(f'Заметок: {created}')
@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+
+from notes.models import Note
+from notes.search import rebuild_index
+
+
+class Command(BaseCommand):
+    help = 'Заново строит полнотекстовый индекс заметок пачками.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Количество заметок, индексируемых в одной транзакции.',
+        )
+
+    def handle(self, *args, **options):
+        indexed = rebuild_index(
+            Note.objects.all(),
+            options['batch_size'],
+            lambda count: self.stdout.write(
+                f'Проиндексировано заметок: {count}'
+            ),
+        )
+        self.stdout.write(
+            self.style.SUCCESS(f'Индекс перестроен, заметок: {indexed}')
+        )
@@ -0,0 +1,42 @@
+from django.db import migrations
+
+# Полнотекстовый индекс FTS5 по заметкам. В отличие от индекса новостей
+# он хранит свою копию текста и обновляется из приложения (notes.signals),
+# а не триггерами: так индекс не зависит от формата хранения текста
+# в notes_note. Колонка owner содержит id автора и ограничивает поиск
+# заметками одного пользователя.
+CREATE_SQL = (
+    """
+    CREATE VIRTUAL TABLE notes_note_fts USING fts5(
+        title, text, owner,
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    INSERT INTO notes_note_fts(rowid, title, text, owner)
+    SELECT id, title, text, author_id FROM notes_note
+    """,
+)
+DROP_SQL = (
+    'DROP TABLE IF EXISTS notes_note_fts',
+)
+
+
+def run_sql(statements):
+    def run(apps, schema_editor):
+        if schema_editor.connection.vendor != 'sqlite':
+            return
+        for statement in statements:
+            schema_editor.execute(statement)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notes', '0002_note_author_id_idx'),
+    ]
+
+    operations = [
+        migrations.RunPython(run_sql(CREATE_SQL), run_sql(DROP_SQL)),
+    ]
@@ -0,0 +1,74 @@
+from django.db import migrations, transaction
+
+import notes.fields
+
+# Пачка строк, сжимаемых в одной транзакции.
+BATCH_SIZE = 500
+
+SELECT_SQL = (
+    'SELECT id, text FROM notes_note WHERE id > %s ORDER BY id LIMIT %s'
+)
+UPDATE_SQL = 'UPDATE notes_note SET text = %s WHERE id = %s'
+
+
+def convert(transform):
+    """
+    Переписывает колонку text пачками по BATCH_SIZE строк.
+
+    Строки читаются и пишутся напрямую, мимо поля модели,
+    чтобы в обратной миграции текст не сжимался снова.
+    """
+    def run(apps, schema_editor):
+        connection = schema_editor.connection
+        last_pk = 0
+        while True:
+            with transaction.atomic(using=connection.alias), \
+                    connection.cursor() as cursor:
+                cursor.execute(SELECT_SQL, (last_pk, BATCH_SIZE))
+                rows = cursor.fetchall()
+                if not rows:
+                    return
+                changes = []
+                for pk, text in rows:
+                    value = transform(text)
+                    if value is not text:
+                        changes.append((value, pk))
+                cursor.executemany(UPDATE_SQL, changes)
+            last_pk = rows[-1][0]
+    return run
+
+
+def compress(text):
+    if isinstance(text, bytes):
+        return text
+    return notes.fields.compress_text(text)
+
+
+class Migration(migrations.Migration):
+    # Пачки фиксируются по отдельности, и прерванную миграцию можно
+    # запустить снова: уже сжатые строки пропускаются.
+    atomic = False
+
+    dependencies = [
+        ('notes', '0003_note_fts'),
+    ]
+
+    operations = [
+        # Тип колонки не меняется, поэтому схема в базе остаётся прежней:
+        # AlterField в SQLite пересоздал бы таблицу целиком.
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.AlterField(
+                    model_name='note',
+                    name='text',
+                    field=notes.fields.CompressedTextField(
+                        help_text='Добавьте подробностей',
+                        verbose_name='Текст',
+                    ),
+                ),
+            ],
+        ),
+        migrations.RunPython(
+            convert(compress), convert(notes.fields.decompress_text)
+        ),
+    ]
@@ -1,7 +1,11 @@
 from django.conf import settings
-from django.db import models
+from django.db import IntegrityError, models, transaction
 
-from pytils.translit import slugify
+from .fields import CompressedTextField
+from .slugs import allocate_slug
+
+# Сколько раз подбирать slug заново, если его занял параллельный запрос.
+SLUG_ATTEMPTS = 3
 
 
 class Note(models.Model):
@@ -11,7 +15,7 @@ class Note(models.Model):
         default='Название заметки',
         help_text='Дайте короткое название заметке'
     )
-    text = models.TextField(
+    text = CompressedTextField(
         'Текст',
         help_text='Добавьте подробностей'
     )
@@ -28,11 +32,31 @@ class Note(models.Model):
         on_delete=models.CASCADE,
     )
 
+    class Meta:
+        indexes = (
+            models.Index(fields=('author', 'id'), name='note_author_id_idx'),
+        )
+
     def __str__(self):
         return self.title
 
     def save(self, *args, **kwargs):
-        if not self.slug:
-            max_slug_length = self._meta.get_field('slug').max_length
-            self.slug = slugify(self.title)[:max_slug_length]
-        super().save(*args, **kwargs)
+        """
+        Сохраняет заметку, подбирая свободный slug, если он не задан.
+
+        Вставка с подобранным slug выполняется в точке сохранения:
+        если slug успел занять другой запрос, он подбирается заново.
+        """
+        if self.slug:
+            return super().save(*args, **kwargs)
+        max_slug_length = self._meta.get_field('slug').max_length
+        others = type(self)._default_manager.exclude(pk=self.pk)
+        for attempt in range(SLUG_ATTEMPTS):
+            self.slug = allocate_slug(others, self.title, max_slug_length)
+            try:
+                with transaction.atomic():
+                    return super().save(*args, **kwargs)
+            except IntegrityError:
+                self.slug = ''
+                if attempt == SLUG_ATTEMPTS - 1:
+                    raise
@@ -0,0 +1,155 @@
+import re
+from collections import namedtuple
+
+from django.db import connection, transaction
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+
+from .pagination import InvalidCursor, KeysetPage, decode_cursor, encode_cursor
+
+# Вес совпадений в заголовке и в тексте для bm25; колонка владельца
+# нужна только для отбора заметок и в оценку не входит.
+TITLE_WEIGHT = 10.0
+TEXT_WEIGHT = 1.0
+SNIPPET_TOKENS = 16
+# Служебные символы, которыми FTS5 отмечает совпадения во фрагменте;
+# после экранирования HTML они заменяются тегами <mark>.
+MARK_START = '\x02'
+MARK_END = '\x03'
+TOKEN = re.compile(r'\w+')
+
+SearchResult = namedtuple(
+    'SearchResult', ('pk', 'slug', 'title', 'snippet', 'score')
+)
+
+SEARCH_SQL = f"""
+    SELECT id, slug, title, snippet, score FROM (
+        SELECT notes_note.id, notes_note.slug,
+               highlight(notes_note_fts, 0, %s, %s) AS title,
+               snippet(notes_note_fts, 1, %s, %s, '…', {SNIPPET_TOKENS})
+                   AS snippet,
+               bm25(notes_note_fts, {TITLE_WEIGHT}, {TEXT_WEIGHT}, 0.0)
+                   AS score
+        FROM notes_note_fts
+        JOIN notes_note ON notes_note.id = notes_note_fts.rowid
+        WHERE notes_note_fts MATCH %s AND notes_note.author_id = %s
+    )
+    WHERE score > %s OR (score = %s AND id > %s)
+    ORDER BY score, id
+    LIMIT %s
+"""
+DELETE_SQL = 'DELETE FROM notes_note_fts WHERE rowid = %s'
+INSERT_SQL = (
+    'INSERT INTO notes_note_fts(rowid, title, text, owner) '
+    'VALUES (%s, %s, %s, %s)'
+)
+
+
+def build_match_query(query, author_id):
+    """
+    Превращает пользовательский ввод в безопасный запрос FTS5.
+
+    Каждое слово берётся в кавычки, чтобы операторы FTS5 в вводе
+    не ломали запрос, и ищется как префикс — так находятся
+    разные формы слова. Слова ищутся только в заголовке и тексте,
+    а условие на колонку owner оставляет только заметки автора
+    ещё внутри индекса.
+    """
+    words = ' '.join(
+        f'"{token}"*' for token in TOKEN.findall(query.lower())
+    )
+    if not words:
+        return ''
+    return f'owner:"{author_id}" AND {{title text}}: ({words})'
+
+
+def highlight(snippet):
+    return mark_safe(
+        escape(snippet)
+        .replace(MARK_START, '<mark>')
+        .replace(MARK_END, '</mark>')
+    )
+
+
+def search_notes(author_id, query, per_page, cursor=None):
+    """
+    Ищет заметки автора, упорядочивая их по релевантности bm25.
+
+    Страницы выдаются по курсору из пары (оценка, id).
+    """
+    match = build_match_query(query, author_id)
+    if not match:
+        return KeysetPage([], None)
+    score, last_pk = float('-inf'), 0
+    if cursor:
+        score, last_pk = decode_cursor(cursor, 2)
+        if not isinstance(score, float) or not isinstance(last_pk, int):
+            raise InvalidCursor(cursor)
+    with connection.cursor() as db_cursor:
+        db_cursor.execute(SEARCH_SQL, (
+            MARK_START, MARK_END, MARK_START, MARK_END, match, author_id,
+            score, score, last_pk, per_page + 1,
+        ))
+        rows = db_cursor.fetchall()
+    results = [
+        SearchResult(pk, slug, highlight(title), highlight(snippet), score)
+        for pk, slug, title, snippet, score in rows
+    ]
+    next_cursor = None
+    if len(results) > per_page:
+        results = results[:per_page]
+        next_cursor = encode_cursor([results[-1].score, results[-1].pk])
+    return KeysetPage(results, next_cursor)
+
+
+def index_note(note, created=False):
+    """Добавляет заметку в индекс, заменяя прежнюю запись."""
+    with connection.cursor() as db_cursor:
+        if not created:
+            db_cursor.execute(DELETE_SQL, (note.pk,))
+        db_cursor.execute(
+            INSERT_SQL, (note.pk, note.title, note.text, note.author_id)
+        )
+
+
+def unindex_note(pk):
+    with connection.cursor() as db_cursor:
+        db_cursor.execute(DELETE_SQL, (pk,))
+
+
+def rebuild_index(queryset, batch_size, progress=None):
+    """
+    Заполняет индекс заново пачками по batch_size заметок.
+
+    Заметки читаются через ORM, поэтому в индекс попадает тот же
+    текст, что видит приложение. Каждая пачка сохраняется в своей
+    транзакции, поэтому запись в notes_note не блокируется на всё
+    время перестроения; пока оно идёт, поиск находит только уже
+    проиндексированные заметки. После каждой пачки вызывается
+    progress(число заметок).
+    """
+    with connection.cursor() as db_cursor:
+        db_cursor.execute('DELETE FROM notes_note_fts')
+    last_pk, indexed = 0, 0
+    queryset = queryset.order_by('pk').only(
+        'pk', 'title', 'text', 'author_id'
+    )
+    while True:
+        with transaction.atomic():
+            rows = [
+                (note.pk, note.title, note.text, note.author_id)
+                for note in queryset.filter(pk__gt=last_pk)[:batch_size]
+            ]
+            if not rows:
+                break
+            with connection.cursor() as db_cursor:
+                db_cursor.executemany(INSERT_SQL, rows)
+        last_pk = rows[-1][0]
+        indexed += len(rows)
+        if progress:
+            progress(indexed)
+    with connection.cursor() as db_cursor:
+        db_cursor.execute(
+            "INSERT INTO notes_note_fts(notes_note_fts) VALUES ('optimize')"
+        )
+    return indexed
@@ -0,0 +1,27 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import Note
+from .search import index_note, unindex_note
+
+
+@receiver(post_save, sender=Note)
+def update_search_index(
+    sender, instance, created, update_fields=None, **kwargs
+):
+    """
+    Обновляет запись заметки в полнотекстовом индексе.
+
+    Запись в индекс идёт в той же транзакции, что и сохранение
+    заметки. Сохранение без заголовка и текста индекс не трогает.
+    """
+    if update_fields is not None and not {'title', 'text'} & set(
+        update_fields
+    ):
+        return
+    index_note(instance, created)
+
+
+@receiver(post_delete, sender=Note)
+def remove_from_search_index(sender, instance, **kwargs):
+    unindex_note(instance.pk)
@@ -0,0 +1,78 @@
+import functools
+import re
+
+from django.db.models import BigIntegerField, Count, Max, Q
+from django.db.models.functions import Cast, Substr
+
+from pytils.translit import slugify
+
+# Место под суффикс вида «-123456789» у длинного slug.
+SUFFIX_LENGTH = 10
+FALLBACK_SLUG = 'note'
+# Заголовки заметок часто повторяются («Список покупок», «Идеи»),
+# а транслитерация pytils заметно дороже поиска в словаре.
+SLUGIFY_CACHE_SIZE = 4096
+
+
+@functools.lru_cache(maxsize=SLUGIFY_CACHE_SIZE)
+def cached_slugify(title):
+    """Функция slugify() из pytils с ограниченным LRU-кэшем."""
+    return slugify(title)
+
+
+def slugify_many(titles):
+    """
+    Slug для списка заголовков при массовом импорте.
+
+    Каждый различный заголовок транслитерируется один раз. Общий
+    LRU-кэш не используется, чтобы импорт не вытеснил из него
+    заголовки, которые встречаются в обычных запросах.
+    """
+    slugs = {title: slugify(title) for title in set(titles)}
+    return [slugs[title] for title in titles]
+
+
+def slug_candidates(base, max_length):
+    """
+    Варианты slug по порядку: base, base-2, base-3, ...
+
+    Первый элемент — сам base, второй — префикс, к которому
+    добавляются суффиксы. У длинного base префикс обрезается,
+    чтобы суффикс поместился в max_length.
+    """
+    prefix = base
+    if len(base) > max_length - SUFFIX_LENGTH:
+        prefix = base[:max_length - SUFFIX_LENGTH].rstrip('-')
+    return base, prefix
+
+
+def allocate_slug(queryset, title, max_length):
+    """
+    Возвращает свободный slug для заголовка одним запросом к базе.
+
+    Запрос по индексу slug проверяет, занят ли сам base, и находит
+    наибольший номер среди slug вида «prefix-<цифры>»: диапазон
+    [prefix-0, prefix-:) ограничивает просмотр строками, где за
+    префиксом идёт цифра, а регулярное выражение отбрасывает такие,
+    как «prefix-2-idei». Следующий slug получает номер на единицу
+    больше. Между выбором и вставкой slug может занять параллельный
+    запрос, поэтому вызывающий код должен повторить попытку
+    при IntegrityError.
+    """
+    base = cached_slugify(title)[:max_length] or FALLBACK_SLUG
+    base, prefix = slug_candidates(base, max_length)
+    numbered = Q(
+        slug__gte=f'{prefix}-0',
+        slug__lt=f'{prefix}-:',
+        slug__regex=rf'^{re.escape(prefix)}-[0-9]+$',
+    )
+    taken = queryset.filter(Q(slug=base) | numbered).aggregate(
+        base=Count('pk', filter=Q(slug=base)),
+        number=Max(
+            Cast(Substr('slug', len(prefix) + 2), BigIntegerField()),
+            filter=numbered & ~Q(slug=base),
+        ),
+    )
+    if not taken['base']:
+        return base
+    return f'{prefix}-{(taken["number"] or 1) + 1}'
@@ -1,8 +1,16 @@
-from django.test import TestCase, Client
+import tempfile
+from copy import deepcopy
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, Client, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.contrib.auth import get_user_model
 from django.urls import reverse
 
 from notes.models import Note
+from yanote.instrumentation import find_full_scans
 
 User = get_user_model()
 
@@ -10,6 +18,20 @@ User = get_user_model()
 class NotesTestCase(TestCase):
     """Базовый класс для тестов с общими фикстурами."""
 
+    @classmethod
+    def setUpClass(cls):
+        """Перенос файлового кэша во временный каталог."""
+        # Иначе тесты читали бы и очищали рабочий кэш проекта.
+        location = tempfile.TemporaryDirectory()
+        cls.addClassCleanup(location.cleanup)
+        caches = deepcopy(settings.CACHES)
+        caches['default']['LOCATION'] = location.name
+        caches['default']['OPTIONS']['SHARED']['LOCATION'] = location.name
+        override = override_settings(CACHES=caches)
+        override.enable()
+        cls.addClassCleanup(override.disable)
+        super().setUpClass()
+
     @classmethod
     def setUpTestData(cls):
         """Создание общих тестовых данных."""
@@ -35,7 +57,40 @@ class NotesTestCase(TestCase):
 
     def setUp(self):
         """Настройка тестовых клиентов."""
+        cache.clear()
+        self.addCleanup(cache.clear)
         self.author_client = Client()
         self.author_client.force_login(self.author)
         self.reader_client = Client()
         self.reader_client.force_login(self.reader)
+
+    def assertQueryBudget(self, response, budget):  # noqa: N802
+        """
+        Проверяет, что ответ уложился в бюджет запросов к базе.
+
+        Число запросов берётся из response.query_stats,
+        которые сохраняет QueryStatsMiddleware.
+        """
+        stats = response.query_stats
+        self.assertLessEqual(
+            stats.count,
+            budget,
+            '\n'.join(sql for sql, _ in stats.queries),
+        )
+
+    def assertNoFullScans(self, func, allowed_tables=()):  # noqa: N802
+        """
+        Проверяет планы запросов, выполненных при вызове func.
+
+        Все SELECT проверяются через EXPLAIN QUERY PLAN:
+        полный просмотр таблицы считается ошибкой.
+        """
+        with CaptureQueriesContext(connection) as context:
+            func()
+        scans = find_full_scans(
+            (query['sql'] for query in context.captured_queries),
+            allowed_tables,
+        )
+        self.assertFalse(
+            scans, '\n'.join(f'{plan}: {sql}' for sql, plan in scans)
+        )
@@ -1,5 +1,8 @@
+from django.test import override_settings
 from django.urls import reverse
 from notes.forms import NoteForm
+from notes.models import Note
+from notes.pagination import encode_cursor
 
 from .common import NotesTestCase
 
@@ -21,6 +24,41 @@ class TestContent(NotesTestCase):
         object_list = response.context['object_list']
         self.assertNotIn(self.note, object_list)
 
+    @override_settings(NOTES_ON_PAGE=3)
+    def test_list_pages_cover_all_notes(self):
+        """Страницы списка по курсору выводят все заметки по одному разу."""
+        Note.objects.bulk_create(
+            Note(title=f'Заметка {index}', text='Текст',
+                 slug=f'note-{index}', author=self.author)
+            for index in range(7)
+        )
+        url = reverse('notes:list')
+        seen = []
+        while url:
+            response = self.author_client.get(url)
+            page = response.context['page']
+            seen.extend(note.pk for note in page)
+            url = (
+                f'{reverse("notes:list")}?cursor={page.next_cursor}'
+                if page.has_next else None
+            )
+        self.assertEqual(seen, list(
+            Note.objects.filter(author=self.author)
+            .order_by('pk').values_list('pk', flat=True)
+        ))
+        self.assertEqual(
+            response.context['object_list'][0].get_deferred_fields(),
+            {'text', 'author_id'},
+        )
+
+    def test_list_invalid_cursor(self):
+        for cursor in ('мусор', encode_cursor([None]), encode_cursor(['x'])):
+            with self.subTest(cursor=cursor):
+                response = self.author_client.get(
+                    reverse('notes:list'), {'cursor': cursor}
+                )
+                self.assertEqual(response.status_code, 404)
+
     def test_create_edit_pages_contain_form(self):
         """Страницы создания и редактирования содержат форму."""
         urls = (
@@ -33,3 +71,11 @@ class TestContent(NotesTestCase):
                 response = self.author_client.get(url)
                 self.assertIn('form', response.context)
                 self.assertIsInstance(response.context['form'], NoteForm)
+
+    def test_home_page_cached_only_for_anonymous(self):
+        """Кэш главной страницы не выдаётся вошедшему пользователю."""
+        url = reverse('notes:home')
+        anonymous = self.client.get(url)
+        self.assertEqual(self.client.get(url).content, anonymous.content)
+        response = self.author_client.get(url)
+        self.assertContains(response, self.author.username)
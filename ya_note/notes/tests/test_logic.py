@@ -1,7 +1,18 @@
+import zlib
+from importlib import import_module
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from pytils.translit import slugify
 
-from notes.forms import WARNING
+from notes.forms import WARNING, NoteForm
+from notes import models
+from notes.fields import Compressed, decompress_text
 from notes.models import Note
+from notes.slugs import cached_slugify, slugify_many
 from .common import NotesTestCase
 
 
@@ -47,6 +58,84 @@ class TestLogic(NotesTestCase):
         expected_slug = slugify(self.form_data['title'])
         self.assertEqual(new_note.slug, expected_slug)
 
+    def test_empty_slug_gets_suffix(self):
+        """Заметки с одинаковым заголовком получают slug с номером."""
+        self.form_data.pop('slug')
+        expected_slug = slugify(self.form_data['title'])
+        for suffix in ('', '-2', '-3'):
+            with self.subTest(suffix=suffix):
+                response = self.author_client.post(
+                    self.add_url, data=self.form_data
+                )
+                self.assertRedirects(response, self.success_url)
+                self.assertTrue(
+                    Note.objects.filter(slug=expected_slug + suffix).exists()
+                )
+
+    def test_slug_allocated_with_one_query(self):
+        """Свободный slug подбирается одним запросом к заметкам."""
+        for index in range(5):
+            Note.objects.create(title='Заметка', text='', author=self.author)
+        with CaptureQueriesContext(connection) as queries:
+            note = Note.objects.create(
+                title='Заметка', text='', author=self.author
+            )
+        self.assertEqual(note.slug, 'zametka-6')
+        selects = [
+            query['sql'] for query in queries.captured_queries
+            if query['sql'].startswith('SELECT')
+        ]
+        self.assertEqual(len(selects), 1)
+        self.assertNoFullScans(lambda: Note.objects.create(
+            title='Заметка', text='', author=self.author
+        ))
+
+    def test_slug_number_counts_only_numbered_slugs(self):
+        """Номер берётся только из slug вида «prefix-<цифры>»."""
+        for slug in ('zametka', 'zametka-7', 'zametka-2-idei', 'zametka-a'):
+            Note.objects.create(
+                title='Заметка', text='', author=self.author, slug=slug
+            )
+        note = Note.objects.create(
+            title='Заметка', text='', author=self.author
+        )
+        self.assertEqual(note.slug, 'zametka-8')
+
+    def test_slug_taken_after_form_check(self):
+        """Slug, занятый после проверки формы, возвращается ошибкой."""
+        notes_before = Note.objects.count()
+        with mock.patch.object(
+            NoteForm, 'clean_slug', lambda form: self.note.slug
+        ):
+            response = self.author_client.post(
+                self.add_url, data=self.form_data
+            )
+        self.assertFormError(
+            response.context['form'], 'slug', self.note.slug + WARNING
+        )
+        self.assertEqual(Note.objects.count(), notes_before)
+
+    def test_slug_retried_after_integrity_error(self):
+        """Если slug занят параллельно, он подбирается заново."""
+        allocate = mock.Mock(
+            side_effect=[self.note.slug, 'zametka'],
+        )
+        with mock.patch.object(models, 'allocate_slug', allocate):
+            note = Note.objects.create(
+                title='Заметка', text='', author=self.author
+            )
+        self.assertEqual(note.slug, 'zametka')
+        self.assertEqual(allocate.call_count, 2)
+
+    def test_cached_slugify(self):
+        """Кэшированная и пакетная транслитерация совпадают с pytils."""
+        titles = ['Список покупок', 'Идеи', 'Список покупок']
+        self.assertEqual(slugify_many(titles), [slugify(t) for t in titles])
+        cached_slugify.cache_clear()
+        for title in titles:
+            self.assertEqual(cached_slugify(title), slugify(title))
+        self.assertEqual(cached_slugify.cache_info().hits, 1)
+
     def test_author_can_edit_note(self):
         """Автор может редактировать свою заметку."""
         notes_count = Note.objects.count()
@@ -99,3 +188,74 @@ class TestLogic(NotesTestCase):
         self.assertEqual(self.note.title, note_from_db.title)
         self.assertEqual(self.note.text, note_from_db.text)
         self.assertEqual(self.note.slug, note_from_db.slug)
+
+    def test_generate_data(self):
+        """Синтетические заметки повторяются при одинаковом seed."""
+        def generate():
+            call_command(
+                'generate_data', users=5, notes=100, batch_size=30,
+                stdout=StringIO(),
+            )
+            return list(Note.objects.filter(
+                author__username__startswith='user'
+            ).order_by('pk').values_list('title', 'text', 'author__username'))
+
+        first = generate()
+        self.assertEqual(len(first), 100)
+        Note.objects.filter(author__username__startswith='user').delete()
+        self.assertEqual(generate(), first)
+
+
+class TestCompressedText(NotesTestCase):
+    """Класс для тестирования сжатого текста заметок."""
+
+    LOG = 'INFO запрос обработан за 12 мс\n' * 1000
+
+    def stored_type(self, note):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT typeof(text) FROM notes_note WHERE id = %s',
+                (note.pk,),
+            )
+            return cursor.fetchone()[0]
+
+    def test_long_text_is_compressed(self):
+        """Длинный текст хранится сжатым, короткий — как есть."""
+        note = Note.objects.create(
+            title='Лог', text=self.LOG, author=self.author
+        )
+        self.assertEqual(self.stored_type(note), 'blob')
+        self.assertEqual(self.stored_type(self.note), 'text')
+        self.assertEqual(Note.objects.get(pk=note.pk).text, self.LOG)
+
+    def test_text_is_decompressed_lazily(self):
+        """Нетронутый текст распаковывается лениво и не сжимается заново."""
+        note = Note.objects.create(
+            title='Лог', text=self.LOG, author=self.author
+        )
+        note = Note.objects.get(pk=note.pk)
+        self.assertIsInstance(note.__dict__['text'], Compressed)
+        note.title = 'Новый заголовок'
+        with mock.patch(
+            'notes.fields.zlib.compress', wraps=zlib.compress
+        ) as compress:
+            note.save()
+        compress.assert_not_called()
+        self.assertEqual(self.stored_type(note), 'blob')
+        self.assertEqual(note.text, self.LOG)
+
+    def test_migration_converts_existing_rows(self):
+        """Миграция сжимает старые строки и распаковывает их обратно."""
+        migration = import_module(
+            'notes.migrations.0004_note_text_compressed'
+        )
+        note = Note.objects.create(title='Лог', text='', author=self.author)
+        with connection.cursor() as cursor:
+            cursor.execute(migration.UPDATE_SQL, (self.LOG, note.pk))
+        schema_editor = mock.Mock(connection=connection)
+        with mock.patch.object(migration, 'BATCH_SIZE', 1):
+            migration.convert(migration.compress)(None, schema_editor)
+            self.assertEqual(self.stored_type(note), 'blob')
+            migration.convert(decompress_text)(None, schema_editor)
+        self.assertEqual(self.stored_type(note), 'text')
+        self.assertEqual(Note.objects.get(pk=note.pk).text, self.LOG)
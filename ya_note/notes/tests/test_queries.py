@@ -0,0 +1,123 @@
+import json
+import re
+import tempfile
+from io import StringIO
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management import call_command
+from django.db import connection
+from django.test import override_settings
+from django.urls import reverse
+
+from yanote.instrumentation import FULL_SCAN
+from yanote.profiling import make_token
+from .common import NotesTestCase
+
+
+class TestQueries(NotesTestCase):
+    """Класс для проверки бюджета запросов к базе."""
+
+    def test_query_budgets(self):
+        """Страницы не превышают бюджет запросов к базе."""
+        # Сессия и пользователь авторизованного клиента — два запроса.
+        # Создание и удаление заметки обновляют полнотекстовый индекс.
+        # Сохранение формы идёт в точке сохранения (две команды):
+        # занятый slug откатывается и возвращается ошибкой формы.
+        budgets = [
+            ('notes:home', None, 'get', 0, self.client),
+            ('notes:home', None, 'get', 2, self.author_client),
+            ('notes:list', None, 'get', 3, self.author_client),
+            ('notes:add', None, 'get', 2, self.author_client),
+            ('notes:add', None, 'post', 7, self.author_client),
+            ('notes:success', None, 'get', 2, self.author_client),
+            ('notes:detail', (self.note.slug,), 'get', 3, self.author_client),
+            ('notes:edit', (self.note.slug,), 'get', 3, self.author_client),
+            ('notes:edit', (self.note.slug,), 'post', 7, self.author_client),
+            ('notes:delete', (self.note.slug,), 'get', 3, self.author_client),
+            ('notes:delete', (self.note.slug,), 'post', 5, self.author_client),
+        ]
+        for name, args, method, budget, client in budgets:
+            with self.subTest(name=name, method=method):
+                url = reverse(name, args=args)
+                data = self.form_data if method == 'post' else None
+                response = getattr(client, method)(url, data=data)
+                self.assertQueryBudget(response, budget)
+
+    def test_queries_use_indexes(self):
+        """Запросы страниц не просматривают таблицы целиком."""
+        urls = [
+            ('notes:list', None),
+            ('notes:detail', (self.note.slug,)),
+            ('notes:edit', (self.note.slug,)),
+            ('notes:delete', (self.note.slug,)),
+        ]
+        for name, args in urls:
+            with self.subTest(name=name):
+                url = reverse(name, args=args)
+                self.assertNoFullScans(lambda: self.author_client.get(url))
+        with self.subTest(name='notes:add'):
+            self.assertNoFullScans(lambda: self.author_client.post(
+                reverse('notes:add'), data=self.form_data
+            ))
+
+    def test_full_scan_plan_formats(self):
+        """Полный просмотр распознаётся в планах SQLite 3.36+ и старше."""
+        plans = {
+            'SCAN notes_note': 'notes_note',
+            'SCAN TABLE notes_note': 'notes_note',
+            'SCAN notes_note USING INDEX notes_note_author_id': None,
+            'SCAN TABLE notes_note USING INDEX notes_note_author_id': None,
+            'SEARCH notes_note USING INTEGER PRIMARY KEY (rowid=?)': None,
+        }
+        for plan, table in plans.items():
+            with self.subTest(plan=plan):
+                match = FULL_SCAN.match(plan)
+                self.assertEqual(match and match.group(1), table)
+
+    def test_server_timing_header(self):
+        """Ответ содержит заголовок Server-Timing."""
+        response = self.client.get(reverse('notes:home'))
+        self.assertTrue(response['Server-Timing'].startswith('db;dur='))
+
+    def test_sqlite_pragmas(self):
+        """Соединение настроено при подключении."""
+        with connection.cursor() as cursor:
+            for name in ('busy_timeout', 'cache_size', 'synchronous'):
+                with self.subTest(pragma=name):
+                    cursor.execute(f'PRAGMA {name}')
+                    expected = settings.SQLITE_PRAGMAS[name]
+                    self.assertEqual(
+                        cursor.fetchone()[0],
+                        1 if expected == 'NORMAL' else expected,
+                    )
+        self.assertEqual(connection.transaction_mode, 'IMMEDIATE')
+
+    def test_profiled_request(self):
+        """Запрос с заголовком X-Profile профилируется и входит в отчёт."""
+        with tempfile.TemporaryDirectory() as directory:
+            with override_settings(PROFILE_DIR=directory):
+                response = self.author_client.get(
+                    reverse('notes:list'), HTTP_X_PROFILE=make_token()
+                )
+                out = StringIO()
+                call_command('profile_report', stdout=out)
+            [dump] = Path(directory).glob('*.json')
+            meta = json.loads(dump.read_text())
+        self.assertEqual(meta['view'], 'notes:list')
+        self.assertIn('notes:list: запросов 1', out.getvalue())
+        templates = re.search(r'tpl;dur=([\d.]+)', response['Server-Timing'])
+        self.assertGreater(float(templates.group(1)), 0)
+
+    def test_slow_request_log(self):
+        """Медленный запрос пишется в журнал одной строкой JSON."""
+        url = reverse('notes:list')
+        with override_settings(SLOW_REQUEST_THRESHOLD=0):
+            with self.assertLogs('slow_requests', 'WARNING') as logs:
+                self.author_client.get(url)
+        [line] = logs.records
+        entry = json.loads(line.getMessage())
+        self.assertEqual(entry['url_name'], 'notes:list')
+        self.assertEqual(entry['status'], 200)
+        with self.assertNoLogs('slow_requests', 'WARNING'):
+            self.author_client.get(url)
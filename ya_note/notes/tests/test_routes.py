@@ -15,6 +15,7 @@ class TestRoutes(NotesTestCase):
             ('users:logout', None, 405),
             # Auth
             ('notes:list', None, 200, self.author_client),
+            ('notes:search', None, 200, self.author_client),
             ('notes:add', None, 200, self.author_client),
             ('notes:success', None, 200, self.author_client),
             ('notes:detail', (self.note.slug,), 200, self.author_client),
@@ -38,6 +39,7 @@ class TestRoutes(NotesTestCase):
         login_url = reverse('users:login')
         urls = [
             ('notes:list', None),
+            ('notes:search', None),
             ('notes:add', None),
             ('notes:success', None),
             ('notes:detail', (self.note.slug,)),
@@ -0,0 +1,110 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import override_settings
+from django.urls import reverse
+
+from notes.models import Note
+from .common import NotesTestCase
+
+
+class TestSearch(NotesTestCase):
+    """Класс для тестирования поиска по заметкам."""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.search_url = reverse('notes:search')
+
+    def search(self, query, client=None, **params):
+        client = client or self.author_client
+        response = client.get(self.search_url, {'q': query, **params})
+        return response, [result.pk for result in response.context['page']]
+
+    def test_search_ranks_title_higher(self):
+        """Совпадение в заголовке выше совпадения в тексте."""
+        in_text = Note.objects.create(
+            title='Покупки', text='Купить роботов', author=self.author
+        )
+        in_title = Note.objects.create(
+            title='Роботы', text='Текст', author=self.author
+        )
+        response, found = self.search('робот')
+        self.assertEqual(found, [in_title.pk, in_text.pk])
+        self.assertContains(response, '<mark>Роботы</mark>')
+        self.assertContains(response, 'Купить <mark>роботов</mark>')
+
+    def test_search_is_scoped_to_user(self):
+        """Пользователь находит только свои заметки."""
+        _, found = self.search('заголовок', self.reader_client)
+        self.assertEqual(found, [])
+        _, found = self.search('заголовок')
+        self.assertEqual(found, [self.note.pk])
+
+    def test_search_ignores_owner_column(self):
+        """Слова запроса не совпадают с id владельца в индексе."""
+        _, found = self.search(str(self.author.pk))
+        self.assertEqual(found, [])
+
+    def test_search_index_follows_changes(self):
+        """Индекс обновляется при создании, правке и удалении заметки."""
+        self.author_client.post(reverse('notes:add'), data={
+            'title': 'Космос', 'text': 'Текст', 'slug': 'kosmos',
+        })
+        note = Note.objects.get(slug='kosmos')
+        self.assertEqual(self.search('космос')[1], [note.pk])
+        self.author_client.post(reverse('notes:edit', args=(note.slug,)), {
+            'title': 'Океан', 'text': 'Текст', 'slug': note.slug,
+        })
+        self.assertEqual(self.search('космос')[1], [])
+        self.assertEqual(self.search('океан')[1], [note.pk])
+        self.author_client.post(reverse('notes:delete', args=(note.slug,)))
+        self.assertEqual(self.search('океан')[1], [])
+
+    @override_settings(SEARCH_RESULTS_ON_PAGE=2)
+    def test_search_pagination(self):
+        """Постраничная выдача результатов поиска по курсору."""
+        Note.objects.bulk_create(
+            Note(title=f'Заметка {index}', text='Общий текст',
+                 slug=f'common-{index}', author=self.author)
+            for index in range(5)
+        )
+        call_command('rebuild_notes_index', stdout=StringIO())
+        response, seen = self.search('общий')
+        page = response.context['page']
+        while page.has_next:
+            response, found = self.search('общий', cursor=page.next_cursor)
+            page = response.context['page']
+            seen += found
+        self.assertCountEqual(seen, Note.objects.filter(
+            slug__startswith='common'
+        ).values_list('pk', flat=True))
+
+    def test_search_query_is_escaped(self):
+        """Операторы FTS5 в запросе не ломают поиск и отбор по автору."""
+        response, found = self.search(
+            'заголовок" OR owner:', self.reader_client
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(found, [])
+
+    def test_compressed_note_is_searchable(self):
+        """Сжатый текст попадает в индекс распакованным."""
+        note = Note.objects.create(
+            title='Лог', text='ошибка соединения\n' * 1000,
+            author=self.author,
+        )
+        call_command('rebuild_notes_index', stdout=StringIO())
+        response, found = self.search('соединения')
+        self.assertEqual(found, [note.pk])
+        self.assertContains(response, '<mark>соединения</mark>')
+
+    def test_rebuild_notes_index(self):
+        """Перестроение индекса командой пачками."""
+        with connection.cursor() as cursor:
+            cursor.execute('DELETE FROM notes_note_fts')
+        out = StringIO()
+        call_command('rebuild_notes_index', batch_size=1, stdout=out)
+        self.assertIn('заметок: 1', out.getvalue())
+        self.assertEqual(self.search('заголовок')[1], [self.note.pk])
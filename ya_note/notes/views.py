@@ -1,9 +1,14 @@
+from django.conf import settings
 from django.contrib.auth.mixins import LoginRequiredMixin
+from django.db import IntegrityError, transaction
+from django.http import Http404
 from django.urls import reverse_lazy
 from django.views import generic
 
-from .forms import NoteForm
+from .forms import WARNING, NoteForm
 from .models import Note
+from .pagination import InvalidCursor, KeysetPaginator
+from .search import search_notes
 
 
 class Home(generic.TemplateView):
@@ -26,22 +31,39 @@ class NoteBase(LoginRequiredMixin):
         return self.model.objects.filter(author=self.request.user)
 
 
-class NoteCreate(NoteBase, generic.CreateView):
-    """Добавление заметки."""
+class NoteFormMixin:
+    """Сохранение формы заметки с проверкой slug при записи."""
     template_name = 'notes/form.html'
     form_class = NoteForm
 
     def form_valid(self, form):
-        new_note = form.save(commit=False)
-        new_note.author = self.request.user
-        new_note.save()
+        """
+        Сохраняет заметку; занятый slug возвращает ошибкой формы.
+
+        Между проверкой в NoteForm.clean_slug и вставкой тот же slug
+        может сохранить параллельный запрос.
+        """
+        try:
+            with transaction.atomic():
+                return super().form_valid(form)
+        except IntegrityError:
+            slug = form.cleaned_data.get('slug')
+            if not slug:
+                raise
+            form.add_error('slug', slug + WARNING)
+            return self.form_invalid(form)
+
+
+class NoteCreate(NoteBase, NoteFormMixin, generic.CreateView):
+    """Добавление заметки."""
+
+    def form_valid(self, form):
+        form.instance.author = self.request.user
         return super().form_valid(form)
 
 
-class NoteUpdate(NoteBase, generic.UpdateView):
+class NoteUpdate(NoteBase, NoteFormMixin, generic.UpdateView):
     """Редактирование заметки."""
-    template_name = 'notes/form.html'
-    form_class = NoteForm
 
 
 class NoteDelete(NoteBase, generic.DeleteView):
@@ -50,8 +72,53 @@ class NoteDelete(NoteBase, generic.DeleteView):
 
 
 class NotesList(NoteBase, generic.ListView):
-    """Список всех заметок пользователя."""
+    """
+    Список заметок пользователя.
+
+    Следующие страницы открываются по курсору, запрос идёт
+    по индексу (author, id) и читает только поля, которые выводит
+    шаблон, без текста заметок.
+    """
     template_name = 'notes/list.html'
+    keyset_ordering = ('pk',)
+
+    def get_queryset(self):
+        paginator = KeysetPaginator(
+            super().get_queryset().only('id', 'slug', 'title'),
+            self.keyset_ordering,
+            settings.NOTES_ON_PAGE,
+        )
+        try:
+            self.page = paginator.get_page(self.request.GET.get('cursor'))
+        except InvalidCursor:
+            raise Http404('Некорректный курсор страницы.')
+        return self.page.object_list
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['page'] = self.page
+        return context
+
+
+class NoteSearch(LoginRequiredMixin, generic.TemplateView):
+    """Полнотекстовый поиск по заметкам пользователя."""
+    template_name = 'notes/search.html'
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        query = self.request.GET.get('q', '').strip()
+        try:
+            page = search_notes(
+                self.request.user.pk,
+                query,
+                settings.SEARCH_RESULTS_ON_PAGE,
+                self.request.GET.get('cursor'),
+            )
+        except InvalidCursor:
+            raise Http404('Некорректный курсор поиска.')
+        context['query'] = query
+        context['page'] = page
+        return context
 
 
 class NoteDetail(NoteBase, generic.DetailView):
@@ -22,7 +22,10 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'yanote.instrumentation.QueryStatsMiddleware',
+    'yanote.profiling.ProfilingMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'yanote.page_cache.AnonymousPageCacheMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -52,10 +55,53 @@ TEMPLATES = [
 WSGI_APPLICATION = 'yanote.wsgi.application'
 
 
+# WAL позволяет читать во время записи, busy_timeout заставляет ждать
+# блокировку вместо ошибки «database is locked». Транзакции IMMEDIATE
+# берут блокировку записи сразу: иначе две транзакции, начавшие
+# с чтения, не могут повысить блокировку и ожидание не помогает.
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': 5000,
+    'mmap_size': 128 * 1024 * 1024,
+    'cache_size': -32 * 1024,
+}
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        'CONN_MAX_AGE': None,
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {
+            'init_command': ';'.join(
+                f'PRAGMA {name}={value}'
+                for name, value in SQLITE_PRAGMAS.items()
+            ),
+            'transaction_mode': 'IMMEDIATE',
+        },
+    }
+}
+
+# Локальный LRU процесса перед общим файловым кэшем. Ключи версий
+# и блокировок меняются на месте и читаются только из общего кэша.
+CACHES = {
+    'default': {
+        'BACKEND': 'yanote.cache_backends.TwoTierCache',
+        'LOCATION': BASE_DIR / '.cache',
+        'OPTIONS': {
+            'BYPASS_PREFIXES': ('version:', 'lock:'),
+            'LOCAL_MAX_BYTES': 32 * 1024 * 1024,
+            'LOCAL_MAX_ENTRIES': 10000,
+            'LOCAL_TIMEOUT': 60,
+            'GENERATION_CHECK_INTERVAL': 1.0,
+            'SHARED': {
+                'BACKEND':
+                    'django.core.cache.backends.filebased.FileBasedCache',
+                'LOCATION': BASE_DIR / '.cache',
+                'OPTIONS': {'MAX_ENTRIES': 100000},
+            },
+        },
     }
 }
 
@@ -87,3 +133,45 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 LOGIN_URL = reverse_lazy('users:login')
 LOGIN_REDIRECT_URL = reverse_lazy('notes:home')
+
+NOTES_ON_PAGE = 50
+SEARCH_RESULTS_ON_PAGE = 20
+
+# Страницы для анонимных посетителей: имя URL → теги для сброса кэша.
+PAGE_CACHE_VIEWS = {
+    'notes:home': (),
+}
+PAGE_CACHE_TIMEOUT = 60 * 5
+PAGE_CACHE_LOCK_TIMEOUT = 5
+
+# Профилирование по требованию: заголовок X-Profile (команда
+# profile_token) или доля случайных запросов.
+PROFILE_DIR = BASE_DIR / 'profiles'
+PROFILE_SAMPLE_RATE = 0
+PROFILE_TOKEN_MAX_AGE = 60 * 60
+
+# Запросы дольше порога (в секундах) пишутся в журнал slow_requests
+# одной строкой JSON вместе с самыми медленными SQL-запросами.
+SLOW_REQUEST_THRESHOLD = 0.5
+SLOW_REQUEST_QUERIES = 5
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'json_line': {'format': '%(message)s'},
+    },
+    'handlers': {
+        'slow_requests': {
+            'class': 'logging.StreamHandler',
+            'formatter': 'json_line',
+        },
+    },
+    'loggers': {
+        'slow_requests': {
+            'handlers': ['slow_requests'],
+            'level': 'WARNING',
+            'propagate': False,
+        },
+    },
+}